@@ -0,0 +1,9 @@
+"""
+Benchmarks de FLY CAR
+
+Se ejecutan como módulos desde la raíz del proyecto, por ejemplo:
+
+    python -m benchmarks.indices --vehiculos 200000
+
+Cada benchmark crea su propia base temporal; nunca toca db.sqlite3.
+"""
@@ -0,0 +1,79 @@
+"""
+Benchmark del índice de autocompletado (core/autocompletado.py)
+
+Construye el índice en memoria con `--clientes` clientes sintéticos (DNI
+correlativos y apellidos de core/generador.py, sin pasar por la base), mide
+la latencia de búsquedas por prefijo de DNI y de apellido y de
+actualizaciones incrementales, y falla si el p99 de las búsquedas supera
+`--umbral-ms`.
+
+    python -m benchmarks.autocompletado --clientes 1000000
+"""
+
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+
+from benchmarks.comun import medir, resumen
+
+from core.autocompletado import IndiceAutocompletado
+from core.generador import APELLIDOS, MARCAS, NOMBRES
+
+
+def filas_clientes(cantidad, rnd):
+    for i in range(cantidad):
+        yield (uuid.UUID(int=rnd.getrandbits(128)), f'{10_000_000 + i:08d}',
+               rnd.choice(NOMBRES), rnd.choice(APELLIDOS))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clientes', type=int, default=1_000_000)
+    parser.add_argument('--repeticiones', type=int, default=2000)
+    parser.add_argument('--umbral-ms', type=float, default=1.0)
+    parser.add_argument('--memoria', action='store_true', help='Mide la memoria del índice (tracemalloc, más lento)')
+    args = parser.parse_args()
+
+    rnd = random.Random(42)
+    marcas = [(uuid.uuid4(), nombre) for nombre in MARCAS]
+    modelos = [
+        (uuid.uuid4(), nombre, marca_id)
+        for marca_id, nombre_marca in marcas for nombre in MARCAS[nombre_marca][2]
+    ]
+    if args.memoria:
+        tracemalloc.start()
+    inicio = time.perf_counter()
+    indice = IndiceAutocompletado(0, marcas, modelos, filas_clientes(args.clientes, rnd))
+    construccion = time.perf_counter() - inicio
+    print(f'== {args.clientes:,} clientes: índice en {construccion:.1f}s')
+    if args.memoria:
+        print(f'   memoria {tracemalloc.get_traced_memory()[0] / 2**20:,.0f} MiB')
+        tracemalloc.stop()
+
+    prefijos = {
+        'dni': [str(10_000_000 + rnd.randrange(args.clientes))[:rnd.randint(2, 8)] for _ in range(100)],
+        'apellido': [rnd.choice(APELLIDOS)[:rnd.randint(1, 4)] for _ in range(100)],
+        'marca': [nombre[:2] for nombre in MARCAS],
+    }
+    fallas = 0
+    for nombre, lista in prefijos.items():
+        tipo = 'marca' if nombre == 'marca' else 'cliente'
+        consultas = iter(lista * (args.repeticiones // len(lista) + 1))
+        tiempos = resumen(medir(lambda: indice.buscar(tipo, next(consultas), 10), args.repeticiones))
+        estado = 'ok' if tiempos['p99'] <= args.umbral_ms else 'LENTO'
+        fallas += estado != 'ok'
+        print(f'{nombre:<10} p50 {tiempos["p50"]:.3f} ms  p95 {tiempos["p95"]:.3f} ms  p99 {tiempos["p99"]:.3f} ms  {estado}')
+
+    nuevos = iter(filas_clientes(args.repeticiones, random.Random(7)))
+    tiempos = resumen(medir(
+        lambda: indice._agregar('cliente', next(nuevos)), args.repeticiones
+    ))
+    print(f'alta       p50 {tiempos["p50"]:.3f} ms  p95 {tiempos["p95"]:.3f} ms  p99 {tiempos["p99"]:.3f} ms')
+    sys.exit(1 if fallas else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark de claves primarias uuid4 contra UUIDv7 en una tabla de alta inserción
+
+Inserta `--filas` filas con la forma de `cotizaciones` (clave char(32) como
+la guarda Django en SQLite, más el índice de paginación que incluye el id)
+en una base en disco con los PRAGMA de settings_produccion, una vez con
+claves uuid4 y otra con UUIDv7, y compara el throughput de inserción (total
+y por décimo, para ver cómo se degrada a medida que el índice supera el
+cache) y el tamaño y la ocupación de cada índice según `dbstat`.
+
+Usa sqlite3 directamente: a 10M de filas el costo del ORM taparía la
+diferencia entre ambos índices.
+
+    python -m benchmarks.claves --filas 10000000
+"""
+
+import argparse
+import sqlite3
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from benchmarks.comun import LOTE
+
+from core.identificadores import uuid7
+from flycar_project.settings_produccion import SQLITE_PRAGMAS
+
+ESQUEMA = [
+    'CREATE TABLE "cotizaciones" ('
+    ' "id" char(32) NOT NULL PRIMARY KEY, "fecha_hora_generada" datetime NOT NULL,'
+    ' "importe_final" decimal NOT NULL, "valida" bool NOT NULL, "cliente_id" char(32) NOT NULL)',
+    'CREATE INDEX "cotizacion_fecha_idx" ON "cotizaciones" ("fecha_hora_generada", "id")',
+]
+
+GENERADORES = {'uuid4': uuid.uuid4, 'uuid7': uuid7}
+
+
+def insertar(archivo, generador, filas, lote):
+    """Inserta `filas` filas y devuelve los segundos de cada lote"""
+    conexion = sqlite3.connect(archivo, isolation_level=None)
+    for pragma, valor in SQLITE_PRAGMAS.items():
+        conexion.execute(f'PRAGMA {pragma} = {valor}')
+    for sentencia in ESQUEMA:
+        conexion.execute(sentencia)
+    clientes = [uuid.uuid4().hex for _ in range(1000)]
+    fecha = datetime(2025, 1, 1)
+    duraciones = []
+    for inicio in range(0, filas, lote):
+        datos = []
+        for i in range(inicio, min(filas, inicio + lote)):
+            fecha += timedelta(milliseconds=3)
+            datos.append((generador().hex, fecha.isoformat(' '), '25000.00', 1, clientes[i % len(clientes)]))
+        comienzo = time.perf_counter()
+        conexion.execute('BEGIN IMMEDIATE')
+        conexion.executemany('INSERT INTO "cotizaciones" VALUES (?, ?, ?, ?, ?)', datos)
+        conexion.execute('COMMIT')
+        duraciones.append(time.perf_counter() - comienzo)
+    conexion.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    conexion.close()
+    return duraciones
+
+
+def tamanios(archivo):
+    """Bytes y ocupación (%) por tabla e índice, según la tabla virtual dbstat"""
+    conexion = sqlite3.connect(archivo)
+    try:
+        filas = conexion.execute(
+            'SELECT name, SUM(pgsize), SUM(pgsize - unused) FROM dbstat GROUP BY name'
+        ).fetchall()
+    finally:
+        conexion.close()
+    return {nombre: (bytes_, 100 * usados / bytes_) for nombre, bytes_, usados in filas}
+
+
+def deciles(duraciones, lote):
+    """Filas por segundo en cada décimo de la carga"""
+    tramo = max(1, len(duraciones) // 10)
+    return [
+        len(duraciones[i:i + tramo]) * lote / sum(duraciones[i:i + tramo])
+        for i in range(0, tramo * 10, tramo) if duraciones[i:i + tramo]
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=10_000_000)
+    parser.add_argument('--lote', type=int, default=LOTE)
+    parser.add_argument('--directorio', help='Directorio para las bases (por defecto uno temporal)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.directorio) as directorio:
+        resultados = {}
+        for nombre, generador in GENERADORES.items():
+            archivo = str(Path(directorio) / f'claves_{nombre}.sqlite3')
+            duraciones = insertar(archivo, generador, args.filas, args.lote)
+            resultados[nombre] = {
+                'filas_por_segundo': args.filas / sum(duraciones),
+                'deciles': deciles(duraciones, args.lote),
+                'tamanios': tamanios(archivo),
+                'archivo': Path(archivo).stat().st_size,
+            }
+
+    print(f'== {args.filas:,} filas, lotes de {args.lote}')
+    for nombre, r in resultados.items():
+        print(f'{nombre}: {r["filas_por_segundo"]:>10,.0f} filas/s   archivo {r["archivo"] / 2**20:>9,.1f} MiB')
+        print('   filas/s por décimo: ' + ' '.join(f'{v:,.0f}' for v in r['deciles']))
+        for objeto, (bytes_, ocupacion) in sorted(r['tamanios'].items()):
+            if objeto.startswith('sqlite_schema'):
+                continue
+            print(f'   {objeto:<36} {bytes_ / 2**20:>9,.1f} MiB  ocupación {ocupacion:5.1f}%')
+    v4, v7 = resultados['uuid4'], resultados['uuid7']
+    print(
+        f'uuid7/uuid4: throughput x{v7["filas_por_segundo"] / v4["filas_por_segundo"]:.2f}, '
+        f'archivo x{v7["archivo"] / v4["archivo"]:.2f}'
+    )
+
+
+if __name__ == '__main__':
+    main()
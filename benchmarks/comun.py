@@ -0,0 +1,66 @@
+"""Utilidades compartidas por los benchmarks"""
+
+import os
+import statistics
+import time
+from contextlib import contextmanager
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'flycar_project.settings_test')
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+
+LOTE = 5000
+
+
+@contextmanager
+def base_temporal(archivo=None):
+    """Crea una base de test migrada (en memoria o en `archivo`) y la destruye al salir"""
+    # Sin archivo va en memoria aunque los settings pongan la base de test en disco
+    settings.DATABASES['default'].setdefault('TEST', {})['NAME'] = archivo
+    connection.settings_dict.setdefault('TEST', {})['NAME'] = archivo
+    nombre_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+
+
+def medir(funcion, repeticiones):
+    """Ejecuta `funcion` y devuelve las duraciones en milisegundos"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tiempos
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    if not ordenados:
+        return 0.0
+    indice = min(len(ordenados) - 1, max(0, round(p / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+
+def resumen(tiempos):
+    return {
+        'p50': round(statistics.median(tiempos), 3),
+        'p95': round(percentil(tiempos, 95), 3),
+        'p99': round(percentil(tiempos, 99), 3),
+    }
+
+
+def sembrar(vehiculos=10000, semilla=42):
+    """Siembra un dataset determinístico proporcional a `vehiculos` (ver core/generador.py)"""
+    from core.generador import generar_datos
+
+    resultado = generar_datos(vehiculos=vehiculos, semilla=semilla, lote=LOTE)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return resultado
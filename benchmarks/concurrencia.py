@@ -0,0 +1,166 @@
+"""
+Benchmark de lecturas y escrituras concurrentes sobre SQLite
+
+Compara el perfil de desarrollo (settings.py: opciones por defecto, una
+conexión por request) con el de producción (settings_produccion.py: WAL,
+BEGIN IMMEDIATE, busy timeout y conexiones persistentes). Lectores
+consultan el catálogo y las cotizaciones mientras escritores ejecutan
+`generar` y `reservas/crear`, todos en hilos con su propia conexión.
+Necesita una base en disco (WAL no aplica a bases en memoria).
+
+    python -m benchmarks.concurrencia --vehiculos 20000 --lectores 8 --escritores 4 --segundos 10
+"""
+
+import argparse
+import logging
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.comun import base_temporal, resumen, sembrar
+
+from django.db import close_old_connections, connection, connections
+from django.test.utils import setup_test_environment
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.models import Usuario, Cliente, Vehiculo, Accesorio
+from flycar_project.settings_produccion import DATABASES as DATABASES_PRODUCCION
+
+PERFILES = {
+    'desarrollo': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False, 'OPTIONS': {}},
+    'produccion': {
+        clave: DATABASES_PRODUCCION['default'][clave]
+        for clave in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS', 'OPTIONS')
+    },
+}
+
+
+class Estadisticas:
+    def __init__(self):
+        self.tiempos = []
+        self.errores = 0
+        self.lock = threading.Lock()
+
+    def registrar(self, ms, ok):
+        with self.lock:
+            if ok:
+                self.tiempos.append(ms)
+            else:
+                self.errores += 1
+
+
+def cliente_autenticado(usuario):
+    cliente = APIClient(raise_request_exception=False)
+    cliente.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(usuario).access_token}')
+    return cliente
+
+
+def peticion(estadisticas, funcion, esperado):
+    inicio = time.perf_counter()
+    try:
+        response = funcion()
+        ok = response.status_code == esperado
+    except Exception:
+        response, ok = None, False
+    estadisticas.registrar((time.perf_counter() - inicio) * 1000, ok)
+    # Como al final de una request real: con CONN_MAX_AGE=0 se cierra la conexión
+    close_old_connections()
+    return response if ok else None
+
+
+def lector(fin, estadisticas, vendedor):
+    anonimo = APIClient(raise_request_exception=False)
+    while time.monotonic() < fin:
+        peticion(estadisticas['catalogo'], lambda: anonimo.get('/api/vehiculos/?estado=DISPONIBLE'), 200)
+        peticion(estadisticas['cotizaciones'], lambda: vendedor.get('/api/cotizaciones/'), 200)
+    connections.close_all()
+
+
+def escritor(fin, estadisticas, vendedor, cliente_id, pool, accesorios):
+    while time.monotonic() < fin:
+        with pool['lock']:
+            if not pool['vehiculos']:
+                break
+            vehiculo_id = pool['vehiculos'].pop()
+        datos = {'cliente_id': cliente_id, 'vehiculos': [{'vehiculo_id': vehiculo_id, 'accesorios': accesorios}]}
+        response = peticion(
+            estadisticas['generar'],
+            lambda: vendedor.post('/api/cotizaciones/generar/', datos, format='json'), 201
+        )
+        if response is not None:
+            cotizacion_id = response.data['id']
+            peticion(
+                estadisticas['reservas_crear'],
+                lambda: vendedor.post('/api/reservas/crear/', {'cotizacion_id': cotizacion_id}, format='json'), 201
+            )
+    connections.close_all()
+
+
+def ejecutar_perfil(nombre, args):
+    archivo = Path(tempfile.gettempdir()) / f'flycar_concurrencia_{nombre}.sqlite3'
+    with base_temporal(str(archivo)):
+        sembrar(args.vehiculos)
+        connections.settings['default'].update(PERFILES[nombre])
+        connection.close()
+
+        vendedor = cliente_autenticado(Usuario.objects.filter(tipo_usuario='VENDEDOR').order_by('email').first())
+        cliente_id = str(Cliente.objects.order_by('dni').values_list('id', flat=True).first())
+        accesorios = [str(a) for a in Accesorio.objects.values_list('id', flat=True)[:1]]
+        pool = {
+            'lock': threading.Lock(),
+            'vehiculos': [
+                str(v) for v in
+                Vehiculo.objects.filter(estado='DISPONIBLE', eliminado=False).values_list('id', flat=True)
+            ],
+        }
+        connection.close()
+
+        estadisticas = {
+            operacion: Estadisticas() for operacion in ('catalogo', 'cotizaciones', 'generar', 'reservas_crear')
+        }
+        fin = time.monotonic() + args.segundos
+        hilos = [
+            threading.Thread(target=lector, args=(fin, estadisticas, vendedor)) for _ in range(args.lectores)
+        ] + [
+            threading.Thread(target=escritor, args=(fin, estadisticas, vendedor, cliente_id, pool, accesorios))
+            for _ in range(args.escritores)
+        ]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        connection.close()
+    return estadisticas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--vehiculos', type=int, default=20000)
+    parser.add_argument('--lectores', type=int, default=8)
+    parser.add_argument('--escritores', type=int, default=4)
+    parser.add_argument('--segundos', type=float, default=10)
+    parser.add_argument('--perfiles', nargs='*', default=list(PERFILES), choices=list(PERFILES))
+    args = parser.parse_args()
+
+    setup_test_environment()
+    # Los 500 por "database is locked" se cuentan como errores; no hace falta la traza
+    logging.getLogger('django.request').setLevel(logging.CRITICAL)
+    for nombre in args.perfiles:
+        estadisticas = ejecutar_perfil(nombre, args)
+        print(f'== {nombre} ({args.lectores} lectores, {args.escritores} escritores, {args.segundos:.0f}s)')
+        for operacion, est in estadisticas.items():
+            if not est.tiempos:
+                print(f'   {operacion:<16} sin respuestas exitosas, errores={est.errores}')
+                continue
+            tiempos = resumen(est.tiempos)
+            print(
+                f'   {operacion:<16} {len(est.tiempos) / args.segundos:>8.1f} ops/s '
+                f'p50={tiempos["p50"]:>8.2f}ms p95={tiempos["p95"]:>8.2f}ms p99={tiempos["p99"]:>8.2f}ms '
+                f'errores={est.errores}'
+            )
+
+
+if __name__ == '__main__':
+    main()
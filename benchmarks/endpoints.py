@@ -0,0 +1,269 @@
+"""
+Benchmark por endpoint de los casos de uso (C.U. 01 a 07)
+
+Siembra un dataset reproducible, ejecuta cada endpoint con el cliente de
+test de DRF y registra latencia p50/p95/p99, cantidad de consultas SQL y
+tiempo SQL, y compara contra la línea base (un JSON por escala):
+
+    consultas  versionadas en linea_base.json y comparadas exactamente: no
+               dependen de la máquina, cualquier consulta de más es regresión
+    tiempos    dependen de la máquina, así que no se versionan: --guardar los
+               escribe en linea_base.local.json (ignorado por git) y solo se
+               comparan con --umbral, contra esa línea base local
+
+Termina con código 1 si hay regresiones. Una escala sin línea base no falla:
+se guardan los resultados como línea base y se avisa.
+
+    python -m benchmarks.endpoints --vehiculos 1000
+    python -m benchmarks.endpoints --vehiculos 1000 --guardar
+    python -m benchmarks.endpoints --vehiculos 1000 --umbral 1.0
+    python -m benchmarks.endpoints --vehiculos 100000 --solo simular generar
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from benchmarks.comun import base_temporal, percentil, resumen, sembrar
+
+from django.db import connection
+from django.test.utils import setup_test_environment
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.models import Usuario, Cliente, Vehiculo, Accesorio
+
+LINEA_BASE = Path(__file__).with_name('linea_base.json')
+LINEA_BASE_LOCAL = Path(__file__).with_name('linea_base.local.json')
+CLAVE = 'password123'
+
+
+@dataclass
+class Escenario:
+    nombre: str
+    estado: int
+    # Arma la petición fuera de la medición: devuelve (cliente, metodo, url, datos)
+    preparar: Callable
+    repeticiones: int = None
+
+
+class Contexto:
+    """Usuarios autenticados y pool de vehículos disponibles para los escenarios"""
+
+    def __init__(self, semilla):
+        self.rnd = random.Random(semilla)
+        self.anonimo = APIClient()
+        self.vendedor = self._cliente_para(Usuario.objects.filter(tipo_usuario='VENDEDOR').order_by('email').first())
+        self.cliente = Cliente.objects.order_by('dni').first()
+        self.accesorios = list(Accesorio.objects.values_list('id', flat=True))
+        disponibles = list(
+            Vehiculo.objects.filter(estado='DISPONIBLE', eliminado=False).values_list('id', flat=True)
+        )
+        disponibles.sort()
+        self.rnd.shuffle(disponibles)
+        self.disponibles = disponibles
+
+    def _cliente_para(self, usuario):
+        cliente = APIClient()
+        token = RefreshToken.for_user(usuario).access_token
+        cliente.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return cliente
+
+    def vehiculo_libre(self):
+        return str(self.disponibles.pop())
+
+    def items(self, cantidad, consumir=True):
+        """Ítems de carrito; `consumir=False` no retira los vehículos del pool (solo lectura)"""
+        return [
+            {
+                'vehiculo_id': self.vehiculo_libre() if consumir else str(self.rnd.choice(self.disponibles)),
+                'accesorios': [str(self.rnd.choice(self.accesorios))],
+            }
+            for _ in range(cantidad)
+        ]
+
+    def cotizacion(self):
+        """Genera una cotización nueva (sin medir) y devuelve su id"""
+        response = self.vendedor.post(
+            '/api/cotizaciones/generar/',
+            {'cliente_id': str(self.cliente.id), 'vehiculos': self.items(1)},
+            format='json',
+        )
+        assert response.status_code == 201, response.content
+        return response.data['id']
+
+    def reserva(self):
+        response = self.vendedor.post('/api/reservas/crear/', {'cotizacion_id': self.cotizacion()}, format='json')
+        assert response.status_code == 201, response.content
+        return response.data['id']
+
+
+def escenarios(ctx):
+    return [
+        Escenario('simular', 200, lambda: (
+            ctx.anonimo, 'post', '/api/cotizaciones/simular/', {'vehiculos': ctx.items(2, consumir=False)}
+        )),
+        Escenario('generar', 201, lambda: (
+            ctx.vendedor, 'post', '/api/cotizaciones/generar/',
+            {'cliente_id': str(ctx.cliente.id), 'vehiculos': ctx.items(2)}
+        )),
+        Escenario('reservas_crear', 201, lambda: (
+            ctx.vendedor, 'post', '/api/reservas/crear/', {'cotizacion_id': ctx.cotizacion()}
+        )),
+        Escenario('reservas_cancelar', 200, lambda: (
+            ctx.vendedor, 'post', f'/api/reservas/{ctx.reserva()}/cancelar/', None
+        )),
+        Escenario('ventas_realizar', 201, lambda: (
+            ctx.vendedor, 'post', '/api/ventas/realizar/', {'cotizacion_id': ctx.cotizacion()}
+        )),
+        Escenario('vehiculos_listado', 200, lambda: (
+            ctx.anonimo, 'get', '/api/vehiculos/?estado=DISPONIBLE', None
+        )),
+        # El login está dominado por el hash de la contraseña: menos repeticiones
+        Escenario('auth_login', 200, lambda: (
+            ctx.anonimo, 'post', '/api/auth/login/', {'email': ctx.cliente.email, 'password': CLAVE}
+        ), repeticiones=10),
+    ]
+
+
+class MedidorSQL:
+    """execute_wrapper que cuenta consultas y acumula su duración en milisegundos"""
+
+    def __init__(self):
+        self.consultas = 0
+        self.ms = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.ms += (time.perf_counter() - inicio) * 1000
+            self.consultas += 1
+
+
+def ejecutar(escenario, repeticiones, calentamiento=2):
+    tiempos, consultas, tiempos_sql = [], [], []
+    for i in range(calentamiento + repeticiones):
+        cliente, metodo, url, datos = escenario.preparar()
+        medidor = MedidorSQL()
+        with connection.execute_wrapper(medidor):
+            inicio = time.perf_counter()
+            response = getattr(cliente, metodo)(url, datos, format='json')
+            duracion = (time.perf_counter() - inicio) * 1000
+        if response.status_code != escenario.estado:
+            raise AssertionError(f'{escenario.nombre}: HTTP {response.status_code} {response.content[:300]!r}')
+        if i < calentamiento:
+            continue
+        tiempos.append(duracion)
+        consultas.append(medidor.consultas)
+        tiempos_sql.append(medidor.ms)
+
+    metricas = resumen(tiempos)
+    metricas['consultas'] = max(consultas)
+    metricas['sql_ms_p50'] = round(percentil(tiempos_sql, 50), 3)
+    metricas['sql_ms_p95'] = round(percentil(tiempos_sql, 95), 3)
+    return metricas
+
+
+def regresiones(actual, base, umbral=None, holgura_ms=2.0):
+    """
+    Lista de (endpoint, métrica, base, actual) que empeoraron.
+
+    Las consultas se comparan exactamente. Los tiempos solo con `umbral`
+    (regresión relativa tolerada), con una holgura absoluta para que el ruido
+    de endpoints de pocos milisegundos no cuente como regresión.
+    """
+    encontradas = []
+    for nombre, metricas in actual.items():
+        if nombre not in base:
+            continue
+        for metrica, valor in metricas.items():
+            anterior = base[nombre].get(metrica)
+            if anterior is None:
+                continue
+            if metrica == 'consultas':
+                excedido = valor > anterior
+            elif umbral is not None:
+                excedido = valor > anterior * (1 + umbral) + holgura_ms
+            else:
+                continue
+            if excedido:
+                encontradas.append((nombre, metrica, anterior, valor))
+    return encontradas
+
+
+def leer(ruta):
+    return json.loads(ruta.read_text()) if ruta.exists() else {}
+
+
+def guardar(ruta, escala, resultados):
+    lineas_base = leer(ruta)
+    lineas_base.setdefault(escala, {}).update(resultados)
+    ruta.write_text(json.dumps(lineas_base, indent=2, sort_keys=True) + '\n')
+    print(f'Línea base guardada en {ruta} (escala {escala})')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--vehiculos', type=int, default=1000, help='Escala: 1000, 100000, 1000000...')
+    parser.add_argument('--repeticiones', type=int, default=50)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--archivo', help='Base SQLite en disco en lugar de memoria')
+    parser.add_argument('--solo', nargs='*', help='Nombres de los escenarios a ejecutar')
+    parser.add_argument('--linea-base', type=Path, default=LINEA_BASE, help='Consultas por endpoint (versionada)')
+    parser.add_argument('--linea-base-local', type=Path, default=LINEA_BASE_LOCAL,
+                        help='Tiempos de esta máquina (no versionada)')
+    parser.add_argument('--guardar', action='store_true', help='Escribe los resultados como nueva línea base')
+    parser.add_argument('--umbral', type=float,
+                        help='Compara también los tiempos contra la línea base local con esta regresión '
+                             'relativa tolerada (p. ej. 1.0: el doble)')
+    parser.add_argument('--holgura-ms', type=float, default=2.0, help='Holgura absoluta en tiempos')
+    args = parser.parse_args()
+
+    setup_test_environment()
+    resultados = {}
+    with base_temporal(args.archivo):
+        sembrar(args.vehiculos, args.semilla)
+        ctx = Contexto(args.semilla)
+        for escenario in escenarios(ctx):
+            if args.solo and escenario.nombre not in args.solo:
+                continue
+            repeticiones = min(args.repeticiones, escenario.repeticiones or args.repeticiones)
+            metricas = ejecutar(escenario, repeticiones)
+            resultados[escenario.nombre] = metricas
+            print(
+                f'{escenario.nombre:<20} p50={metricas["p50"]:>8.3f}ms p95={metricas["p95"]:>8.3f}ms '
+                f'p99={metricas["p99"]:>8.3f}ms consultas={metricas["consultas"]:>3} '
+                f'sql_p50={metricas["sql_ms_p50"]:>7.3f}ms'
+            )
+
+    escala = str(args.vehiculos)
+    consultas = {nombre: {'consultas': metricas['consultas']} for nombre, metricas in resultados.items()}
+    base = leer(args.linea_base).get(escala)
+
+    if args.guardar or base is None:
+        if base is None and not args.guardar:
+            print(f'Sin línea base para la escala {escala} en {args.linea_base}; se guardan estos resultados')
+        guardar(args.linea_base, escala, consultas)
+        guardar(args.linea_base_local, escala, resultados)
+        return
+
+    base_local = leer(args.linea_base_local).get(escala, {})
+    if args.umbral is not None and not base_local:
+        print(f'Sin tiempos de esta máquina en {args.linea_base_local}; ejecutar con --guardar para compararlos')
+    # Los tiempos locales primero: las consultas versionadas tienen prioridad
+    comparada = {nombre: {**base_local.get(nombre, {}), **metricas} for nombre, metricas in base.items()}
+    encontradas = regresiones(resultados, comparada, args.umbral, args.holgura_ms)
+    for nombre, metrica, anterior, valor in encontradas:
+        print(f'REGRESIÓN {nombre}.{metrica}: {anterior} -> {valor}')
+    sys.exit(1 if encontradas else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""
+Benchmark de índices: siembra un dataset grande, captura EXPLAIN QUERY PLAN
+de cada consulta crítica (core/planes.py), mide su latencia y falla si
+alguna no usa el índice esperado.
+
+    python -m benchmarks.indices --vehiculos 200000
+"""
+
+import argparse
+import sys
+
+from benchmarks.comun import base_temporal, medir, resumen, sembrar
+
+from core.planes import CONSULTAS_CRITICAS, explicar, indices_usados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--vehiculos', type=int, default=100000)
+    parser.add_argument('--repeticiones', type=int, default=50)
+    parser.add_argument('--archivo', help='Base SQLite en disco en lugar de memoria')
+    args = parser.parse_args()
+
+    fallas = 0
+    with base_temporal(args.archivo):
+        sembrar(args.vehiculos)
+        for consulta in CONSULTAS_CRITICAS:
+            plan = explicar(consulta.queryset())
+            usa_indice = consulta.indice in indices_usados(plan)
+            tiempos = resumen(medir(lambda: list(consulta.queryset()), args.repeticiones))
+            estado = 'OK ' if usa_indice else 'FALLA'
+            print(f'{estado} {consulta.nombre:<32} p50={tiempos["p50"]:>8.3f}ms p95={tiempos["p95"]:>8.3f}ms')
+            for linea in plan:
+                print(f'      {linea}')
+            fallas += not usa_indice
+
+    if fallas:
+        print(f'{fallas} consultas no usan el índice esperado')
+    sys.exit(1 if fallas else 0)
+
+
+if __name__ == '__main__':
+    main()
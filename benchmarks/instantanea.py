@@ -0,0 +1,113 @@
+"""
+Benchmark de la instantánea del catálogo con escrituras intercaladas
+
+Mide qué fracción de las lecturas del catálogo (listado y detalle) sirve
+la instantánea mientras se modifican vehículos, y su latencia:
+
+    superpuesta  como está: cada vehículo cambiado se lee de la base y el
+                 resto sigue saliendo de la instantánea
+    invalidando  cada escritura vence la instantánea entera (cómo era antes
+                 del registro de cambios) y todo va a la base hasta la próxima
+    base         sin instantánea, como referencia
+
+En cada ronda se modifica un vehículo con save() (las señales publican el
+cambio) y se hacen `--lecturas` lecturas; cada `--regenerar-cada` rondas se
+llama a actualizar() como lo haría el escritor periódico.
+
+    python -m benchmarks.instantanea --vehiculos 20000 --rondas 500 --lecturas 10 --regenerar-cada 100
+"""
+
+import argparse
+import random
+import tempfile
+from pathlib import Path
+
+from benchmarks.comun import base_temporal, medir, resumen, sembrar
+
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext, override_settings, setup_test_environment
+from rest_framework.test import APIClient
+
+from core import instantanea
+from core.models import Vehiculo
+
+MODOS = ('superpuesta', 'invalidando', 'base')
+
+
+class Contador:
+    """Envuelve instantanea.vigente para contar las lecturas que la usan"""
+
+    def __init__(self, vigente):
+        self.vigente = vigente
+        self.servidas = self.llamadas = 0
+
+    def __call__(self):
+        actual = self.vigente()
+        self.llamadas += 1
+        self.servidas += actual is not None
+        return actual
+
+
+def ejecutar_modo(modo, ids, args):
+    cliente = APIClient()
+    azar = random.Random(args.semilla)
+    tiempos = {'listado': [], 'detalle': []}
+    consultas = {'listado': 0, 'detalle': 0}
+    contador = Contador(instantanea.vigente)
+    vigente, instantanea.vigente = instantanea.vigente, contador
+    try:
+        if modo != 'base':
+            instantanea.actualizar(forzar=True)
+        for ronda in range(args.rondas):
+            vehiculo = Vehiculo.objects.get(pk=azar.choice(ids))
+            vehiculo.precio += 1
+            vehiculo.save()
+            if modo == 'invalidando':
+                instantanea.invalidar()
+            for _ in range(args.lecturas):
+                if azar.random() < 0.5:
+                    tipo, url = 'listado', f'/api/vehiculos/?page_size={args.pagina}'
+                else:
+                    tipo, url = 'detalle', f'/api/vehiculos/{azar.choice(ids)}/'
+                reset_queries()
+                with CaptureQueriesContext(connection) as capturadas:
+                    tiempos[tipo] += medir(lambda: cliente.get(url), 1)
+                consultas[tipo] += len(capturadas)
+            if modo != 'base' and (ronda + 1) % args.regenerar_cada == 0:
+                instantanea.actualizar()
+    finally:
+        instantanea.vigente = vigente
+    return contador, tiempos, consultas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--vehiculos', type=int, default=20000)
+    parser.add_argument('--rondas', type=int, default=500)
+    parser.add_argument('--lecturas', type=int, default=10, help='Lecturas por escritura')
+    parser.add_argument('--regenerar-cada', type=int, default=100, help='Rondas entre regeneraciones')
+    parser.add_argument('--pagina', type=int, default=50)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--modos', nargs='*', default=list(MODOS), choices=MODOS)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    with base_temporal(), tempfile.TemporaryDirectory() as directorio:
+        sembrar(args.vehiculos)
+        ids = [str(v) for v in Vehiculo.objects.filter(eliminado=False).values_list('id', flat=True)]
+        for modo in args.modos:
+            ruta = None if modo == 'base' else str(Path(directorio) / f'{modo}.bin')
+            with override_settings(FLYCAR_INSTANTANEA_RUTA=ruta):
+                contador, tiempos, consultas = ejecutar_modo(modo, ids, args)
+            servidas = contador.servidas / contador.llamadas if contador.llamadas else 0.0
+            print(f'== {modo}: {servidas:.0%} de las lecturas servidas por la instantánea')
+            for tipo, valores in tiempos.items():
+                t = resumen(valores)
+                print(
+                    f'   {tipo:<8} {len(valores):>6} lecturas p50={t["p50"]:>8.2f}ms p95={t["p95"]:>8.2f}ms '
+                    f'consultas/lectura={consultas[tipo] / max(len(valores), 1):.2f}'
+                )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark de renderers (core/renderers.py)
+
+Siembra un dataset, arma una página de `--filas` vehículos del catálogo
+(VehiculoCatalogoSerializer) y `--cotizaciones` cotizaciones con
+CotizacionSerializer completo (vehículos y accesorios anidados), y mide el
+renderizado con el JSONRenderer de DRF, con ORJSONRenderer y con
+MessagePackRenderer si msgpack está instalado. Verifica que el JSON de
+orjson sea idéntico al de DRF y falla si no lo es.
+
+    python -m benchmarks.renderizado --vehiculos 5000 --filas 1000
+"""
+
+import argparse
+import sys
+
+from benchmarks.comun import base_temporal, medir, resumen, sembrar
+
+from django.db.models import Prefetch
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Cotizacion, CotizacionAccesorio, CotizacionVehiculo, VehiculoCatalogo
+from core.renderers import MessagePackRenderer, ORJSONRenderer, msgpack
+from core.serializers import CotizacionSerializer, VehiculoCatalogoSerializer
+
+
+def cargas(filas, cotizaciones):
+    vehiculos = VehiculoCatalogo.objects.filter(eliminado=False).order_by('-created_at', '-pk')[:filas]
+    lineas = Cotizacion.objects.order_by('-fecha_hora_generada').prefetch_related(
+        Prefetch('vehiculos', CotizacionVehiculo.objects.select_related('vehiculo__modelo__marca', 'vehiculo__oferta')),
+        Prefetch('accesorios', CotizacionAccesorio.objects.select_related('accesorio')),
+    )[:cotizaciones]
+    return {
+        f'vehiculos ({filas} filas)': {
+            'count': None, 'next': None, 'previous': None,
+            'results': VehiculoCatalogoSerializer(vehiculos, many=True).data,
+        },
+        f'cotizaciones ({cotizaciones})': {
+            'count': None, 'next': None, 'previous': None,
+            'results': CotizacionSerializer(lineas, many=True).data,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--vehiculos', type=int, default=5000)
+    parser.add_argument('--filas', type=int, default=1000)
+    parser.add_argument('--cotizaciones', type=int, default=100)
+    parser.add_argument('--repeticiones', type=int, default=200)
+    args = parser.parse_args()
+
+    renderers = {'drf': JSONRenderer(), 'orjson': ORJSONRenderer()}
+    if msgpack is not None:
+        renderers['msgpack'] = MessagePackRenderer()
+
+    fallas = 0
+    with base_temporal():
+        sembrar(args.vehiculos)
+        for nombre, datos in cargas(args.filas, args.cotizaciones).items():
+            esperado = renderers['drf'].render(datos)
+            if renderers['orjson'].render(datos) != esperado:
+                print(f'{nombre}: el JSON de orjson difiere del de DRF')
+                fallas += 1
+            print(f'== {nombre}: {len(esperado):,} bytes')
+            base = None
+            for clave, renderer in renderers.items():
+                tiempos = resumen(medir(lambda: renderer.render(datos), args.repeticiones))
+                base = base or tiempos['p50']
+                print(f'{clave:<8} p50 {tiempos["p50"]:.3f} ms  p99 {tiempos["p99"]:.3f} ms  '
+                      f'x{base / tiempos["p50"]:.1f}  {len(renderer.render(datos)):,} bytes')
+    sys.exit(1 if fallas else 0)
+
+
+if __name__ == '__main__':
+    main()
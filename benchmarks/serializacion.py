@@ -0,0 +1,105 @@
+"""
+Benchmark de la serialización rápida de listados (core/representacion.py)
+
+Siembra un dataset y serializa con el ListSerializer de DRF y con
+ListaRapidaSerializer: `--filas` filas del catálogo
+(VehiculoCatalogoSerializer), las mismas filas como Vehiculo con
+select_related (VehiculoSerializer) y `--cotizaciones` cotizaciones con
+vehículos y accesorios anidados (CotizacionSerializer). Los objetos se
+cargan antes de medir y se toma el mejor tiempo de `--repeticiones`,
+alternando ambas versiones y con el recolector de basura desactivado,
+como timeit (la mediana varía mucho con la carga de la máquina). Mide la serialización sola y el renderizado
+completo (serializar + JSONRenderer de DRF contra plan + ORJSONRenderer,
+ver core/renderers.py). Falla si el JSON difiere o si la aceleración del
+renderizado completo es menor que `--minimo`. Con los to_representation de
+DRF en cada valor la aceleración medida ronda x3-x4 (el objetivo original
+era x5, que solo se alcanzaba reimplementando los conversores de DRF).
+
+    python -m benchmarks.serializacion --vehiculos 5000 --filas 1000
+"""
+
+import argparse
+import gc
+import sys
+
+from benchmarks.comun import base_temporal, medir, sembrar
+
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Cotizacion, CotizacionAccesorio, CotizacionVehiculo, Vehiculo, VehiculoCatalogo
+from core.renderers import ORJSONRenderer
+from core.representacion import ListaRapidaSerializer
+from core.serializers import CotizacionSerializer, VehiculoCatalogoSerializer, VehiculoSerializer
+
+
+def casos(filas, cotizaciones):
+    vehiculo_lineas = CotizacionVehiculo.objects.select_related('vehiculo__modelo__marca', 'vehiculo__oferta')
+    return {
+        f'catálogo ({filas})': (VehiculoCatalogoSerializer, list(
+            VehiculoCatalogo.objects.filter(eliminado=False).order_by('-created_at', '-pk')[:filas]
+        )),
+        f'vehículos ({filas})': (VehiculoSerializer, list(
+            Vehiculo.objects.select_related('modelo__marca', 'oferta').order_by('-created_at', '-pk')[:filas]
+        )),
+        f'cotizaciones ({cotizaciones})': (CotizacionSerializer, list(
+            Cotizacion.objects.order_by('-fecha_hora_generada').prefetch_related(
+                Prefetch('vehiculos', vehiculo_lineas),
+                Prefetch('accesorios', CotizacionAccesorio.objects.select_related('accesorio')),
+            )[:cotizaciones]
+        )),
+    }
+
+
+def intercalado(lenta, rapida, repeticiones):
+    """Mejor tiempo de cada función, alternándolas para que la carga de la máquina afecte a las dos"""
+    mejores = [float('inf'), float('inf')]
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeticiones):
+            for i, funcion in enumerate((lenta, rapida)):
+                mejores[i] = min(mejores[i], *medir(funcion, 1))
+    finally:
+        gc.enable()
+    return mejores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--vehiculos', type=int, default=5000)
+    parser.add_argument('--filas', type=int, default=1000)
+    parser.add_argument('--cotizaciones', type=int, default=200)
+    parser.add_argument('--repeticiones', type=int, default=50)
+    parser.add_argument('--minimo', type=float, default=2.5, help='Aceleración mínima aceptada')
+    args = parser.parse_args()
+
+    fallas = 0
+    with base_temporal():
+        sembrar(args.vehiculos)
+        for nombre, (serializer_class, objetos) in casos(args.filas, args.cotizaciones).items():
+            def drf():
+                return serializers.ListSerializer(objetos, child=serializer_class()).data
+
+            def rapido():
+                return ListaRapidaSerializer(objetos, child=serializer_class()).data
+
+            igual = JSONRenderer().render(drf()) == ORJSONRenderer().render(rapido())
+            serializar = intercalado(drf, rapido, args.repeticiones)
+            respuesta = intercalado(
+                lambda: JSONRenderer().render(drf()),
+                lambda: ORJSONRenderer().render(rapido()),
+                args.repeticiones,
+            )
+            aceleracion = respuesta[0] / respuesta[1]
+            estado = 'DISTINTO' if not igual else ('ok' if aceleracion >= args.minimo else 'LENTO')
+            fallas += estado != 'ok'
+            print(f'{nombre:<20} serializar {serializar[0]:6.2f} -> {serializar[1]:6.2f} ms '
+                  f'(x{serializar[0] / serializar[1]:.1f})  '
+                  f'respuesta {respuesta[0]:6.2f} -> {respuesta[1]:6.2f} ms (x{aceleracion:.1f})  {estado}')
+    sys.exit(1 if fallas else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,7 @@ from django.contrib import admin
 from .models import (
     Usuario, Cliente, Vendedor, Marca, Modelo, Vehiculo, 
     Accesorio, ModeloAccesorio, Oferta, Cotizacion, 
-    CotizacionVehiculo, CotizacionAccesorio, Reserva, Venta, Pago
+    CotizacionVehiculo, CotizacionAccesorio, CotizacionArchivada, Reserva, Venta, Pago
 )
 
 @admin.register(Usuario)
@@ -69,6 +69,12 @@ class CotizacionAdmin(admin.ModelAdmin):
     search_fields = ('cliente__dni', 'cliente__apellido')
     inlines = [CotizacionVehiculoInline, CotizacionAccesorioInline]
 
+@admin.register(CotizacionArchivada)
+class CotizacionArchivadaAdmin(admin.ModelAdmin):
+    list_display = ('id', 'cliente', 'fecha_hora_generada', 'importe_final', 'archivada_en')
+    list_filter = ('archivada_en',)
+    search_fields = ('cliente__dni', 'cliente__apellido')
+
 @admin.register(Reserva)
 class ReservaAdmin(admin.ModelAdmin):
     list_display = ('nro_reserva', 'cotizacion', 'fecha_hora_generada', 'estado', 'importe')
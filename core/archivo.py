@@ -0,0 +1,120 @@
+"""
+Archivo de cotizaciones muertas
+
+`generar` invalida las cotizaciones vigentes anteriores del cliente y el
+barrido de vencimientos invalida las vencidas, pero ninguno las borra.
+`archivar_cotizaciones` mueve las cotizaciones inválidas o vencidas, sin
+reserva ni venta y generadas hace más de FLYCAR_ARCHIVO_DIAS, a
+`cotizaciones_archivadas` (una fila por cotización, con sus líneas en
+JSON) y las borra junto con sus líneas de `cotizacion_vehiculos` y
+`cotizacion_accesorios`. Cada lote se mueve en su propia transacción; el
+recorrido sigue el índice (fecha_hora_generada, id) con un cursor, así
+que las cotizaciones viejas que siguen vivas no se vuelven a leer.
+"""
+
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Cotizacion, CotizacionVehiculo, CotizacionAccesorio, CotizacionArchivada
+
+
+@dataclass
+class ResultadoArchivo:
+    cotizaciones: int = 0
+    lineas: int = 0
+    lotes: int = 0
+    segundos: float = 0.0
+
+    @property
+    def filas(self):
+        return self.cotizaciones + self.lineas
+
+    @property
+    def filas_por_segundo(self):
+        return self.filas / self.segundos if self.segundos else 0.0
+
+
+def muertas(ahora, corte):
+    """Cotizaciones archivables: inválidas o vencidas, sin reserva ni venta, anteriores a `corte`"""
+    return Cotizacion.objects.filter(
+        Q(valida=False) | Q(fecha_hora_vencimiento__lt=ahora),
+        fecha_hora_generada__lt=corte, reserva__isnull=True, venta__isnull=True,
+    )
+
+
+def detalle(vehiculos, accesorios):
+    """Líneas de una cotización en el mismo formato que CotizacionSerializer, sin los *_detalle"""
+    return {
+        'vehiculos': [
+            {'id': str(linea['id']), 'vehiculo': str(linea['vehiculo_id']),
+             'precio_unitario': str(linea['precio_unitario'])}
+            for linea in vehiculos
+        ],
+        'accesorios': [
+            {'id': str(linea['id']), 'accesorio': str(linea['accesorio_id']),
+             'precio_unitario': str(linea['precio_unitario']),
+             'cotizacion_vehiculo': str(linea['cotizacion_vehiculo_id'])}
+            for linea in accesorios
+        ],
+    }
+
+
+def archivar_lote(ids, ahora, corte, resultado):
+    """Copia y borra las cotizaciones `ids` que sigan siendo archivables"""
+    with transaction.atomic():
+        cotizaciones = list(muertas(ahora, corte).filter(id__in=ids).values(
+            'id', 'fecha_hora_generada', 'importe_final', 'valida', 'fecha_hora_vencimiento',
+            'cliente_id', 'created_at', 'updated_at',
+        ))
+        ids = [c['id'] for c in cotizaciones]
+        if not ids:
+            return
+        lineas = {cotizacion_id: ([], []) for cotizacion_id in ids}
+        for linea in CotizacionVehiculo.objects.filter(cotizacion_id__in=ids).values(
+            'id', 'cotizacion_id', 'vehiculo_id', 'precio_unitario'
+        ).order_by('created_at', 'id'):
+            lineas[linea['cotizacion_id']][0].append(linea)
+        for linea in CotizacionAccesorio.objects.filter(cotizacion_id__in=ids).values(
+            'id', 'cotizacion_id', 'cotizacion_vehiculo_id', 'accesorio_id', 'precio_unitario'
+        ).order_by('created_at', 'id'):
+            lineas[linea['cotizacion_id']][1].append(linea)
+
+        CotizacionArchivada.objects.bulk_create([
+            CotizacionArchivada(detalle=detalle(*lineas[c['id']]), **c)
+            for c in cotizaciones
+        ])
+        # Hijos primero: las cascadas de Django ya no encuentran filas que cargar
+        resultado.lineas += CotizacionAccesorio.objects.filter(cotizacion_id__in=ids).delete()[0]
+        resultado.lineas += CotizacionVehiculo.objects.filter(cotizacion_id__in=ids).delete()[0]
+        resultado.cotizaciones += Cotizacion.objects.filter(id__in=ids).delete()[0]
+        resultado.lotes += 1
+
+
+def archivar_cotizaciones(ahora=None, dias=None, lote=None):
+    """Archiva todas las cotizaciones muertas, de a `lote` por transacción"""
+    ahora = ahora or timezone.now()
+    dias = settings.FLYCAR_ARCHIVO_DIAS if dias is None else dias
+    lote = lote or settings.FLYCAR_ARCHIVO_LOTE
+    corte = ahora - timedelta(days=dias)
+    resultado = ResultadoArchivo()
+    inicio = time.perf_counter()
+    cursor = Q()
+    while True:
+        candidatas = list(
+            muertas(ahora, corte).filter(cursor)
+            .order_by('fecha_hora_generada', 'id')
+            .values_list('fecha_hora_generada', 'id')[:lote]
+        )
+        if not candidatas:
+            break
+        archivar_lote([pk for _, pk in candidatas], ahora, corte, resultado)
+        fecha, pk = candidatas[-1]
+        cursor = Q(fecha_hora_generada__gt=fecha) | Q(fecha_hora_generada=fecha, id__gt=pk)
+    resultado.segundos = time.perf_counter() - inicio
+    return resultado
@@ -0,0 +1,25 @@
+"""
+Arranque de cada proceso servidor
+
+wsgi.py y asgi.py llaman a `iniciar()` una vez por proceso, después de
+cargar la aplicación. No se llama desde CoreConfig.ready(): manage.py
+(migrate, tests, comandos) no arranca hilos ni consulta la base al cargar.
+
+- avisa si el cache de versiones es por proceso (core/versiones.py),
+- arranca los hilos periódicos configurados: vencimientos
+  (FLYCAR_VENCIMIENTOS_INTERVALO) y escritor de la instantánea
+  (FLYCAR_INSTANTANEA_INTERVALO),
+- construye los índices en memoria de facetas y autocompletado solo si se
+  pidió con FLYCAR_FACETAS_PRECARGAR / FLYCAR_AUTOCOMPLETADO_PRECARGAR;
+  si no, cada proceso los arma en su primera consulta.
+"""
+
+from . import autocompletado, facetas, instantanea, vencimientos, versiones
+
+
+def iniciar():
+    versiones.verificar_cache()
+    vencimientos.iniciar_barrido_periodico()
+    instantanea.iniciar_escritor_periodico()
+    facetas.precargar()
+    autocompletado.precargar()
@@ -0,0 +1,219 @@
+"""
+Autocompletado por prefijo de marcas, modelos y clientes en memoria
+
+Para cada tipo se guarda un arreglo ordenado de claves normalizadas
+(minúsculas y sin tildes) de la forma `texto\\0id`: Marca.nombre,
+Modelo.nombre y Cliente.dni/Cliente.apellido. Un prefijo se resuelve con
+una búsqueda binaria y un recorrido de a lo sumo `limite` claves, sin
+consultar la base; con un millón de clientes son unas 21 comparaciones
+(ver benchmarks/autocompletado.py).
+
+El índice de cada proceso se construye con una consulta por tipo. Reconstruirlo
+con un millón de clientes lleva segundos, así que los cambios no lo invalidan:
+cada alta o modificación incrementa la versión 'autocompletado'
+(core/versiones.py) y los procesos que la ven relen solo las filas con
+`updated_at` posterior a su última sincronización, menos MARGEN para cubrir
+transacciones largas y relojes desparejos. Las bajas, que no dejan fila que
+releer, incrementan 'autocompletado_bajas' y sí provocan una reconstrucción,
+igual que las cargas masivas.
+"""
+
+import bisect
+import logging
+import threading
+import time
+import unicodedata
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.utils import timezone
+
+from . import versiones
+from .models import Cliente, Marca, Modelo
+
+logger = logging.getLogger(__name__)
+
+TIPOS = ('marca', 'modelo', 'cliente')
+
+SEPARADOR = '\0'
+
+# Columnas de cada tipo, la primera es el id
+COLUMNAS = {
+    'marca': ('id', 'nombre'),
+    'modelo': ('id', 'nombre', 'marca_id'),
+    'cliente': ('id', 'dni', 'nombre', 'apellido'),
+}
+
+MODELOS = {'marca': Marca, 'modelo': Modelo, 'cliente': Cliente}
+
+# Solapamiento de cada sincronización con la anterior: releer filas es idempotente
+MARGEN = timedelta(seconds=60)
+
+
+def normalizar(texto):
+    """Minúsculas y sin marcas diacríticas: 'Peña' y 'pena' comparten prefijos"""
+    if texto.isascii():
+        return texto.strip().lower()
+    descompuesto = unicodedata.normalize('NFKD', texto.strip().casefold())
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def textos(tipo, fila):
+    """Textos por los que se busca cada fila"""
+    if tipo == 'cliente':
+        return (fila[1], fila[3])
+    return (fila[1],)
+
+
+class IndiceAutocompletado:
+    """Arreglos ordenados de claves por tipo; las filas son tuplas con las COLUMNAS del tipo"""
+
+    def __init__(self, version, marcas=(), modelos=(), clientes=(), bajas=None, sincronizado=None):
+        self.version = version
+        self.bajas = bajas
+        self.sincronizado = sincronizado
+        self.creado = time.monotonic()
+        self.filas = {tipo: {} for tipo in TIPOS}
+        self.claves = {tipo: [] for tipo in TIPOS}
+        self._lock = threading.Lock()
+        for tipo, filas in zip(TIPOS, (marcas, modelos, clientes)):
+            claves = self.claves[tipo]
+            for fila in filas:
+                fila = (str(fila[0]), *fila[1:])
+                self.filas[tipo][fila[0]] = fila
+                claves.extend(self._claves(tipo, fila))
+            claves.sort()
+
+    @staticmethod
+    def _claves(tipo, fila):
+        return {normalizar(texto) + SEPARADOR + fila[0] for texto in textos(tipo, fila)}
+
+    # ---------- mantenimiento ----------
+
+    def _quitar(self, tipo, id):
+        fila = self.filas[tipo].pop(id, None)
+        if fila is None:
+            return
+        claves = self.claves[tipo]
+        for clave in self._claves(tipo, fila):
+            posicion = bisect.bisect_left(claves, clave)
+            if posicion < len(claves) and claves[posicion] == clave:
+                del claves[posicion]
+
+    def _agregar(self, tipo, fila):
+        fila = (str(fila[0]), *fila[1:])
+        self.filas[tipo][fila[0]] = fila
+        for clave in self._claves(tipo, fila):
+            bisect.insort(self.claves[tipo], clave)
+
+    def sincronizar(self, version, ahora=None):
+        """Relee las filas modificadas desde la última sincronización y pasa a `version`"""
+        ahora = ahora or timezone.now()
+        cambios = {
+            tipo: list(MODELOS[tipo].objects.filter(
+                updated_at__gte=self.sincronizado - MARGEN
+            ).values_list(*COLUMNAS[tipo]))
+            for tipo in TIPOS
+        }
+        with self._lock:
+            for tipo, filas in cambios.items():
+                for fila in filas:
+                    self._quitar(tipo, str(fila[0]))
+                    self._agregar(tipo, fila)
+        self.sincronizado = ahora
+        self.version = version
+
+    def vigente(self, bajas):
+        if bajas != self.bajas:
+            return False
+        return time.monotonic() - self.creado <= settings.FLYCAR_AUTOCOMPLETADO_TTL
+
+    # ---------- consultas ----------
+
+    def buscar(self, tipo, q, limite=10, ids=None):
+        """
+        Hasta `limite` filas de `tipo` con algún texto que empiece con `q`,
+        en orden alfabético. Con `ids` solo se consideran esas filas.
+        """
+        prefijo = normalizar(q)
+        if not prefijo:
+            return []
+        with self._lock:
+            if ids is not None:
+                encontrados = [
+                    id for id in map(str, ids)
+                    if id in self.filas[tipo]
+                    and any(clave.startswith(prefijo) for clave in self._claves(tipo, self.filas[tipo][id]))
+                ][:limite]
+            else:
+                encontrados = []
+                claves = self.claves[tipo]
+                posicion = bisect.bisect_left(claves, prefijo)
+                while posicion < len(claves) and len(encontrados) < limite:
+                    clave = claves[posicion]
+                    if not clave.startswith(prefijo):
+                        break
+                    id = clave.rpartition(SEPARADOR)[2]
+                    if id not in encontrados:
+                        encontrados.append(id)
+                    posicion += 1
+            return [self._formatear(tipo, self.filas[tipo][id]) for id in encontrados]
+
+    def _formatear(self, tipo, fila):
+        if tipo == 'modelo':
+            marca = self.filas['marca'].get(str(fila[2]))
+            return {'id': fila[0], 'nombre': fila[1], 'marca': marca[1] if marca else None}
+        return dict(zip(COLUMNAS[tipo], fila))
+
+
+def construir(version, bajas):
+    """Índice con todas las marcas, modelos y clientes de la base"""
+    ahora = timezone.now()
+    return IndiceAutocompletado(version, *(
+        MODELOS[tipo].objects.values_list(*COLUMNAS[tipo]).iterator(chunk_size=5000)
+        for tipo in TIPOS
+    ), bajas=bajas, sincronizado=ahora)
+
+
+_indice = None
+_indice_lock = threading.Lock()
+
+
+def indice_autocompletado():
+    """Índice del proceso: reconstruido tras bajas o al vencer el TTL, sincronizado si cambió la versión"""
+    global _indice
+    version = versiones.version('autocompletado')
+    bajas = versiones.version('autocompletado_bajas')
+    indice = _indice
+    if indice is None or not indice.vigente(bajas) or indice.version != version:
+        with _indice_lock:
+            indice = _indice
+            if indice is None or not indice.vigente(bajas):
+                indice = _indice = construir(version, bajas)
+            elif indice.version != version:
+                indice.sincronizar(version)
+    return indice
+
+
+def modificado():
+    """Altas y modificaciones: los procesos sincronizan las filas cambiadas"""
+    versiones.invalidar('autocompletado')
+
+
+def invalidar():
+    """Bajas y cargas masivas: fuerza la reconstrucción en todos los procesos"""
+    versiones.invalidar('autocompletado_bajas')
+
+
+def precargar():
+    """Construye el índice al arrancar el proceso (core/arranque.py) si FLYCAR_AUTOCOMPLETADO_PRECARGAR está activo"""
+    if not settings.FLYCAR_AUTOCOMPLETADO_PRECARGAR:
+        return None
+    try:
+        return indice_autocompletado()
+    except DatabaseError:
+        logger.warning('No se pudo precargar el índice de autocompletado', exc_info=True)
+        return None
+    finally:
+        connections.close_all()
@@ -0,0 +1,131 @@
+"""
+Búsqueda de texto completo del catálogo con SQLite FTS5
+
+`catalogo_busqueda` es una tabla virtual FTS5 de contenido externo sobre
+`catalogo_vehiculos` (marca, modelo, descripción y año ya están
+desnormalizados ahí, ver core/catalogo.py): no duplica el texto, solo
+guarda el índice invertido. Tres triggers la mantienen sincronizada con
+cualquier escritura del catálogo, incluidas las masivas. Se crea en
+`post_migrate` (también con --nomigrations) y se regenera con
+`manage.py reconstruir_busqueda`, necesario después de un VACUUM o de
+una migración que reconstruya `catalogo_vehiculos`, porque el índice
+referencia el rowid de cada fila.
+
+`filtrar(queryset, q)` convierte "hilux 2024 full" en la consulta FTS
+`"hilux"* "2024"* "full"*` (todos los términos, cada uno como prefijo) y
+anota la relevancia BM25 para ordenar por ella.
+"""
+
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+TABLA = 'catalogo_busqueda'
+CONTENIDO = 'catalogo_vehiculos'
+COLUMNAS = ('marca_nombre', 'modelo_nombre', 'descripcion', 'anio')
+# Pesos BM25 por columna: marca y modelo pesan más que la descripción
+PESOS = (10.0, 10.0, 1.0, 5.0)
+MAX_TERMINOS = 8
+
+_TERMINO = re.compile(r'\w+')
+
+_columnas = ', '.join(COLUMNAS)
+_nuevos = ', '.join(f'new.{c}' for c in COLUMNAS)
+_viejos = ', '.join(f'old.{c}' for c in COLUMNAS)
+
+TABLA_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA} USING fts5({_columnas}, "
+    f"content='{CONTENIDO}', content_rowid='rowid', "
+    f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+)
+
+TRIGGERS_SQL = {
+    f'{TABLA}_ai': (
+        f"CREATE TRIGGER IF NOT EXISTS {TABLA}_ai AFTER INSERT ON {CONTENIDO} BEGIN "
+        f"INSERT INTO {TABLA}(rowid, {_columnas}) VALUES (new.rowid, {_nuevos}); END"
+    ),
+    f'{TABLA}_ad': (
+        f"CREATE TRIGGER IF NOT EXISTS {TABLA}_ad AFTER DELETE ON {CONTENIDO} BEGIN "
+        f"INSERT INTO {TABLA}({TABLA}, rowid, {_columnas}) VALUES ('delete', old.rowid, {_viejos}); END"
+    ),
+    f'{TABLA}_au': (
+        f"CREATE TRIGGER IF NOT EXISTS {TABLA}_au AFTER UPDATE OF {_columnas} ON {CONTENIDO} BEGIN "
+        f"INSERT INTO {TABLA}({TABLA}, rowid, {_columnas}) VALUES ('delete', old.rowid, {_viejos}); "
+        f"INSERT INTO {TABLA}(rowid, {_columnas}) VALUES (new.rowid, {_nuevos}); END"
+    ),
+}
+
+
+def instalar(connection):
+    """Crea la tabla FTS y los triggers que falten; si faltaba algo, reindexa. Solo SQLite."""
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name IN (%s)" % ', '.join(['%s'] * (len(TRIGGERS_SQL) + 1)),
+            [TABLA, *TRIGGERS_SQL],
+        )
+        existentes = {fila[0] for fila in cursor.fetchall()}
+        if existentes >= {TABLA, *TRIGGERS_SQL}:
+            return False
+        cursor.execute(TABLA_SQL)
+        cursor.execute(f"INSERT INTO {TABLA}({TABLA}, rank) VALUES ('rank', %s)",
+                       [f"bm25({', '.join(map(str, PESOS))})"])
+        for sql in TRIGGERS_SQL.values():
+            cursor.execute(sql)
+    reconstruir(connection)
+    return True
+
+
+def reconstruir(connection=None):
+    """Reindexa todo el catálogo y compacta el índice; devuelve la cantidad de filas indexadas"""
+    connection = connection or connections['default']
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {TABLA}({TABLA}) VALUES ('rebuild')")
+        cursor.execute(f"INSERT INTO {TABLA}({TABLA}) VALUES ('optimize')")
+        cursor.execute(f'SELECT COUNT(*) FROM {CONTENIDO}')
+        return cursor.fetchone()[0]
+
+
+def terminos(q):
+    return _TERMINO.findall(q.lower())[:MAX_TERMINOS]
+
+
+def expresion_fts(q):
+    """Consulta FTS5 con todos los términos como prefijos, o None si `q` no tiene ninguno"""
+    lista = terminos(q)
+    if not lista:
+        return None
+    return ' '.join(f'"{termino}"*' for termino in lista)
+
+
+def filtrar(queryset, q):
+    """
+    Filtra un queryset de VehiculoCatalogo por `q` y anota `relevancia`
+    (BM25 de FTS5: menor es mejor). En otras bases cae a icontains sin ranking.
+    """
+    expresion = expresion_fts(q)
+    if expresion is None:
+        return queryset.annotate(relevancia=RawSQL('0', (), output_field=FloatField())).none()
+    if connections[queryset.db].vendor != 'sqlite':
+        for termino in terminos(q):
+            queryset = queryset.filter(
+                Q(marca_nombre__icontains=termino) | Q(modelo_nombre__icontains=termino)
+                | Q(descripcion__icontains=termino) | Q(anio__startswith=termino)
+            )
+        return queryset.annotate(relevancia=RawSQL('0', (), output_field=FloatField()))
+    # El índice referencia el rowid del catálogo (no su pk), que el ORM no conoce como campo
+    coincide = RawSQL(
+        f'{CONTENIDO}.rowid IN (SELECT rowid FROM {TABLA} WHERE {TABLA} MATCH %s)',
+        (expresion,), output_field=BooleanField(),
+    )
+    # LIMIT -1 evita que SQLite aplane la subconsulta: los rank se calculan una vez y se
+    # buscan por rowid con un índice automático, en lugar de repetir el MATCH por fila
+    rank = RawSQL(
+        f'SELECT r.rank FROM (SELECT rowid, rank FROM {TABLA} WHERE {TABLA} MATCH %s LIMIT -1) AS r '
+        f'WHERE r.rowid = {CONTENIDO}.rowid',
+        (expresion,), output_field=FloatField(),
+    )
+    return queryset.filter(coincide).annotate(relevancia=rank)
@@ -0,0 +1,115 @@
+"""
+Modelo de lectura del catálogo de vehículos
+
+Mantiene `VehiculoCatalogo` (marca, modelo, estado y precio con oferta
+desnormalizados) actualizado de forma incremental a partir de las señales
+de Vehiculo, Modelo, Marca y Oferta. Los listados de `/api/vehiculos/`
+leen solo de esta tabla.
+"""
+
+from django.db.models import F
+
+from .models import Vehiculo, VehiculoCatalogo
+
+TAMANIO_LOTE = 1000
+
+CAMPOS_ACTUALIZABLES = [
+    'nro_chasis', 'precio', 'descripcion', 'anio', 'imagen', 'estado', 'eliminado',
+    'modelo_id', 'modelo_nombre', 'marca_nombre', 'oferta_id', 'oferta_inicio',
+    'oferta_fin', 'precio_con_oferta', 'created_at', 'updated_at',
+]
+
+
+def campos_catalogo(vehiculo):
+    """Valores desnormalizados de un vehículo con modelo, marca y oferta cargados"""
+    oferta = vehiculo.oferta
+    precio_con_oferta = vehiculo.precio
+    if oferta is not None:
+        precio_con_oferta = vehiculo.precio - vehiculo.precio * (oferta.descuento / 100)
+    return {
+        'vehiculo_id': vehiculo.id,
+        'nro_chasis': vehiculo.nro_chasis,
+        'precio': vehiculo.precio,
+        'descripcion': vehiculo.descripcion,
+        'anio': vehiculo.anio,
+        'imagen': vehiculo.imagen,
+        'estado': vehiculo.estado,
+        'eliminado': vehiculo.eliminado,
+        'modelo_id': vehiculo.modelo_id,
+        'modelo_nombre': vehiculo.modelo.nombre,
+        'marca_nombre': vehiculo.modelo.marca.nombre,
+        'oferta_id': vehiculo.oferta_id,
+        'oferta_inicio': oferta.fecha_inicio if oferta else None,
+        'oferta_fin': oferta.fecha_fin if oferta else None,
+        'precio_con_oferta': precio_con_oferta,
+        'created_at': vehiculo.created_at,
+        'updated_at': vehiculo.updated_at,
+    }
+
+
+def _volcar(vehiculos):
+    filas = [VehiculoCatalogo(**campos_catalogo(v)) for v in vehiculos]
+    VehiculoCatalogo.objects.bulk_create(
+        filas,
+        update_conflicts=True,
+        unique_fields=['vehiculo'],
+        update_fields=CAMPOS_ACTUALIZABLES,
+    )
+    return len(filas)
+
+
+def sincronizar_vehiculos(ids):
+    """Reescribe las filas del catálogo de los vehículos indicados (upsert por lotes)"""
+    ids = list(ids)
+    total = 0
+    for inicio in range(0, len(ids), TAMANIO_LOTE):
+        lote = ids[inicio:inicio + TAMANIO_LOTE]
+        total += _volcar(Vehiculo.objects.select_related('modelo__marca', 'oferta').filter(id__in=lote))
+    return total
+
+
+def sincronizar_vehiculos_de(**filtros):
+    """Sincroniza los vehículos que cumplen el filtro dado"""
+    ids = Vehiculo.objects.filter(**filtros).values_list('id', flat=True)
+    return sincronizar_vehiculos(ids)
+
+
+def actualizar_modelo(modelo):
+    """Propaga el nombre y la marca (que puede haber cambiado) de un modelo a sus filas del catálogo"""
+    return VehiculoCatalogo.objects.filter(modelo_id=modelo.id).update(
+        modelo_nombre=modelo.nombre,
+        marca_nombre=modelo.marca.nombre,
+    )
+
+
+def actualizar_marca(marca):
+    """Propaga el nombre de una marca a las filas de todos sus modelos"""
+    modelo_ids = marca.modelos.values('id')
+    return VehiculoCatalogo.objects.filter(modelo_id__in=modelo_ids).update(marca_nombre=marca.nombre)
+
+
+def quitar_oferta(oferta_id):
+    """Limpia la oferta eliminada (los vehículos ya quedaron con oferta=NULL)"""
+    return VehiculoCatalogo.objects.filter(oferta_id=oferta_id).update(
+        oferta_id=None,
+        oferta_inicio=None,
+        oferta_fin=None,
+        precio_con_oferta=F('precio'),
+    )
+
+
+def reconstruir():
+    """Regenera el catálogo completo; devuelve la cantidad de filas escritas"""
+    VehiculoCatalogo.objects.exclude(
+        vehiculo_id__in=Vehiculo.objects.values('id')
+    ).delete()
+    total = 0
+    queryset = Vehiculo.objects.select_related('modelo__marca', 'oferta').order_by('pk')
+    ultimo = None
+    while True:
+        lote_qs = queryset if ultimo is None else queryset.filter(pk__gt=ultimo)
+        lote = list(lote_qs[:TAMANIO_LOTE])
+        if not lote:
+            return total
+        total += _volcar(lote)
+        ultimo = lote[-1].pk
@@ -0,0 +1,105 @@
+"""
+GET condicionales (ETag) para listados y detalles
+
+Cada recurso tiene una versión en core/versiones.py ('vehiculos',
+'accesorios', 'cotizaciones', 'reservas') que incrementan las señales de
+core/signals.py y, explícitamente, las actualizaciones masivas que no las
+disparan (vencimientos, archivo, cambios de estado condicionados). El
+validador de una respuesta se calcula sin tocar la base: un HMAC de las
+versiones de las que depende, del usuario, de la URL completa y del
+formato. Si el cliente ya lo tiene se responde 304 sin consultar ni
+serializar nada. No se envía Last-Modified: con resolución de segundos
+una escritura en el mismo segundo no lo cambiaría y If-Modified-Since
+daría un 304 con datos viejos.
+
+Las versiones se incrementan en la primaria, así que el cuerpo que
+acompaña al validador también se lee de la primaria: con una réplica
+atrasada (core/db_router.py) el ETag nuevo quedaría asociado a datos
+viejos y el cliente recibiría 304 sobre ellos hasta la próxima escritura.
+
+El usuario forma parte del ETag porque los querysets dependen de él (un
+cliente solo ve sus cotizaciones): el validador de un usuario nunca sirve
+para otro. Las respuestas llevan `Vary: Authorization, Cookie` y
+`Cache-Control: private, no-cache`, así que los caches compartidos no las
+mezclan y el navegador revalida siempre.
+
+Los precios con oferta dependen de la hora; los recursos que los muestran
+suman al validador los bordes de oferta ya pasados (core/precios.py).
+
+Las versiones tienen que ser las mismas en todos los workers: con un cache
+propio de cada proceso (LocMemCache) una escritura en un worker no cambia
+el validador de los demás, que responderían 304 con datos viejos. En ese
+caso no se emiten validadores (ver versiones.cache_compartido).
+"""
+
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.crypto import salted_hmac
+from django.utils.http import quote_etag
+
+from . import versiones
+from .db_router import usar_replicas
+from .precios import matriz_precios
+
+RECURSOS = ('vehiculos', 'accesorios', 'cotizaciones', 'reservas')
+
+
+def clave(recurso):
+    return f'respuestas:{recurso}'
+
+
+def invalidar(*recursos):
+    """Incrementa la versión de `recursos` (por defecto todos), para escrituras sin señales"""
+    for recurso in recursos or RECURSOS:
+        versiones.invalidar(clave(recurso))
+
+
+def validador(request, recursos, ofertas=False):
+    """ETag de la respuesta a `request`"""
+    valores = [versiones.version(clave(recurso)) for recurso in recursos]
+    if ofertas:
+        bordes, _ = matriz_precios().bordes(timezone.now())
+        valores.append(bordes)
+    usuario = request.user.pk if request.user.is_authenticated else 'anonimo'
+    mensaje = '|'.join(map(str, [
+        *valores, usuario, request.get_full_path(), request.accepted_renderer.format,
+    ]))
+    etag = quote_etag(salted_hmac('core.condicional', mensaje, algorithm='sha256').hexdigest()[:32])
+    return etag
+
+
+class RespuestaCondicionalMixin:
+    """
+    list y retrieve con ETag: responde 304 sin consultar la base si el
+    cliente tiene la versión vigente y si no lee de la primaria. `versiones_condicionales`
+    son los recursos de RECURSOS de los que depende la respuesta y
+    `condicional_ofertas` indica si muestra precios con oferta.
+    """
+    versiones_condicionales = ()
+    condicional_ofertas = False
+
+    def _condicional(self, request, vista, *args, **kwargs):
+        if not versiones.cache_compartido():
+            response = vista(request, *args, **kwargs)
+            patch_vary_headers(response, ('Authorization', 'Cookie'))
+            return response
+        etag = validador(request, self.versiones_condicionales, self.condicional_ofertas)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            token = usar_replicas.set(False)
+            try:
+                response = vista(request, *args, **kwargs)
+            finally:
+                usar_replicas.reset(token)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Authorization', 'Cookie'))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._condicional(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._condicional(request, super().retrieve, *args, **kwargs)
+
@@ -0,0 +1,209 @@
+"""
+Registro de consultas lentas
+
+`MonitorConsultasLentas` es un execute_wrapper que guarda, para cada
+consulta que supera FLYCAR_CONSULTAS_LENTAS_MS, el SQL con sus
+placeholders y su forma, la duración, la vista que la originó y la pila de
+llamadas del proyecto. El plan (EXPLAIN QUERY PLAN) se captura una sola
+vez por forma de consulta; usa los parámetros pero no los guarda. Los
+valores (emails, DNI, hashes de contraseñas) solo se registran si se
+activa FLYCAR_CONSULTAS_LENTAS_PARAMETROS, para depurar en desarrollo.
+Los registros quedan en un buffer circular en memoria, que cada worker
+expone en /api/metrics/consultas-lentas, y, si se configura
+FLYCAR_CONSULTAS_LENTAS_ARCHIVO, también en un archivo JSONL. El archivo
+rota al superar FLYCAR_CONSULTAS_LENTAS_ARCHIVO_MAX_BYTES (queda una sola
+copia anterior, `<archivo>.1`). `manage.py consultas_lentas` lee el
+archivo y su copia, o el buffer de un worker con --url.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import statistics
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+from django.views import View
+
+logger = logging.getLogger(__name__)
+
+_RAIZ = str(Path(settings.BASE_DIR).resolve())
+_ESTE_ARCHIVO = str(Path(__file__).resolve())
+
+# `IN (%s, %s, ...)` y los INSERT de varias filas cuentan como una sola forma
+_PLACEHOLDERS = re.compile(r'IN \(%s(?:, %s)*\)')
+_FILAS = re.compile(r'(\((?:%s, )*%s\))(?:, \1)*')
+
+
+def forma(sql):
+    """Identificador estable de la forma de una consulta (sin importar el largo de IN ni las filas)"""
+    normalizada = _FILAS.sub(r'\1...', _PLACEHOLDERS.sub('IN (%s...)', sql))
+    return hashlib.sha1(normalizada.encode('utf-8')).hexdigest()[:16]
+
+
+def _nombre_vista(vista):
+    accion = getattr(vista, 'action', None) or vista.request.method.lower()
+    return f'{type(vista).__name__}.{accion}'
+
+
+def pila_del_proyecto():
+    """
+    Frames del proyecto (fuera de site-packages) desde el más externo, y la
+    vista que originó la consulta: el `self` de algún frame que sea una
+    View de Django, aunque el método sea heredado (p. ej. ListModelMixin.list).
+    """
+    pila, vista = [], None
+    frame = sys._getframe(1)
+    while frame is not None:
+        archivo = frame.f_code.co_filename
+        if archivo.startswith(_RAIZ) and 'site-packages' not in archivo and archivo != _ESTE_ARCHIVO:
+            relativo = archivo[len(_RAIZ) + 1:]
+            # co_qualname existe desde Python 3.11
+            nombre = getattr(frame.f_code, 'co_qualname', frame.f_code.co_name)
+            pila.append(f'{relativo}:{frame.f_lineno} {nombre}')
+        instancia = frame.f_locals.get('self')
+        if isinstance(instancia, View) and hasattr(instancia, 'request'):
+            vista = _nombre_vista(instancia)
+        frame = frame.f_back
+    pila.reverse()
+    return pila, vista
+
+
+def anterior(archivo):
+    """Copia del archivo JSONL que quedó de la última rotación"""
+    return archivo.with_name(archivo.name + '.1')
+
+
+def agrupar(registros, top=10):
+    """Formas de consulta ordenadas por tiempo total, con cantidad, p50, máximo y plan"""
+    grupos = {}
+    for registro in registros:
+        grupo = grupos.setdefault(registro['forma'], {
+            'forma': registro['forma'], 'sql': registro['sql'], 'duraciones': [],
+            'vistas': set(), 'plan': None, 'origen': registro['pila'][-1] if registro['pila'] else None,
+        })
+        grupo['duraciones'].append(registro['ms'])
+        if registro.get('vista'):
+            grupo['vistas'].add(registro['vista'])
+        grupo['plan'] = grupo['plan'] or registro.get('plan')
+    resultado = []
+    for grupo in grupos.values():
+        duraciones = grupo.pop('duraciones')
+        grupo.update({
+            'cantidad': len(duraciones),
+            'total_ms': round(sum(duraciones), 3),
+            'p50_ms': round(statistics.median(duraciones), 3),
+            'max_ms': round(max(duraciones), 3),
+            'vistas': sorted(grupo['vistas']),
+        })
+        resultado.append(grupo)
+    resultado.sort(key=lambda g: g['total_ms'], reverse=True)
+    return resultado[:top]
+
+
+class MonitorConsultasLentas:
+    """execute_wrapper que registra las consultas que tardan más de `umbral_ms`"""
+
+    def __init__(self, umbral_ms, capacidad=500, archivo=None, max_bytes=None, parametros=False):
+        self.umbral = umbral_ms / 1000
+        self.parametros = parametros
+        self.registros = deque(maxlen=capacidad)
+        self.capacidad = capacidad
+        self.archivo = Path(archivo) if archivo else None
+        self.max_bytes = max_bytes
+        self.planes = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(self._local, 'explicando', False):
+            return execute(sql, params, many, context)
+        inicio = time.perf_counter()
+        resultado = execute(sql, params, many, context)
+        duracion = time.perf_counter() - inicio
+        if duracion >= self.umbral:
+            self.registrar(sql, params, many, duracion, context['connection'])
+        return resultado
+
+    def registrar(self, sql, params, many, duracion, connection):
+        pila, vista = pila_del_proyecto()
+        clave = forma(sql)
+        registro = {
+            'momento': timezone.now().isoformat(),
+            'alias': connection.alias,
+            'forma': clave,
+            'sql': sql,
+            'ms': round(duracion * 1000, 3),
+            'vista': vista,
+            'pila': pila,
+            'plan': self.plan(clave, sql, params, many, connection),
+        }
+        if self.parametros:
+            registro['params'] = None if many else params
+        with self._lock:
+            self.registros.append(registro)
+            if self.archivo:
+                with self.archivo.open('a', encoding='utf-8') as salida:
+                    salida.write(json.dumps(registro, default=str, ensure_ascii=False) + '\n')
+                    tamanio = salida.tell()
+                if self.max_bytes and tamanio > self.max_bytes:
+                    self.archivo.replace(anterior(self.archivo))
+
+    def plan(self, clave, sql, params, many, connection):
+        """EXPLAIN de la forma, capturado una sola vez (caché LRU acotado a `capacidad`)"""
+        with self._lock:
+            if clave in self.planes:
+                self.planes.move_to_end(clave)
+                return self.planes[clave]
+        plan = None
+        if connection.vendor == 'sqlite' and not many:
+            self._local.explicando = True
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                    plan = [fila[-1] for fila in cursor.fetchall()]
+            except Exception:
+                logger.debug('No se pudo obtener el plan de %s', sql, exc_info=True)
+            finally:
+                self._local.explicando = False
+        with self._lock:
+            self.planes[clave] = plan
+            if len(self.planes) > self.capacidad:
+                self.planes.popitem(last=False)
+        return plan
+
+    def peores(self, top=10):
+        return self.resumen(top)['peores']
+
+    def resumen(self, top=10):
+        """Cantidad de registros del buffer y sus formas más costosas"""
+        with self._lock:
+            registros = list(self.registros)
+        return {'registros': len(registros), 'peores': agrupar(registros, top)}
+
+
+monitor = None
+
+
+def instalar(connection):
+    """Agrega el monitor del proceso a la conexión si FLYCAR_CONSULTAS_LENTAS_MS está configurado"""
+    global monitor
+    if settings.FLYCAR_CONSULTAS_LENTAS_MS is None:
+        return None
+    if monitor is None:
+        monitor = MonitorConsultasLentas(
+            settings.FLYCAR_CONSULTAS_LENTAS_MS,
+            capacidad=settings.FLYCAR_CONSULTAS_LENTAS_CAPACIDAD,
+            archivo=settings.FLYCAR_CONSULTAS_LENTAS_ARCHIVO,
+            max_bytes=settings.FLYCAR_CONSULTAS_LENTAS_ARCHIVO_MAX_BYTES,
+            parametros=settings.FLYCAR_CONSULTAS_LENTAS_PARAMETROS,
+        )
+    if monitor not in connection.execute_wrappers:
+        connection.execute_wrappers.append(monitor)
+    return monitor
@@ -0,0 +1,129 @@
+"""
+Router de lectura/escritura con réplicas
+
+Las escrituras van a `default`. Las lecturas de requests con método
+seguro (GET, HEAD, OPTIONS) van a una de las réplicas de FLYCAR_REPLICAS,
+salvo que:
+
+- ocurran dentro de un `transaction.atomic` de la primaria,
+- el mismo cliente haya escrito hace menos de
+  FLYCAR_REPLICA_FIJACION_SEGUNDOS (read-your-writes; la marca vive en el
+  cache de Django). Un usuario autenticado es el mismo cliente con
+  cualquier token o sesión; un anónimo se identifica por su cookie de
+  sesión o su IP.
+
+Todo lo demás (requests que escriben, como `generar`, `crear`, `cancelar`
+y `realizar`, comandos, señales y el barrido de vencimientos) lee de la
+primaria. Sin réplicas configuradas el router no interviene.
+"""
+
+import contextvars
+import hashlib
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+PREFIJO_FIJACION = 'flycar:fijado:'
+
+# Lo activa FijacionPrimariaMiddleware solo para lecturas que pueden ir a una réplica
+usar_replicas = contextvars.ContextVar('flycar_usar_replicas', default=False)
+
+
+class RouterLecturaEscritura:
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.FLYCAR_REPLICAS
+        if not replicas:
+            return None
+        if not usar_replicas.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        instancia = hints.get('instance')
+        if instancia is not None and instancia._state.db:
+            return instancia._state.db
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        bases = {DEFAULT_DB_ALIAS, *settings.FLYCAR_REPLICAS}
+        if obj1._state.db in bases and obj2._state.db in bases:
+            return True
+        return None
+
+
+def usuario_autenticado(request):
+    """
+    Id del usuario de la sesión o del token JWT, o None si es anónimo. El
+    middleware corre antes que la autenticación de DRF: el token se valida
+    acá (firma y vencimiento, sin consultar la base).
+    """
+    usuario = getattr(request, 'user', None)
+    if usuario is not None and usuario.is_authenticated:
+        return str(usuario.pk)
+    autenticacion = JWTAuthentication()
+    encabezado = autenticacion.get_header(request)
+    crudo = encabezado and autenticacion.get_raw_token(encabezado)
+    if not crudo:
+        return None
+    try:
+        token = autenticacion.get_validated_token(crudo)
+    except (InvalidToken, TokenError):
+        return None
+    usuario_id = token.get(jwt_settings.USER_ID_CLAIM)
+    return None if usuario_id is None else str(usuario_id)
+
+
+def clave_cliente(request):
+    """Identifica al cliente por su usuario o, si es anónimo, por su cookie de sesión o su IP"""
+    usuario_id = usuario_autenticado(request)
+    if usuario_id is not None:
+        origen = f'usuario:{usuario_id}'
+    else:
+        origen = request.COOKIES.get(settings.SESSION_COOKIE_NAME) or request.META.get('REMOTE_ADDR', '')
+    return PREFIJO_FIJACION + hashlib.sha256(origen.encode('utf-8')).hexdigest()[:32]
+
+
+class FijacionPrimariaMiddleware:
+    """
+    Habilita las réplicas para las requests de solo lectura, salvo que el
+    cliente haya escrito hace poco. Solo se activa con réplicas.
+    """
+
+    def __init__(self, get_response):
+        if not settings.FLYCAR_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        clave = clave_cliente(request)
+        escribe = request.method not in ('GET', 'HEAD', 'OPTIONS')
+        token = usar_replicas.set(not escribe and cache.get(clave) is None)
+        try:
+            response = self.get_response(request)
+        finally:
+            usar_replicas.reset(token)
+        if escribe:
+            cache.set(clave, 1, settings.FLYCAR_REPLICA_FIJACION_SEGUNDOS)
+        return response
+
+
+def sincronizar_replicas():
+    """
+    Copia la primaria a cada réplica SQLite con la API de backup.
+
+    Para desarrollo y tests, donde la "réplica" es otro archivo local; en
+    producción la replicación es externa (Litestream, LiteFS, etc.).
+    """
+    primaria = connections[DEFAULT_DB_ALIAS]
+    primaria.ensure_connection()
+    for alias in settings.FLYCAR_REPLICAS:
+        replica = connections[alias]
+        replica.ensure_connection()
+        primaria.connection.backup(replica.connection)
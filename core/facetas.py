@@ -0,0 +1,345 @@
+"""
+Índice de facetas del catálogo en memoria
+
+Cada vehículo no eliminado del catálogo ocupa un bit; para cada valor de
+cada faceta (marca, modelo, año, estado, oferta vigente y rango de
+precio) se guarda un bitmap como entero de Python. Una combinación de
+filtros es un AND de ORs de bitmaps y cada conteo un `bit_count()`, sin
+consultar la base.
+
+El índice de cada proceso se construye con una sola consulta a
+VehiculoCatalogo y se actualiza de forma incremental. Al confirmarse los
+cambios de vehículos (post_save y `vehiculos_actualizados`, ver
+core/signals.py) sus ids se publican en un registro de cambios en el
+cache compartido: la entrada `n` de la versión 'facetas' vigente se
+reclama con `cache.add` (atómico en Redis y Memcached), así que dos
+procesos que publican a la vez quedan en entradas distintas y ninguno
+pisa al otro. Cada proceso, antes de consultar su índice, vuelve a leer
+del catálogo las filas de las entradas que todavía no aplicó.
+
+Los cambios de modelos, marcas y ofertas cambian la versión 'facetas'
+(core/versiones.py) y provocan una reconstrucción, igual que un proceso
+que no se sincronizó durante más tiempo del que duran las entradas. Como
+la matriz de precios, el índice vence solo en el próximo
+fecha_inicio/fecha_fin de alguna oferta, porque el precio efectivo y la
+faceta de oferta dependen de la hora.
+"""
+
+import bisect
+import logging
+import threading
+import time
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections, transaction
+from django.utils import timezone
+
+from . import versiones
+from .models import VehiculoCatalogo
+
+logger = logging.getLogger(__name__)
+
+FACETAS = ('marca', 'modelo', 'anio', 'estado', 'oferta', 'precio')
+
+# Subdivisiones de cada rango de precio que usa el filtro precio_min/precio_max:
+# los niveles cubiertos son un OR de bitmaps y solo los dos de borde se recorren
+RESOLUCION_PRECIO = 20
+
+# Registro de cambios: f'{CAMBIOS}{version}:{n}' son los ids de la entrada n y
+# f'{CAMBIOS}{version}:ultimo' una pista de la próxima entrada libre
+CAMBIOS = 'flycar:facetas:cambios:'
+# Segundos que se guarda cada entrada; un índice sin sincronizar más tiempo se reconstruye
+DURACION_CAMBIOS = 24 * 3600
+
+CAMPOS = [
+    'vehiculo_id', 'precio', 'anio', 'estado', 'modelo_id', 'modelo_nombre', 'marca_nombre',
+    'oferta_id', 'oferta_inicio', 'oferta_fin', 'precio_con_oferta',
+]
+
+
+def bitmap(posiciones):
+    """Entero con los bits de `posiciones` encendidos, en tiempo lineal"""
+    posiciones = list(posiciones)
+    if not posiciones:
+        return 0
+    buffer = bytearray(max(posiciones) // 8 + 1)
+    for posicion in posiciones:
+        buffer[posicion >> 3] |= 1 << (posicion & 7)
+    return int.from_bytes(buffer, 'little')
+
+
+class IndiceFacetas:
+    """Bitmaps por valor de faceta sobre los vehículos no eliminados del catálogo"""
+
+    def __init__(self, version, ahora, cambios=0):
+        self.version = version
+        self.ahora = ahora
+        self.creado = time.monotonic()
+        # Entradas del registro de cambios ya aplicadas y cuándo se leyó por última vez
+        self.cambios = cambios
+        self.sincronizado = self.creado
+        self.ancho_precio = Decimal(settings.FLYCAR_FACETAS_RANGO_PRECIO)
+        self.paso_precio = self.ancho_precio / RESOLUCION_PRECIO
+        self.proximo_borde = None
+        self.posiciones = {}
+        self.filas = []
+        self.libres = []
+        self.modelos = {}
+        # Por nivel de precio, (precio, bit) ordenados: para los bordes de precio_min/precio_max
+        self.precios = defaultdict(list)
+        self._lock = threading.Lock()
+
+        bits = {faceta: defaultdict(list) for faceta in FACETAS}
+        for fila in VehiculoCatalogo.objects.filter(eliminado=False).values(*CAMPOS).iterator(chunk_size=5000):
+            bit = len(self.filas)
+            valores = self._registrar(fila, bit, ordenar=False)
+            for faceta in FACETAS:
+                bits[faceta][valores[faceta]].append(bit)
+        for ordenados in self.precios.values():
+            ordenados.sort()
+        self.todos = bitmap(range(len(self.filas)))
+        self.columnas = {
+            faceta: {valor: bitmap(posiciones) for valor, posiciones in por_valor.items()}
+            for faceta, por_valor in bits.items()
+        }
+        self.niveles = {nivel: bitmap(bit for _, bit in ordenados) for nivel, ordenados in self.precios.items()}
+
+    # ---------- mantenimiento ----------
+
+    def _registrar(self, fila, bit, ordenar=True):
+        """Valores de faceta de la fila, registrada en la posición `bit`"""
+        vigente = (
+            fila['oferta_id'] is not None
+            and fila['oferta_inicio'] <= self.ahora <= fila['oferta_fin']
+        )
+        precio = fila['precio_con_oferta'].quantize(Decimal('0.01')) if vigente else fila['precio']
+        nivel = int(precio // self.paso_precio)
+        if fila['oferta_id'] is not None:
+            for borde in (fila['oferta_inicio'], fila['oferta_fin']):
+                if borde > self.ahora and (self.proximo_borde is None or borde < self.proximo_borde):
+                    self.proximo_borde = borde
+        valores = {
+            'marca': fila['marca_nombre'],
+            'modelo': fila['modelo_id'],
+            'anio': fila['anio'],
+            'estado': fila['estado'],
+            'oferta': vigente,
+            'precio': nivel // RESOLUCION_PRECIO,
+        }
+        self.modelos[fila['modelo_id']] = (fila['modelo_nombre'], fila['marca_nombre'])
+        if ordenar:
+            bisect.insort(self.precios[nivel], (precio, bit))
+        else:
+            self.precios[nivel].append((precio, bit))
+        self.posiciones[fila['vehiculo_id']] = bit
+        if bit == len(self.filas):
+            self.filas.append((valores, precio, nivel))
+        else:
+            self.filas[bit] = (valores, precio, nivel)
+        return valores
+
+    def _agregar(self, fila):
+        bit = self.libres.pop() if self.libres else len(self.filas)
+        valores = self._registrar(fila, bit)
+        mascara = 1 << bit
+        self.todos |= mascara
+        for faceta in FACETAS:
+            columna = self.columnas[faceta]
+            columna[valores[faceta]] = columna.get(valores[faceta], 0) | mascara
+        nivel = self.filas[bit][2]
+        self.niveles[nivel] = self.niveles.get(nivel, 0) | mascara
+
+    def _quitar(self, vehiculo_id):
+        bit = self.posiciones.pop(vehiculo_id, None)
+        if bit is None:
+            return
+        valores, precio, nivel = self.filas[bit]
+        self.filas[bit] = None
+        mascara = ~(1 << bit)
+        self.todos &= mascara
+        for faceta in FACETAS:
+            columna = self.columnas[faceta]
+            restante = columna[valores[faceta]] & mascara
+            if restante:
+                columna[valores[faceta]] = restante
+            else:
+                del columna[valores[faceta]]
+        self.precios[nivel].remove((precio, bit))
+        if self.precios[nivel]:
+            self.niveles[nivel] &= mascara
+        else:
+            del self.precios[nivel], self.niveles[nivel]
+        self.libres.append(bit)
+
+    def actualizar(self, ids):
+        """Vuelve a leer del catálogo las filas de `ids` (las eliminadas salen del índice)"""
+        filas = VehiculoCatalogo.objects.filter(vehiculo_id__in=ids, eliminado=False).values(*CAMPOS)
+        with self._lock:
+            for vehiculo_id in ids:
+                self._quitar(vehiculo_id)
+            for fila in filas:
+                self._agregar(fila)
+
+    def vigente(self, version, ahora):
+        if version != self.version:
+            return False
+        if time.monotonic() - self.creado > settings.FLYCAR_FACETAS_TTL:
+            return False
+        return self.proximo_borde is None or ahora < self.proximo_borde
+
+    # ---------- consultas ----------
+
+    def _rango_precio(self, minimo, maximo):
+        """Bitmap de los vehículos con precio efectivo en [minimo, maximo]"""
+        desde = None if minimo is None else int(minimo // self.paso_precio)
+        hasta = None if maximo is None else int(maximo // self.paso_precio)
+        resultado = 0
+        for nivel, bits in self.niveles.items():
+            if (desde is not None and nivel < desde) or (hasta is not None and nivel > hasta):
+                continue
+            if nivel != desde and nivel != hasta:
+                resultado |= bits
+                continue
+            # Nivel de borde: solo los precios dentro del intervalo
+            ordenados = self.precios[nivel]
+            inicio = 0 if minimo is None else bisect.bisect_left(ordenados, (minimo, -1))
+            fin = len(ordenados) if maximo is None else bisect.bisect_right(ordenados, (maximo, len(self.filas)))
+            resultado |= bitmap(bit for _, bit in ordenados[inicio:fin])
+        return resultado
+
+    def consultar(self, filtros=None, precio_min=None, precio_max=None):
+        """
+        Cantidad de vehículos que cumplen `filtros` ({faceta: [valores]}, OR
+        dentro de una faceta y AND entre facetas) y conteos por valor de cada
+        faceta. Los conteos de una faceta ignoran su propio filtro, para que
+        el front pueda ofrecer los valores alternativos.
+        """
+        filtros = {faceta: valores for faceta, valores in (filtros or {}).items() if valores}
+        with self._lock:
+            seleccion = {}
+            for faceta, valores in filtros.items():
+                columna = self.columnas[faceta]
+                bits = 0
+                for valor in valores:
+                    bits |= columna.get(valor, 0)
+                seleccion[faceta] = bits
+            if precio_min is not None or precio_max is not None:
+                seleccion['precio'] = seleccion.get('precio', self.todos) & self._rango_precio(precio_min, precio_max)
+
+            def combinar(excepto=None):
+                bits = self.todos
+                for faceta, filtro in seleccion.items():
+                    if faceta != excepto:
+                        bits &= filtro
+                return bits
+
+            conteos = {}
+            for faceta in FACETAS:
+                base = combinar(excepto=faceta)
+                conteos[faceta] = {
+                    valor: cantidad for valor, bits in self.columnas[faceta].items()
+                    if (cantidad := (bits & base).bit_count())
+                }
+            total = combinar().bit_count()
+        return {'total': total, 'facetas': self._formatear(conteos)}
+
+    def _formatear(self, conteos):
+        facetas = {
+            faceta: [{'valor': valor, 'cantidad': cantidad} for valor, cantidad in sorted(conteos[faceta].items())]
+            for faceta in ('marca', 'anio', 'estado', 'oferta')
+        }
+        facetas['modelo'] = sorted((
+            {'valor': modelo_id, 'nombre': self.modelos[modelo_id][0], 'marca': self.modelos[modelo_id][1],
+             'cantidad': cantidad}
+            for modelo_id, cantidad in conteos['modelo'].items()
+        ), key=lambda m: (m['marca'], m['nombre']))
+        facetas['precio'] = [
+            {'desde': rango * self.ancho_precio, 'hasta': (rango + 1) * self.ancho_precio, 'cantidad': cantidad}
+            for rango, cantidad in sorted(conteos['precio'].items())
+        ]
+        return facetas
+
+
+_indice = None
+_indice_lock = threading.Lock()
+
+
+def _entrada(version, numero):
+    return f'{CAMBIOS}{version}:{numero}'
+
+
+def _proxima_entrada(version):
+    """Primera entrada libre del registro de `version`, a partir de la pista"""
+    numero = cache.get(f'{CAMBIOS}{version}:ultimo', 0)
+    while cache.get(_entrada(version, numero)) is not None:
+        numero += 1
+    return numero
+
+
+def _sincronizar(indice):
+    """Aplica las entradas del registro que `indice` no tiene; False si pudieron vencer"""
+    if time.monotonic() - indice.sincronizado > DURACION_CAMBIOS:
+        return False
+    sincronizado = time.monotonic()
+    numero, ids = indice.cambios, []
+    while (entrada := cache.get(_entrada(indice.version, numero))) is not None:
+        ids += entrada
+        numero += 1
+    if ids:
+        # Releer una fila dos veces no cambia el resultado: no hace falta excluir otros hilos
+        indice.actualizar(ids)
+    indice.cambios = max(indice.cambios, numero)
+    indice.sincronizado = sincronizado
+    return True
+
+
+def indice_facetas(ahora=None):
+    """Índice del proceso al día con el registro de cambios; reconstruido si cambió la versión o pasó un borde de oferta"""
+    global _indice
+    ahora = ahora or timezone.now()
+    version = versiones.version('facetas')
+    indice = _indice
+    if indice is None or not indice.vigente(version, ahora) or not _sincronizar(indice):
+        with _indice_lock:
+            indice = _indice
+            if indice is None or not indice.vigente(version, ahora) or not _sincronizar(indice):
+                # Las entradas anteriores ya están en el catálogo que se lee
+                indice = _indice = IndiceFacetas(version, ahora, _proxima_entrada(version))
+    return indice
+
+
+def _aplicar(ids):
+    """Publica `ids` en la próxima entrada libre del registro de la versión vigente"""
+    version = versiones.version('facetas')
+    numero = _proxima_entrada(version)
+    # Si otro proceso reclamó esa entrada primero se prueba la siguiente: ninguna publicación pisa a otra
+    while not cache.add(_entrada(version, numero), ids, DURACION_CAMBIOS):
+        numero += 1
+    cache.set(f'{CAMBIOS}{version}:ultimo', numero + 1, None)
+
+
+def actualizar(ids):
+    """Publica los vehículos `ids` para los índices de todos los procesos al confirmarse la transacción"""
+    ids = list(ids)
+    transaction.on_commit(lambda: _aplicar(ids))
+
+
+def invalidar():
+    """Fuerza la reconstrucción en todos los procesos (modelos, marcas, ofertas, cargas masivas)"""
+    versiones.invalidar('facetas')
+
+
+def precargar():
+    """Construye el índice al arrancar el proceso (core/arranque.py) si FLYCAR_FACETAS_PRECARGAR está activo"""
+    if not settings.FLYCAR_FACETAS_PRECARGAR:
+        return None
+    try:
+        return indice_facetas()
+    except DatabaseError:
+        logger.warning('No se pudo precargar el índice de facetas', exc_info=True)
+        return None
+    finally:
+        connections.close_all()
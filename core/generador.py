@@ -0,0 +1,422 @@
+"""
+Generador determinístico de datos sintéticos
+
+Produce un dataset coherente a partir de una semilla: marcas, modelos,
+accesorios con precio por modelo, ofertas con ventanas superpuestas,
+clientes, vendedores y, por cada vehículo, su historia comercial
+(cotización con líneas, reserva, pago y venta) consistente con su estado.
+Todo se inserta con bulk_create por lotes; la misma semilla genera los
+mismos ids, chasis y montos. Se usa desde `manage.py generar_datos` y
+desde los benchmarks.
+"""
+
+import random
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from . import autocompletado, catalogo, condicional, facetas, identificadores, instantanea, versiones
+from .models import (
+    Usuario, Cliente, Vendedor, Marca, Modelo, Oferta, Vehiculo, Accesorio, ModeloAccesorio,
+    Cotizacion, CotizacionVehiculo, CotizacionAccesorio, Pago, Reserva, Venta, VehiculoCatalogo
+)
+
+LOTE = 5000
+
+# Marca: (WMI, precio base, modelos)
+MARCAS = {
+    'Toyota': ('8AJ', 28000, ['Corolla', 'Hilux', 'Etios', 'Yaris', 'SW4', 'RAV4', 'Corolla Cross']),
+    'Ford': ('8AF', 30000, ['Ranger', 'Territory', 'Maverick', 'Bronco Sport', 'Kuga']),
+    'Chevrolet': ('8AG', 24000, ['Cruze', 'Onix', 'Tracker', 'S10', 'Spin', 'Equinox']),
+    'Volkswagen': ('8AW', 26000, ['Amarok', 'Taos', 'Polo', 'Nivus', 'T-Cross', 'Vento']),
+    'Fiat': ('8AP', 18000, ['Cronos', 'Pulse', 'Toro', 'Strada', 'Argo', 'Mobi']),
+    'Renault': ('8A1', 19000, ['Kwid', 'Duster', 'Alaskan', 'Sandero', 'Logan', 'Kangoo']),
+    'Peugeot': ('8AD', 23000, ['208', '2008', '3008', 'Partner', 'Expert']),
+    'Honda': ('93H', 32000, ['Civic', 'HR-V', 'CR-V', 'City', 'WR-V']),
+    'Nissan': ('94D', 29000, ['Frontier', 'Kicks', 'Versa', 'Sentra', 'X-Trail']),
+    'Citroën': ('935', 21000, ['C3', 'C4 Cactus', 'Berlingo', 'C3 Aircross']),
+}
+
+VERSIONES = ['Base', 'Full', 'Comfort', 'Highline', 'XLS', 'SRV', 'Limited', 'Sport']
+
+ACCESORIOS = [
+    ('Polarizado', 'Polarizado intermedio de cristales', 150),
+    ('Alarma volumétrica', 'Alarma con sensores volumétricos', 400),
+    ('Tuercas de seguridad', None, 80),
+    ('Cubre alfombras', 'Juego de alfombras de goma', 60),
+    ('Barras portaequipaje', None, 350),
+    ('Enganche de remolque', 'Enganche homologado', 600),
+    ('Sensor de estacionamiento', 'Sensores traseros con display', 300),
+    ('Cámara de retroceso', None, 450),
+    ('Cobertor de caja', 'Lona marítima para pick-up', 700),
+    ('Estribos laterales', None, 550),
+    ('Kit de seguridad', 'Matafuegos, balizas y botiquín', 90),
+    ('Rastreo satelital', 'Equipo de rastreo con un año de servicio', 500),
+]
+
+NOMBRES = [
+    'Juan', 'María', 'Carlos', 'Lucía', 'Martín', 'Sofía', 'Diego', 'Valentina', 'Pablo', 'Camila',
+    'Javier', 'Florencia', 'Nicolás', 'Agustina', 'Matías', 'Julieta', 'Federico', 'Paula', 'Gonzalo', 'Ana',
+]
+
+APELLIDOS = [
+    'González', 'Rodríguez', 'Gómez', 'Fernández', 'López', 'Díaz', 'Martínez', 'Pérez', 'García', 'Sánchez',
+    'Romero', 'Sosa', 'Álvarez', 'Torres', 'Ruiz', 'Ramírez', 'Flores', 'Acosta', 'Benítez', 'Medina',
+    'Herrera', 'Suárez', 'Aguirre', 'Giménez', 'Gutiérrez', 'Pereyra', 'Rojas', 'Molina', 'Castro', 'Ortiz',
+]
+
+CALLES = ['San Martín', 'Belgrano', 'Rivadavia', 'Sarmiento', 'Mitre', 'Moreno', 'Urquiza', 'Alem', 'Colón', 'Güemes']
+
+ANIOS = [2021, 2022, 2023, 2024, 2025]
+
+# Alfabeto válido de un VIN (sin I, O ni Q) y transliteración ISO 3779
+ALFABETO_VIN = 'ABCDEFGHJKLMNPRSTUVWXYZ0123456789'
+_VALORES_VIN = dict(zip('ABCDEFGHJKLMNPRSTUVWXYZ', [1, 2, 3, 4, 5, 6, 7, 8, 1, 2, 3, 4, 5, 7, 9, 2, 3, 4, 5, 6, 7, 8, 9]))
+_VALORES_VIN.update({str(d): d for d in range(10)})
+_PESOS_VIN = [8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2]
+_ANIO_VIN = {2021: 'M', 2022: 'N', 2023: 'P', 2024: 'R', 2025: 'S'}
+MAX_VEHICULOS = len(ALFABETO_VIN) * 1_000_000
+
+
+def digito_verificador(vin):
+    """Dígito verificador (posición 9) de un VIN de 17 caracteres"""
+    resto = sum(_VALORES_VIN[c] * peso for c, peso in zip(vin, _PESOS_VIN)) % 11
+    return 'X' if resto == 10 else str(resto)
+
+
+def generar_vin(wmi, vds, anio, numero):
+    """VIN único por `numero`: planta y serie codifican el número secuencial"""
+    planta = ALFABETO_VIN[numero // 1_000_000]
+    vin = f'{wmi}{vds}0{_ANIO_VIN[anio]}{planta}{numero % 1_000_000:06d}'
+    return vin[:8] + digito_verificador(vin) + vin[9:]
+
+
+@dataclass
+class ResultadoGeneracion:
+    filas: Counter = field(default_factory=Counter)
+    segundos: float = 0.0
+
+    @property
+    def total(self):
+        return sum(self.filas.values())
+
+    @property
+    def filas_por_segundo(self):
+        return self.total / self.segundos if self.segundos else 0.0
+
+
+class GeneradorDatos:
+    """
+    Genera el dataset en memoria por lotes y lo vuelca con bulk_create.
+
+    Cada vehículo recibe un destino (libre, cotizado, reservado, vendido,
+    deshabilitado o eliminado) y en el mismo lote se insertan las filas
+    que lo explican, de modo que el estado del inventario siempre coincide
+    con sus reservas y ventas.
+    """
+
+    def __init__(self, semilla=42, lote=LOTE, clave='password123', ahora=None, progreso=None):
+        self.rnd = random.Random(semilla)
+        self.lote = lote
+        self.ahora = ahora or timezone.now()
+        self.progreso = progreso
+        self.resultado = ResultadoGeneracion()
+        self.hash_clave = make_password(clave, salt=f'flycar{semilla}')
+        self.nro_pago = 0
+        self.ahora_ms = int(self.ahora.timestamp() * 1000)
+        self.secuencia = 0
+        self.pendientes = {}
+        self.con_cotizacion_valida = set()
+
+    def uuid(self):
+        return uuid.UUID(int=self.rnd.getrandbits(128), version=4)
+
+    def uuid7(self):
+        """Como el default de las tablas de alta inserción, pero reproducible"""
+        self.secuencia += 1
+        return identificadores.construir(self.ahora_ms, self.secuencia, self.rnd.getrandbits(32))
+
+    # ---------- volcado por lotes ----------
+
+    # Orden de inserción: padres antes que hijos
+    ORDEN = [
+        Usuario, Cliente, Vendedor, Vehiculo, Cotizacion, CotizacionVehiculo,
+        CotizacionAccesorio, Pago, Reserva, Venta,
+    ]
+
+    def agregar(self, objeto):
+        self.pendientes.setdefault(type(objeto), []).append(objeto)
+        if len(self.pendientes[type(objeto)]) >= self.lote:
+            self.volcar()
+
+    def volcar(self):
+        with transaction.atomic():
+            for modelo in self.ORDEN:
+                objetos = self.pendientes.pop(modelo, [])
+                if objetos:
+                    modelo.objects.bulk_create(objetos, batch_size=self.lote)
+                    self.contar(modelo, len(objetos))
+                if modelo is Vehiculo and objetos:
+                    # El catálogo se arma con los objetos en memoria, sin releer vehículos
+                    VehiculoCatalogo.objects.bulk_create(
+                        [VehiculoCatalogo(**catalogo.campos_catalogo(v)) for v in objetos],
+                        batch_size=self.lote,
+                    )
+                    self.contar(VehiculoCatalogo, len(objetos))
+
+    def contar(self, modelo, cantidad):
+        self.resultado.filas[modelo._meta.db_table] += cantidad
+        if self.progreso:
+            self.progreso(modelo._meta.db_table, self.resultado.filas[modelo._meta.db_table])
+
+    # ---------- catálogo ----------
+
+    def generar_catalogo(self):
+        marcas, self.modelos = [], []
+        for nombre, (wmi, base, modelos) in MARCAS.items():
+            marca = Marca(id=self.uuid(), nombre=nombre)
+            marcas.append(marca)
+            for i, nombre_modelo in enumerate(modelos):
+                modelo = Modelo(id=self.uuid(), nombre=nombre_modelo, marca=marca)
+                # Atributos auxiliares (no se guardan): prefijo del VIN y precio de referencia
+                letras = ''.join(c for c in nombre_modelo.upper() if c in ALFABETO_VIN)[:2]
+                modelo.wmi = wmi
+                modelo.vds = f'{letras:A<2}{i:03d}'
+                modelo.precio_base = base * self.rnd.uniform(0.8, 1.6)
+                self.modelos.append(modelo)
+        Marca.objects.bulk_create(marcas)
+        self.contar(Marca, len(marcas))
+        Modelo.objects.bulk_create(self.modelos)
+        self.contar(Modelo, len(self.modelos))
+
+        # Ventanas superpuestas: vencidas, vigentes (varias a la vez) y futuras
+        self.ofertas = []
+        for desde, dias in [(-60, 30), (-20, 40), (-10, 15), (-5, 60), (-1, 10), (7, 30), (20, 45)]:
+            inicio = self.ahora + timedelta(days=desde, hours=self.rnd.randint(0, 23))
+            self.ofertas.append(Oferta(
+                id=self.uuid(),
+                descuento=Decimal(self.rnd.choice([5, 7, 10, 12, 15, 20])),
+                fecha_inicio=inicio,
+                fecha_fin=inicio + timedelta(days=dias),
+                descripcion=f'Promoción {len(self.ofertas) + 1}',
+            ))
+        Oferta.objects.bulk_create(self.ofertas)
+        self.contar(Oferta, len(self.ofertas))
+
+        self.accesorios = [
+            Accesorio(
+                id=self.uuid(), nombre=nombre, descripcion=descripcion, stock=self.rnd.randint(50, 5000),
+                oferta=self.rnd.choice(self.ofertas) if self.rnd.random() < 0.25 else None,
+            )
+            for nombre, descripcion, _ in ACCESORIOS
+        ]
+        Accesorio.objects.bulk_create(self.accesorios)
+        self.contar(Accesorio, len(self.accesorios))
+
+        # Precio por modelo: escala con el precio del vehículo; no todos los modelos admiten todo
+        self.precios = {}
+        filas = []
+        for modelo in self.modelos:
+            factor = modelo.precio_base / 28000
+            for accesorio, (_, _, base) in zip(self.accesorios, ACCESORIOS):
+                if self.rnd.random() < 0.15:
+                    continue
+                precio = Decimal(round(base * factor * self.rnd.uniform(0.9, 1.1), 2)).quantize(Decimal('0.01'))
+                self.precios[(modelo.id, accesorio.id)] = precio
+                filas.append(ModeloAccesorio(id=self.uuid(), modelo=modelo, accesorio=accesorio, precio=precio))
+        ModeloAccesorio.objects.bulk_create(filas, batch_size=self.lote)
+        self.contar(ModeloAccesorio, len(filas))
+        versiones.invalidar('precios')
+
+    # ---------- personas ----------
+
+    def generar_personas(self, clientes, vendedores):
+        self.clientes = []
+        for i in range(clientes):
+            usuario = Usuario(
+                id=self.uuid(), email=f'cliente{i}@flycar.test', tipo_usuario='CLIENTE', password=self.hash_clave
+            )
+            self.agregar(usuario)
+            cliente = Cliente(
+                id=self.uuid(), usuario=usuario, dni=f'{10_000_000 + i:08d}',
+                nombre=self.rnd.choice(NOMBRES), apellido=self.rnd.choice(APELLIDOS),
+                fecha_nacimiento=date(1950, 1, 1) + timedelta(days=self.rnd.randint(0, 55 * 365)),
+                direccion=f'{self.rnd.choice(CALLES)} {self.rnd.randint(1, 4000)}', email=usuario.email,
+            )
+            self.clientes.append(cliente.id)
+            self.agregar(cliente)
+
+        self.vendedores = []
+        for i in range(vendedores):
+            usuario = Usuario(
+                id=self.uuid(), email=f'vendedor{i}@flycar.test', tipo_usuario='VENDEDOR', password=self.hash_clave
+            )
+            self.agregar(usuario)
+            vendedor = Vendedor(
+                id=self.uuid(), usuario=usuario, dni=f'{90_000_000 + i:08d}',
+                nombre=self.rnd.choice(NOMBRES), apellido=self.rnd.choice(APELLIDOS),
+            )
+            self.vendedores.append(vendedor.id)
+            self.agregar(vendedor)
+        self.volcar()
+        # Marcas, modelos y clientes se cargaron sin señales
+        autocompletado.invalidar()
+
+    # ---------- inventario e historia comercial ----------
+
+    def oferta_vigente(self, oferta):
+        return oferta is not None and oferta.esta_vigente(self.ahora)
+
+    def precio_vehiculo(self, vehiculo):
+        precio = vehiculo.precio
+        if self.oferta_vigente(vehiculo.oferta):
+            precio -= precio * (vehiculo.oferta.descuento / 100)
+        return precio.quantize(Decimal('0.01'))
+
+    def precio_accesorio(self, modelo_id, accesorio):
+        precio = self.precios[(modelo_id, accesorio.id)]
+        if self.oferta_vigente(accesorio.oferta):
+            precio -= precio * (accesorio.oferta.descuento / 100)
+        return precio.quantize(Decimal('0.01'))
+
+    def pago(self, importe):
+        self.nro_pago += 1
+        pago = Pago(id=self.uuid7(), nro_pago=f'GEN-{self.nro_pago:010d}', importe=importe)
+        self.agregar(pago)
+        return pago
+
+    def cotizacion(self, vehiculo, valida, vencimiento):
+        """Cotización de un vehículo con 0 a 2 accesorios, con precios del momento"""
+        cotizacion = Cotizacion(
+            id=self.uuid7(), cliente_id=self.rnd.choice(self.clientes), valida=valida,
+            fecha_hora_vencimiento=vencimiento, importe_final=Decimal('0.00'),
+        )
+        linea = CotizacionVehiculo(
+            id=self.uuid7(), cotizacion=cotizacion, vehiculo=vehiculo, precio_unitario=self.precio_vehiculo(vehiculo)
+        )
+        total = linea.precio_unitario
+        accesorios = [a for a in self.accesorios if (vehiculo.modelo_id, a.id) in self.precios]
+        lineas_accesorio = []
+        for accesorio in self.rnd.sample(accesorios, min(len(accesorios), self.rnd.randint(0, 2))):
+            precio = self.precio_accesorio(vehiculo.modelo_id, accesorio)
+            total += precio
+            lineas_accesorio.append(CotizacionAccesorio(
+                id=self.uuid7(), cotizacion=cotizacion, cotizacion_vehiculo=linea,
+                accesorio=accesorio, precio_unitario=precio,
+            ))
+        cotizacion.importe_final = total
+        self.agregar(cotizacion)
+        self.agregar(linea)
+        for fila in lineas_accesorio:
+            self.agregar(fila)
+        return cotizacion
+
+    def cotizacion_libre(self, vehiculo):
+        """Cotización sin reserva: como en `generar`, a lo sumo una vigente por cliente"""
+        horas = self.rnd.randint(-24 * 30, 48)
+        cotizacion = self.cotizacion(vehiculo, True, self.ahora + timedelta(hours=horas))
+        if cotizacion.cliente_id in self.con_cotizacion_valida:
+            cotizacion.valida = False
+        else:
+            self.con_cotizacion_valida.add(cotizacion.cliente_id)
+        return cotizacion
+
+    def reservar(self, vehiculo, estado):
+        vencimiento = self.ahora + timedelta(days=self.rnd.randint(-10, 7), hours=self.rnd.randint(0, 23))
+        if estado == 'ACTIVA':
+            # Algunas ya vencidas quedan ACTIVA hasta el próximo barrido
+            vencimiento = self.ahora + timedelta(hours=self.rnd.randint(-12, 7 * 24))
+        cotizacion = self.cotizacion(vehiculo, estado in ('ACTIVA', 'COMPLETADA'), vencimiento)
+        importe = (cotizacion.importe_final * Decimal('0.05')).quantize(Decimal('0.01'))
+        self.agregar(Reserva(
+            id=self.uuid7(), nro_reserva=str(self.uuid()), cotizacion=cotizacion, pago=self.pago(importe),
+            importe=importe, estado=estado, fecha_hora_vencimiento=vencimiento,
+        ))
+        return cotizacion, importe
+
+    def vender(self, vehiculo):
+        if self.rnd.random() < 0.5:
+            cotizacion, senia = self.reservar(vehiculo, 'COMPLETADA')
+        else:
+            cotizacion = self.cotizacion(vehiculo, True, self.ahora + timedelta(hours=self.rnd.randint(-24 * 60, 48)))
+            senia = Decimal('0.00')
+        self.agregar(Venta(
+            id=self.uuid7(), nro_venta=str(self.uuid()), cotizacion=cotizacion,
+            pago=self.pago(cotizacion.importe_final - senia), vendedor_id=self.rnd.choice(self.vendedores),
+            concretada=True, comision=(cotizacion.importe_final * Decimal('0.10')).quantize(Decimal('0.01')),
+        ))
+
+    # Destino de cada vehículo: (probabilidad acumulada, estado, acción)
+    DESTINOS = [
+        (0.03, 'DISPONIBLE', 'eliminado'),
+        (0.06, 'DESHABILITADO', None),
+        (0.14, 'VENDIDO', 'vender'),
+        (0.20, 'RESERVADO', 'reserva_activa'),
+        (0.25, 'DISPONIBLE', 'reserva_terminada'),
+        (0.45, 'DISPONIBLE', 'cotizacion_libre'),
+        (1.00, 'DISPONIBLE', None),
+    ]
+
+    def generar_vehiculos(self, cantidad):
+        if cantidad > MAX_VEHICULOS:
+            raise ValueError(f'Como máximo {MAX_VEHICULOS} vehículos por dataset')
+        for numero in range(cantidad):
+            modelo = self.rnd.choice(self.modelos)
+            anio = self.rnd.choice(ANIOS)
+            sorteo = self.rnd.random()
+            estado, accion = next((e, a) for limite, e, a in self.DESTINOS if sorteo < limite)
+            precio = Decimal(round(modelo.precio_base * (1 + (anio - 2021) * 0.06) * self.rnd.uniform(0.95, 1.15), 2))
+            vehiculo = Vehiculo(
+                id=self.uuid(),
+                nro_chasis=generar_vin(modelo.wmi, modelo.vds, anio, numero),
+                precio=precio.quantize(Decimal('0.01')),
+                descripcion=f'{modelo.marca.nombre} {modelo.nombre} {anio} {self.rnd.choice(VERSIONES)}',
+                anio=anio,
+                modelo=modelo,
+                oferta=self.rnd.choice(self.ofertas) if self.rnd.random() < 0.2 else None,
+                estado=estado,
+                eliminado=accion == 'eliminado',
+            )
+            self.agregar(vehiculo)
+            if accion == 'vender':
+                self.vender(vehiculo)
+            elif accion == 'reserva_activa':
+                self.reservar(vehiculo, 'ACTIVA')
+            elif accion == 'reserva_terminada':
+                self.reservar(vehiculo, self.rnd.choice(['VENCIDA', 'CANCELADA']))
+            elif accion == 'cotizacion_libre':
+                self.cotizacion_libre(vehiculo)
+        self.volcar()
+        # Los bulk_create no disparan señales: el índice de facetas se reconstruye
+        facetas.invalidar()
+        condicional.invalidar()
+        instantanea.invalidar()
+
+
+def generar_datos(vehiculos=1000, clientes=None, vendedores=None, semilla=42, lote=LOTE,
+                  clave='password123', progreso=None):
+    """
+    Genera un dataset completo y devuelve un ResultadoGeneracion.
+
+    Por defecto crea un cliente cada 10 vehículos y un vendedor cada 500
+    clientes (mínimo 5). Todos los usuarios comparten la contraseña `clave`.
+    """
+    if clientes is None:
+        clientes = max(1, vehiculos // 10)
+    if vendedores is None:
+        vendedores = max(5, clientes // 500)
+
+    inicio = time.perf_counter()
+    generador = GeneradorDatos(semilla=semilla, lote=lote, clave=clave, progreso=progreso)
+    generador.generar_catalogo()
+    generador.generar_personas(clientes, vendedores)
+    generador.generar_vehiculos(vehiculos)
+    generador.resultado.segundos = time.perf_counter() - inicio
+    return generador.resultado
@@ -0,0 +1,59 @@
+"""
+UUIDv7 (RFC 9562) para las claves primarias de las tablas de alta inserción
+
+Los 48 bits más altos son el timestamp Unix en milisegundos, así que las
+claves nuevas se insertan al final del índice de la clave primaria en
+lugar de dispersarse por todo el B-tree como las uuid4, y ordenar por id
+equivale a ordenar por fecha de creación. Dentro de un mismo milisegundo
+un contador de 42 bits (rand_a + parte alta de rand_b, método 1 del RFC)
+mantiene el orden de generación del proceso.
+"""
+
+import secrets
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+BITS_CONTADOR = 42
+MAX_CONTADOR = (1 << BITS_CONTADOR) - 1
+
+_lock = threading.Lock()
+_ultimo_ms = 0
+_contador = 0
+
+
+def construir(milisegundos, contador, aleatorio):
+    """UUIDv7 a partir del timestamp (ms), el contador (42 bits) y 32 bits aleatorios"""
+    valor = (milisegundos & 0xFFFF_FFFF_FFFF) << 80
+    valor |= 0x7 << 76
+    valor |= (contador >> 30) << 64
+    valor |= 0b10 << 62
+    valor |= (contador & 0x3FFF_FFFF) << 32
+    valor |= aleatorio & 0xFFFF_FFFF
+    return uuid.UUID(int=valor)
+
+
+def uuid7():
+    """UUIDv7 nuevo, estrictamente creciente dentro del proceso aunque el reloj retroceda"""
+    global _ultimo_ms, _contador
+    ahora = time.time_ns() // 1_000_000
+    with _lock:
+        if ahora > _ultimo_ms:
+            _ultimo_ms = ahora
+            # Semilla aleatoria con el bit alto en cero: deja margen para incrementar
+            _contador = secrets.randbits(BITS_CONTADOR - 1)
+        elif _contador < MAX_CONTADOR:
+            _contador += 1
+        else:
+            _ultimo_ms += 1
+            _contador = secrets.randbits(BITS_CONTADOR - 1)
+        milisegundos, contador = _ultimo_ms, _contador
+    return construir(milisegundos, contador, secrets.randbits(32))
+
+
+def fecha_de(identificador):
+    """Momento de creación codificado en un UUIDv7 (None para otras versiones)"""
+    if identificador.version != 7:
+        return None
+    return datetime.fromtimestamp((identificador.int >> 80) / 1000, tz=timezone.utc)
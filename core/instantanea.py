@@ -0,0 +1,700 @@
+"""
+Instantánea del catálogo compartida entre procesos (archivo mapeado en memoria)
+
+Un único archivo binario de solo lectura con registros de ancho fijo y una
+tabla de textos deduplicada:
+
+    cabecera     MAGIA, versión, fecha de generación y (offset, cantidad) de cada sección
+    vehiculos    filas no eliminadas de catalogo_vehiculos en orden (created_at, id)
+    por_id       (id, número de vehículo) ordenado por id, para el detalle
+    estado:*     números de vehículo de cada estado, en el mismo orden que `vehiculos`
+    ofertas      todas las ofertas, ordenadas por id
+    accesorios   todos los accesorios (también los eliminados, como `cotizar`)
+    precios      (modelo, accesorio, precio) ordenado por (modelo, accesorio)
+    textos       UTF-8; cada texto se referencia con (offset, largo), largo -1 es None
+
+`escribir()` lo regenera en un archivo temporal y lo publica con
+`os.replace`, así que cada proceso ve el archivo viejo o el nuevo, nunca uno
+a medio escribir. Cada proceso lo abre con mmap (las páginas se comparten
+por el cache del sistema operativo) y lo vuelve a abrir cuando cambia el
+inodo; los lectores en curso siguen con el mapeo anterior hasta soltarlo.
+Las filas se decodifican de a una, solo las de la página pedida.
+
+La cabecera guarda la versión 'instantanea' (core/versiones.py) leída
+antes de generarla, que las señales incrementan con cada cambio de
+modelos, marcas, precios u ofertas; con otra versión la instantánea no se
+usa. Los cambios de vehículos no la vencen: se publican en un registro de
+cambios (como el de core/facetas.py) y cada proceso superpone esas filas,
+leídas de la base, sobre las de la instantánea. El escritor (hilo
+periódico con FLYCAR_INSTANTANEA_INTERVALO o `manage.py
+escribir_instantanea`) la regenera cuando está vencida o tiene cambios
+superpuestos, así varias escrituras seguidas cuestan una sola
+regeneración. Con más de MAX_SUPERPUESTOS vehículos cambiados se vuelve a
+la base hasta la próxima.
+"""
+
+import bisect
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.http import Http404
+from django.utils import timezone
+from rest_framework.response import Response
+
+from . import versiones
+from .models import Accesorio, ModeloAccesorio, Oferta, Vehiculo, VehiculoCatalogo
+from .precios import LineaAccesorio, LineaVehiculo, ResultadoCotizacion
+
+logger = logging.getLogger(__name__)
+
+CLAVE = 'instantanea'
+MAGIA = b'FLYCAT02'
+ESTADOS = tuple(codigo for codigo, _ in Vehiculo.ESTADO_CHOICES)
+SECCIONES = ('vehiculos', 'por_id', 'ofertas', 'accesorios', 'precios', 'textos') + tuple(
+    f'estado:{estado}' for estado in ESTADOS
+)
+
+# Registro de cambios de vehículos: f'{CAMBIOS}{version}:{n}' son los ids de la entrada n
+CAMBIOS = 'flycar:instantanea:cambios:'
+# Segundos que se guarda cada entrada; una instantánea más vieja no se usa
+DURACION_CAMBIOS = 24 * 3600
+# Vehículos cambiados que se superponen como mucho antes de volver a la base
+MAX_SUPERPUESTOS = 1000
+
+# MAGIA, versión, generada (ns) y primera entrada del registro de cambios no incluida
+CABECERA = struct.Struct('<8sqqq')
+SECCION = struct.Struct('<QQ')
+# id, modelo_id, created_at, updated_at (µs), precio (centésimos), precio_con_oferta
+# (millonésimos), oferta (índice o -1), año, estado y (offset, largo) de nro_chasis,
+# descripcion, imagen, modelo_nombre y marca_nombre
+VEHICULO = struct.Struct('<16s16sqqqqiiB3x' + 'Ii' * 5)
+POR_ID = struct.Struct('<16sI')
+OFERTA = struct.Struct('<16siqq')
+ACCESORIO = struct.Struct('<16siIi')
+PRECIO = struct.Struct('<16s16sq')
+NUMERO = struct.Struct('<I')
+
+EPOCA = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSEGUNDO = timedelta(microseconds=1)
+
+CAMPOS_VEHICULO = [
+    'vehiculo_id', 'modelo_id', 'created_at', 'updated_at', 'precio', 'precio_con_oferta', 'oferta_id',
+    'anio', 'estado', 'nro_chasis', 'descripcion', 'imagen', 'modelo_nombre', 'marca_nombre',
+]
+
+
+def microsegundos(fecha):
+    return (fecha - EPOCA) // MICROSEGUNDO
+
+
+def fecha(micros):
+    return EPOCA + micros * MICROSEGUNDO
+
+
+def clave_orden(creado, vehiculo_id):
+    """Clave de (created_at, id) en el orden del listado; acepta el cursor naive de KeysetPagination"""
+    if timezone.is_naive(creado):
+        creado = timezone.make_aware(creado)
+    return microsegundos(creado), vehiculo_id.bytes
+
+
+def escalado(valor, decimales):
+    return int(valor.scaleb(decimales).to_integral_value())
+
+
+class VehiculoInstantanea:
+    """Fila del catálogo leída de la instantánea, con la interfaz de VehiculoCatalogo que usan el serializer y `cotizar`"""
+
+    __slots__ = (
+        'vehiculo_id', 'modelo_id', 'created_at', 'updated_at', 'precio', 'precio_con_oferta', 'oferta_id',
+        'oferta_inicio', 'oferta_fin', 'descuento', 'anio', 'estado', 'nro_chasis', 'descripcion', 'imagen',
+        'modelo_nombre', 'marca_nombre',
+    )
+    eliminado = False
+
+    get_precio_con_oferta = VehiculoCatalogo.get_precio_con_oferta
+
+    @property
+    def pk(self):
+        return self.vehiculo_id
+
+    @property
+    def id(self):
+        return self.vehiculo_id
+
+    @property
+    def modelo(self):
+        # Como str(Modelo) en ResultadoCotizacion.detalle
+        return f'{self.marca_nombre} {self.modelo_nombre}'
+
+
+@dataclass(frozen=True)
+class AccesorioInstantanea:
+    id: uuid.UUID
+    nombre: str
+    oferta: int
+
+
+class _Claves:
+    """Secuencia perezosa de claves de una sección, para usar con bisect"""
+
+    def __init__(self, cantidad, clave):
+        self.cantidad = cantidad
+        self.clave = clave
+
+    def __len__(self):
+        return self.cantidad
+
+    def __getitem__(self, indice):
+        return self.clave(indice)
+
+
+class Instantanea:
+    """Lector de un archivo de instantánea mapeado en memoria"""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        with open(ruta, 'rb') as archivo:
+            estado = os.fstat(archivo.fileno())
+            self.mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        self.identidad = (estado.st_dev, estado.st_ino, estado.st_mtime_ns, estado.st_size)
+        magia, self.version, self.generada, self.cambios = CABECERA.unpack_from(self.mapa, 0)
+        if magia != MAGIA:
+            raise ValueError(f'{ruta} no es una instantánea del catálogo')
+        self.secciones = {
+            nombre: SECCION.unpack_from(self.mapa, CABECERA.size + i * SECCION.size)
+            for i, nombre in enumerate(SECCIONES)
+        }
+        self.vista = memoryview(self.mapa)
+        # (próxima entrada del registro, ids de los vehículos cambiados): se reemplaza entera
+        self.superpuestos = (self.cambios, frozenset())
+
+    # ---------- vehículos cambiados ----------
+
+    @property
+    def modificados(self):
+        """Ids de los vehículos cambiados después de generarla, que hay que leer de la base"""
+        return self.superpuestos[1]
+
+    def sincronizar(self):
+        """Agrega las entradas nuevas del registro de cambios; False si ya no conviene usarla"""
+        if time.time_ns() - self.generada > DURACION_CAMBIOS * 10 ** 9:
+            return False
+        numero, modificados = self.superpuestos
+        nuevos = []
+        while (entrada := cache.get(_entrada(self.version, numero))) is not None:
+            nuevos += entrada
+            numero += 1
+        if nuevos:
+            # Releer otra vez las mismas entradas no cambia el resultado: no hace falta excluir otros hilos
+            modificados = modificados.union(nuevos)
+            self.superpuestos = (numero, modificados)
+        return len(modificados) <= MAX_SUPERPUESTOS
+
+    # ---------- decodificación ----------
+
+    def _texto(self, offset, largo):
+        if largo < 0:
+            return None
+        inicio = self.secciones['textos'][0] + offset
+        return str(self.vista[inicio:inicio + largo], 'utf-8')
+
+    def _oferta(self, indice):
+        return OFERTA.unpack_from(self.mapa, self.secciones['ofertas'][0] + indice * OFERTA.size)
+
+    def _clave_vehiculo(self, numero):
+        offset = self.secciones['vehiculos'][0] + numero * VEHICULO.size
+        return struct.unpack_from('<q', self.mapa, offset + 32)[0], self.mapa[offset:offset + 16]
+
+    def vehiculo_numero(self, numero):
+        campos = VEHICULO.unpack_from(self.mapa, self.secciones['vehiculos'][0] + numero * VEHICULO.size)
+        fila = VehiculoInstantanea()
+        fila.vehiculo_id = uuid.UUID(bytes=campos[0])
+        fila.modelo_id = uuid.UUID(bytes=campos[1])
+        fila.created_at = fecha(campos[2])
+        fila.updated_at = fecha(campos[3])
+        fila.precio = Decimal(campos[4]).scaleb(-2)
+        fila.precio_con_oferta = Decimal(campos[5]).scaleb(-6)
+        if campos[6] < 0:
+            fila.oferta_id = fila.oferta_inicio = fila.oferta_fin = fila.descuento = None
+        else:
+            oferta_id, descuento, inicio, fin = self._oferta(campos[6])
+            fila.oferta_id = uuid.UUID(bytes=oferta_id)
+            fila.descuento = Decimal(descuento).scaleb(-2)
+            fila.oferta_inicio, fila.oferta_fin = fecha(inicio), fecha(fin)
+        fila.anio = campos[7]
+        fila.estado = ESTADOS[campos[8]]
+        (fila.nro_chasis, fila.descripcion, fila.imagen, fila.modelo_nombre,
+         fila.marca_nombre) = (self._texto(campos[i], campos[i + 1]) for i in range(9, 19, 2))
+        return fila
+
+    # ---------- búsquedas ----------
+
+    def _buscar(self, seccion, estructura, clave, largo):
+        """Índice del registro de `seccion` cuyos primeros `largo` bytes son `clave`, o None"""
+        offset, cantidad = self.secciones[seccion]
+        claves = _Claves(cantidad, lambda i: self.mapa[offset + i * estructura.size:offset + i * estructura.size + largo])
+        indice = bisect.bisect_left(claves, clave)
+        if indice < cantidad and claves[indice] == clave:
+            return indice
+        return None
+
+    def vehiculo(self, vehiculo_id):
+        """Vehículo no eliminado con ese id, o None"""
+        indice = self._buscar('por_id', POR_ID, vehiculo_id.bytes, 16)
+        if indice is None:
+            return None
+        _, numero = POR_ID.unpack_from(self.mapa, self.secciones['por_id'][0] + indice * POR_ID.size)
+        return self.vehiculo_numero(numero)
+
+    def accesorio(self, accesorio_id):
+        indice = self._buscar('accesorios', ACCESORIO, accesorio_id.bytes, 16)
+        if indice is None:
+            return None
+        _, oferta, offset, largo = ACCESORIO.unpack_from(
+            self.mapa, self.secciones['accesorios'][0] + indice * ACCESORIO.size
+        )
+        return AccesorioInstantanea(accesorio_id, self._texto(offset, largo), oferta)
+
+    def precio_accesorio(self, modelo_id, accesorio):
+        """Como MatrizPrecios.precio_accesorio, pero resolviendo la oferta del accesorio en el momento"""
+        indice = self._buscar('precios', PRECIO, modelo_id.bytes + accesorio.id.bytes, 32)
+        if indice is None:
+            return Decimal('0.00')
+        precio = Decimal(PRECIO.unpack_from(self.mapa, self.secciones['precios'][0] + indice * PRECIO.size)[2]).scaleb(-2)
+        return self._aplicar_oferta(precio, accesorio.oferta)
+
+    def _aplicar_oferta(self, precio, oferta, ahora=None):
+        if oferta < 0:
+            return precio
+        _, descuento, inicio, fin = self._oferta(oferta)
+        if inicio <= microsegundos(ahora or timezone.now()) <= fin:
+            return precio - precio * (Decimal(descuento).scaleb(-2) / 100)
+        return precio
+
+    # ---------- listado ----------
+
+    def _orden(self, estado):
+        """(cantidad, número de vehículo de la posición i) del listado, filtrado por estado"""
+        if estado is None:
+            return self.secciones['vehiculos'][1], lambda i: i
+        if estado not in ESTADOS:
+            return 0, None
+        offset, cantidad = self.secciones[f'estado:{estado}']
+        return cantidad, lambda i: NUMERO.unpack_from(self.mapa, offset + i * NUMERO.size)[0]
+
+    def cantidad(self, estado=None):
+        return self._orden(estado)[0]
+
+    def pagina(self, estado, cursor, descendente, limite, excluir=frozenset()):
+        """
+        Hasta `limite` vehículos en orden (created_at, id), descendente o no,
+        estrictamente después de `cursor` ((created_at, id) ya convertidos por KeysetPagination),
+        salteando los ids (en bytes) de `excluir`
+        """
+        cantidad, numero = self._orden(estado)
+        if not cantidad:
+            return []
+        claves = _Claves(cantidad, lambda i: self._clave_vehiculo(numero(i)))
+        if cursor is None:
+            posicion = cantidad - 1 if descendente else 0
+        else:
+            clave = clave_orden(*cursor)
+            posicion = bisect.bisect_left(claves, clave) - 1 if descendente else bisect.bisect_right(claves, clave)
+        paso = -1 if descendente else 1
+        filas = []
+        while 0 <= posicion < cantidad and len(filas) < limite:
+            if not excluir or self._clave_vehiculo(numero(posicion))[1] not in excluir:
+                filas.append(self.vehiculo_numero(numero(posicion)))
+            posicion += paso
+        return filas
+
+    # ---------- precios ----------
+
+    def cotizar(self, items):
+        """
+        Igual que core.precios.cotizar pero sin consultar la base. Devuelve None
+        si falta algún vehículo o accesorio, o si algún vehículo cambió después
+        de generarla, para que decida la base (404 o vehículo eliminado, que la
+        instantánea no incluye).
+        """
+        ahora = timezone.now()
+        vehiculos = {}
+        modificados = self.modificados
+        for vehiculo_id in {item['vehiculo_id'] for item in items}:
+            if vehiculo_id in modificados:
+                return None
+            vehiculos[vehiculo_id] = self.vehiculo(vehiculo_id)
+            if vehiculos[vehiculo_id] is None:
+                return None
+        accesorios = {}
+        for accesorio_id in {acc_id for item in items for acc_id in item.get('accesorios', [])}:
+            accesorios[accesorio_id] = self.accesorio(accesorio_id)
+            if accesorios[accesorio_id] is None:
+                return None
+
+        total = Decimal('0.00')
+        lineas = []
+        for item in items:
+            vehiculo = vehiculos[item['vehiculo_id']]
+            precio = vehiculo.precio
+            if vehiculo.oferta_id is not None and vehiculo.oferta_inicio <= ahora <= vehiculo.oferta_fin:
+                precio = precio - precio * (vehiculo.descuento / 100)
+            linea = LineaVehiculo(vehiculo, precio)
+            total += linea.precio
+            for acc_id in item.get('accesorios', []):
+                precio = self.precio_accesorio(vehiculo.modelo_id, accesorios[acc_id])
+                total += precio
+                linea.accesorios.append(LineaAccesorio(accesorios[acc_id], precio))
+            lineas.append(linea)
+        return ResultadoCotizacion(lineas, total)
+
+
+# ==================== ESCRITURA ====================
+
+class _Textos:
+    """Tabla de textos deduplicada"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.offsets = {}
+
+    def agregar(self, texto):
+        if texto is None:
+            return 0, -1
+        codificado = texto.encode('utf-8')
+        offset = self.offsets.get(codificado)
+        if offset is None:
+            offset = self.offsets[codificado] = len(self.buffer)
+            self.buffer += codificado
+        return offset, len(codificado)
+
+
+@dataclass
+class ResultadoEscritura:
+    version: int
+    vehiculos: int
+    bytes: int
+    segundos: float
+
+
+def _empaquetar(estructura, filas):
+    buffer = bytearray(estructura.size * len(filas))
+    for i, fila in enumerate(filas):
+        estructura.pack_into(buffer, i * estructura.size, *fila)
+    return buffer
+
+
+def escribir(ruta=None):
+    """Genera la instantánea desde la base y la publica atómicamente en `ruta`"""
+    ruta = ruta or settings.FLYCAR_INSTANTANEA_RUTA
+    inicio = time.perf_counter()
+    # Antes de leer: un cambio durante la escritura deja la instantánea ya vencida,
+    # y las entradas del registro desde `cambios` se superponen aunque ya estén incluidas
+    version = versiones.version(CLAVE)
+    cambios = _proxima_entrada(version)
+    with transaction.atomic():
+        ofertas = sorted(
+            Oferta.objects.values_list('id', 'descuento', 'fecha_inicio', 'fecha_fin'), key=lambda o: o[0].bytes
+        )
+        accesorios = sorted(Accesorio.objects.values_list('id', 'oferta_id', 'nombre'), key=lambda a: a[0].bytes)
+        precios = sorted(
+            ModeloAccesorio.objects.values_list('modelo_id', 'accesorio_id', 'precio'),
+            key=lambda p: p[0].bytes + p[1].bytes,
+        )
+        vehiculos = sorted(
+            VehiculoCatalogo.objects.filter(eliminado=False).values_list(*CAMPOS_VEHICULO).iterator(chunk_size=5000),
+            key=lambda v: (microsegundos(v[2]), v[0].bytes),
+        )
+
+    textos = _Textos()
+    indice_oferta = {oferta[0]: i for i, oferta in enumerate(ofertas)}
+    por_estado = {estado: [] for estado in ESTADOS}
+    filas = []
+    for numero, v in enumerate(vehiculos):
+        por_estado.setdefault(v[8], []).append((numero,))
+        filas.append((
+            v[0].bytes, v[1].bytes, microsegundos(v[2]), microsegundos(v[3]), escalado(v[4], 2), escalado(v[5], 6),
+            indice_oferta.get(v[6], -1), v[7], ESTADOS.index(v[8]) if v[8] in ESTADOS else 255,
+            *(parte for texto in v[9:] for parte in textos.agregar(texto)),
+        ))
+    contenido = {
+        'vehiculos': (_empaquetar(VEHICULO, filas), len(filas)),
+        'por_id': (_empaquetar(POR_ID, sorted((v[0].bytes, i) for i, v in enumerate(vehiculos))), len(vehiculos)),
+        'ofertas': (_empaquetar(OFERTA, [
+            (o[0].bytes, escalado(o[1], 2), microsegundos(o[2]), microsegundos(o[3])) for o in ofertas
+        ]), len(ofertas)),
+        'accesorios': (_empaquetar(ACCESORIO, [
+            (a[0].bytes, indice_oferta.get(a[1], -1), *textos.agregar(a[2])) for a in accesorios
+        ]), len(accesorios)),
+        'precios': (_empaquetar(PRECIO, [(p[0].bytes, p[1].bytes, escalado(p[2], 2)) for p in precios]), len(precios)),
+        **{
+            f'estado:{estado}': (_empaquetar(NUMERO, por_estado[estado]), len(por_estado[estado]))
+            for estado in ESTADOS
+        },
+    }
+    contenido['textos'] = (textos.buffer, len(textos.buffer))
+
+    offset = CABECERA.size + SECCION.size * len(SECCIONES)
+    cabecera = bytearray(CABECERA.pack(MAGIA, version, time.time_ns(), cambios))
+    for nombre in SECCIONES:
+        offset += -offset % 8
+        cabecera += SECCION.pack(offset, contenido[nombre][1])
+        offset += len(contenido[nombre][0])
+
+    temporal = f'{ruta}.{os.getpid()}.tmp'
+    with open(temporal, 'wb') as archivo:
+        archivo.write(cabecera)
+        for nombre in SECCIONES:
+            archivo.write(b'\0' * (-archivo.tell() % 8))
+            archivo.write(contenido[nombre][0])
+        archivo.flush()
+        os.fsync(archivo.fileno())
+        tamanio = archivo.tell()
+    os.replace(temporal, ruta)
+    return ResultadoEscritura(version, len(filas), tamanio, time.perf_counter() - inicio)
+
+
+def _bloquear(archivo):
+    """Lock exclusivo sin esperar sobre `archivo`; False si lo tiene otro proceso"""
+    if os.name == 'nt':
+        import msvcrt
+        try:
+            msvcrt.locking(archivo.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+        return True
+    import fcntl
+    try:
+        fcntl.flock(archivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+def _desbloquear(archivo):
+    if os.name == 'nt':
+        import msvcrt
+        archivo.seek(0)
+        msvcrt.locking(archivo.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(archivo, fcntl.LOCK_UN)
+
+
+def actualizar(ruta=None, forzar=False):
+    """
+    Regenera la instantánea si la publicada no tiene la versión actual o
+    tiene vehículos cambiados que superponer. Un lock de archivo evita que
+    varios procesos la escriban a la vez; devuelve None si no hizo falta o
+    si otro proceso la está escribiendo.
+    """
+    ruta = ruta or settings.FLYCAR_INSTANTANEA_RUTA
+    with open(f'{ruta}.lock', 'a') as lock:
+        if not _bloquear(lock):
+            return None
+        try:
+            if not forzar:
+                publicada = abrir(ruta)
+                if (publicada is not None and publicada.version == versiones.version(CLAVE)
+                        and _proxima_entrada(publicada.version) <= publicada.cambios):
+                    return None
+            return escribir(ruta)
+        finally:
+            _desbloquear(lock)
+
+
+def _entrada(version, numero):
+    return f'{CAMBIOS}{version}:{numero}'
+
+
+def _proxima_entrada(version):
+    """Primera entrada libre del registro de `version`, a partir de la pista"""
+    numero = cache.get(f'{CAMBIOS}{version}:ultimo', 0)
+    while cache.get(_entrada(version, numero)) is not None:
+        numero += 1
+    return numero
+
+
+def _aplicar(ids):
+    """Publica `ids` en la próxima entrada libre del registro de la versión vigente"""
+    version = versiones.version(CLAVE)
+    numero = _proxima_entrada(version)
+    # Si otro proceso reclamó esa entrada primero se prueba la siguiente: ninguna publicación pisa a otra
+    while not cache.add(_entrada(version, numero), ids, DURACION_CAMBIOS):
+        numero += 1
+    cache.set(f'{CAMBIOS}{version}:ultimo', numero + 1, None)
+
+
+def vehiculos_modificados(ids):
+    """
+    Publica los vehículos `ids` para que todos los procesos los lean de la
+    base. Ya (lecturas dentro de la transacción) y otra vez al confirmarla,
+    por si el escritor leyó la base entre medio.
+    """
+    ids = list(ids)
+    _aplicar(ids)
+    transaction.on_commit(lambda: _aplicar(ids))
+
+
+def invalidar():
+    """Marca vencida la instantánea publicada (modelos, precios, ofertas y cargas masivas sin señales)"""
+    versiones.invalidar(CLAVE)
+
+
+# ==================== LECTURA ====================
+
+_actual = None
+_actual_lock = threading.Lock()
+
+
+def abrir(ruta=None):
+    """Instantánea publicada en `ruta`, reabierta si el archivo cambió; None si no hay"""
+    global _actual
+    ruta = ruta or settings.FLYCAR_INSTANTANEA_RUTA
+    if not ruta:
+        return None
+    try:
+        estado = os.stat(ruta)
+    except FileNotFoundError:
+        return None
+    identidad = (estado.st_dev, estado.st_ino, estado.st_mtime_ns, estado.st_size)
+    instantanea = _actual
+    if instantanea is None or instantanea.ruta != ruta or instantanea.identidad != identidad:
+        with _actual_lock:
+            instantanea = _actual
+            if instantanea is None or instantanea.ruta != ruta or instantanea.identidad != identidad:
+                try:
+                    instantanea = Instantanea(ruta)
+                except (OSError, ValueError, struct.error):
+                    logger.warning('No se pudo abrir la instantánea %s', ruta, exc_info=True)
+                    return None
+                # Los requests en curso conservan el mapeo anterior hasta terminar
+                _actual = instantanea
+    return instantanea
+
+
+def vigente():
+    """
+    La instantánea publicada si está al día con la versión 'instantanea', con
+    `modificados` sincronizado con el registro de cambios; si no, None
+    """
+    instantanea = abrir()
+    if instantanea is None or instantanea.version != versiones.version(CLAVE) or not instantanea.sincronizar():
+        return None
+    return instantanea
+
+
+class CatalogoInstantaneaMixin:
+    """
+    list y retrieve del catálogo servidos desde la instantánea cuando está al
+    día, con la misma salida que desde la base. Los vehículos cambiados
+    después de generarla se leen de la base (get_queryset) y se intercalan
+    en su lugar. La búsqueda de texto (?q=) sigue yendo a la base. Serializa
+    con `serializar` de core.perfilamiento.SerializacionMedidaMixin.
+    """
+
+    def list(self, request, *args, **kwargs):
+        instantanea = vigente()
+        if (instantanea is None or 'q' in request.query_params or self.paginator is None
+                or self.paginator.get_ordering(self)[0] != 'created_at'):
+            return super().list(request, *args, **kwargs)
+        estado = request.query_params.get('estado') or None
+        modificados = instantanea.modificados
+        excluir = frozenset(vehiculo_id.bytes for vehiculo_id in modificados)
+        superpuestos = list(self.get_queryset().filter(vehiculo_id__in=modificados)) if modificados else []
+
+        def clave(fila):
+            return clave_orden(fila.created_at, fila.vehiculo_id)
+
+        def leer(cursor, descendente, limite):
+            filas = instantanea.pagina(estado, cursor, descendente, limite, excluir)
+            if not superpuestos:
+                return filas
+            extra = superpuestos
+            if cursor is not None:
+                corte = clave_orden(*cursor)
+                extra = [fila for fila in superpuestos if (clave(fila) < corte if descendente else clave(fila) > corte)]
+            return sorted(filas + extra, key=clave, reverse=descendente)[:limite]
+
+        def contar():
+            # Los cambiados cuentan según la base, no según la instantánea
+            anteriores = (instantanea.vehiculo(vehiculo_id) for vehiculo_id in modificados)
+            quitados = sum(1 for fila in anteriores if fila is not None and estado in (None, fila.estado))
+            return instantanea.cantidad(estado) - quitados + len(superpuestos)
+
+        pagina = self.paginator.paginar(leer, contar, request, self, VehiculoCatalogo.objects.all())
+        return self.get_paginated_response(self.serializar(pagina, many=True))
+
+    def retrieve(self, request, *args, **kwargs):
+        instantanea = vigente()
+        if instantanea is None:
+            return super().retrieve(request, *args, **kwargs)
+        try:
+            vehiculo_id = uuid.UUID(str(kwargs[self.lookup_url_kwarg or self.lookup_field]))
+        except ValueError:
+            raise Http404
+        if vehiculo_id in instantanea.modificados:
+            return super().retrieve(request, *args, **kwargs)
+        vehiculo = instantanea.vehiculo(vehiculo_id)
+        estado = request.query_params.get('estado')
+        if vehiculo is None or (estado and vehiculo.estado != estado):
+            # El mismo mensaje que get_object_or_404 sobre el catálogo
+            raise Http404(f'No {VehiculoCatalogo._meta.object_name} matches the given query.')
+        self.check_object_permissions(request, vehiculo)
+        return Response(self.serializar(vehiculo))
+
+
+# ==================== ESCRITOR PERIÓDICO ====================
+
+class EscritorPeriodico(threading.Thread):
+    """Hilo daemon que regenera la instantánea cada `intervalo` segundos si está vencida"""
+
+    def __init__(self, intervalo):
+        super().__init__(name='flycar-instantanea', daemon=True)
+        self.intervalo = intervalo
+        self.detenido = threading.Event()
+
+    def run(self):
+        while not self.detenido.wait(self.intervalo):
+            close_old_connections()
+            try:
+                resultado = actualizar()
+            except Exception:
+                logger.exception('Falló la escritura de la instantánea del catálogo')
+                continue
+            finally:
+                close_old_connections()
+            if resultado is not None:
+                logger.info(
+                    'Instantánea del catálogo: %d vehículos, %d bytes en %.2fs',
+                    resultado.vehiculos, resultado.bytes, resultado.segundos,
+                )
+
+    def detener(self):
+        self.detenido.set()
+
+
+_escritor = None
+
+
+def iniciar_escritor_periodico():
+    """Arranca el hilo escritor una vez por proceso si está configurado"""
+    global _escritor
+    intervalo = settings.FLYCAR_INSTANTANEA_INTERVALO
+    if not intervalo or not settings.FLYCAR_INSTANTANEA_RUTA or _escritor is not None:
+        return _escritor
+    _escritor = EscritorPeriodico(intervalo)
+    _escritor.start()
+    return _escritor
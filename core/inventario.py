@@ -0,0 +1,56 @@
+"""
+Inventario de vehículos: transiciones de estado sin carreras
+
+Cada transición es un único UPDATE condicionado al estado de origen
+(`... WHERE estado IN (...)`). Si la cantidad de filas afectadas no
+coincide con la de vehículos pedidos, se revierte el lote completo y se
+lanza TransicionInvalida; así dos reservas simultáneas del mismo vehículo
+no pueden ganar ambas.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Vehiculo, CotizacionVehiculo
+from .signals import vehiculos_actualizados
+
+
+class TransicionInvalida(Exception):
+    """Algún vehículo no estaba en el estado de origen requerido"""
+
+
+def vehiculos_de(cotizacion):
+    """IDs de los vehículos de una cotización, en una sola consulta"""
+    return list(
+        CotizacionVehiculo.objects.filter(cotizacion=cotizacion).values_list('vehiculo_id', flat=True)
+    )
+
+
+def transicionar(vehiculo_ids, desde, hacia):
+    """Pasa todos los vehículos de `desde` (estado o lista de estados) a `hacia`, o ninguno"""
+    ids = set(vehiculo_ids)
+    if isinstance(desde, str):
+        desde = [desde]
+    with transaction.atomic():
+        afectados = Vehiculo.objects.filter(
+            id__in=ids, estado__in=desde, eliminado=False
+        ).update(estado=hacia, updated_at=timezone.now())
+        if afectados != len(ids):
+            raise TransicionInvalida(
+                f'{len(ids) - afectados} de {len(ids)} vehículos no están en estado {"/".join(desde)}'
+            )
+        vehiculos_actualizados.send(sender=Vehiculo, ids=list(ids))
+    return afectados
+
+
+def reservar(vehiculo_ids):
+    return transicionar(vehiculo_ids, 'DISPONIBLE', 'RESERVADO')
+
+
+def liberar(vehiculo_ids):
+    return transicionar(vehiculo_ids, 'RESERVADO', 'DISPONIBLE')
+
+
+def vender(vehiculo_ids, reservados):
+    """Vende vehículos reservados por la propia cotización o, sin reserva, disponibles"""
+    return transicionar(vehiculo_ids, 'RESERVADO' if reservados else 'DISPONIBLE', 'VENDIDO')
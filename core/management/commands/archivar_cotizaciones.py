@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.archivo import archivar_cotizaciones
+
+
+class Command(BaseCommand):
+    help = 'Mueve las cotizaciones inválidas o vencidas sin reserva ni venta a cotizaciones_archivadas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=settings.FLYCAR_ARCHIVO_DIAS,
+                            help='Archivar solo cotizaciones generadas hace más de N días')
+        parser.add_argument('--lote', type=int, default=settings.FLYCAR_ARCHIVO_LOTE,
+                            help='Cotizaciones por transacción')
+
+    def handle(self, *args, **options):
+        resultado = archivar_cotizaciones(dias=options['dias'], lote=options['lote'])
+        self.stdout.write(
+            f'{resultado.cotizaciones} cotizaciones archivadas '
+            f'({resultado.lineas} líneas) en {resultado.lotes} lotes, {resultado.segundos:.3f}s '
+            f'({resultado.filas_por_segundo:.0f} filas/s)'
+        )
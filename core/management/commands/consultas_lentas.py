@@ -0,0 +1,69 @@
+import json
+from pathlib import Path
+from urllib.error import URLError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.consultas_lentas import agrupar, anterior
+
+
+class Command(BaseCommand):
+    help = 'Muestra las formas de consulta más costosas del registro de consultas lentas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--archivo', default=settings.FLYCAR_CONSULTAS_LENTAS_ARCHIVO,
+                            help='Archivo JSONL (por defecto FLYCAR_CONSULTAS_LENTAS_ARCHIVO)')
+        parser.add_argument('--url', help='Buffer en memoria de un worker: URL de /api/metrics/consultas-lentas')
+        parser.add_argument('--token', help='Token JWT de un usuario staff para --url')
+        parser.add_argument('--top', type=int, default=10)
+        parser.add_argument('--json', action='store_true', help='Salida en JSON')
+
+    def handle(self, *args, **options):
+        if options['url']:
+            cantidad, peores = self.desde_url(options['url'], options['token'], options['top'])
+        elif options['archivo']:
+            cantidad, peores = self.desde_archivo(Path(options['archivo']), options['top'])
+        else:
+            raise CommandError('Indicar --archivo, --url o configurar FLYCAR_CONSULTAS_LENTAS_ARCHIVO')
+
+        if options['json']:
+            self.stdout.write(json.dumps(peores, indent=2, ensure_ascii=False))
+            return
+
+        self.stdout.write(f'{cantidad} consultas lentas registradas, {len(peores)} formas más costosas:\n')
+        for i, grupo in enumerate(peores, 1):
+            self.stdout.write(self.style.WARNING(
+                f'{i}. total={grupo["total_ms"]}ms cantidad={grupo["cantidad"]} '
+                f'p50={grupo["p50_ms"]}ms max={grupo["max_ms"]}ms'
+            ))
+            self.stdout.write(f'   vistas: {", ".join(grupo["vistas"]) or "-"}')
+            self.stdout.write(f'   origen: {grupo["origen"] or "-"}')
+            sql = grupo['sql'] if len(grupo['sql']) <= 500 else grupo['sql'][:500] + '...'
+            self.stdout.write(f'   sql: {sql}')
+            for linea in grupo['plan'] or []:
+                self.stdout.write(f'   plan: {linea}')
+
+    def desde_archivo(self, archivo, top):
+        # La copia de la última rotación primero: los registros quedan en orden
+        archivos = [ruta for ruta in (anterior(archivo), archivo) if ruta.exists()]
+        if not archivos:
+            raise CommandError(f'No existe {archivo}')
+        registros = []
+        for ruta in archivos:
+            with ruta.open(encoding='utf-8') as entrada:
+                registros += [json.loads(linea) for linea in entrada if linea.strip()]
+        return len(registros), agrupar(registros, top)
+
+    def desde_url(self, url, token, top):
+        pedido = Request(f'{url}?{urlencode({"top": top})}', headers={'Accept': 'application/json'})
+        if token:
+            pedido.add_header('Authorization', f'Bearer {token}')
+        try:
+            with urlopen(pedido, timeout=10) as respuesta:
+                datos = json.load(respuesta)
+        except (URLError, ValueError) as error:
+            raise CommandError(f'No se pudo leer {url}: {error}')
+        return datos['registros'], datos['peores']
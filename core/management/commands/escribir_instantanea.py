@@ -0,0 +1,34 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.instantanea import actualizar
+
+
+class Command(BaseCommand):
+    help = 'Regenera la instantánea del catálogo mapeada en memoria si está vencida'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ruta', default=settings.FLYCAR_INSTANTANEA_RUTA,
+                            help='Archivo de la instantánea (por defecto FLYCAR_INSTANTANEA_RUTA)')
+        parser.add_argument('--forzar', action='store_true',
+                            help='Escribirla aunque la publicada esté al día')
+        parser.add_argument('--intervalo', type=float, default=None,
+                            help='Repetir cada N segundos en lugar de ejecutar una sola vez')
+
+    def handle(self, *args, **options):
+        if not options['ruta']:
+            raise CommandError('Indicar --ruta o configurar FLYCAR_INSTANTANEA_RUTA')
+        while True:
+            resultado = actualizar(options['ruta'], forzar=options['forzar'])
+            if resultado is None:
+                self.stdout.write('Instantánea al día')
+            else:
+                self.stdout.write(
+                    f'Instantánea {resultado.version}: {resultado.vehiculos} vehículos, '
+                    f'{resultado.bytes} bytes en {resultado.segundos:.2f}s'
+                )
+            if not options['intervalo']:
+                return
+            time.sleep(options['intervalo'])
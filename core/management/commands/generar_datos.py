@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.generador import LOTE, generar_datos
+from core.models import Vehiculo
+
+
+class Command(BaseCommand):
+    help = 'Genera un dataset sintético determinístico (catálogo, clientes, cotizaciones, reservas y ventas)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vehiculos', type=int, default=1000)
+        parser.add_argument('--clientes', type=int, default=None,
+                            help='Por defecto uno cada 10 vehículos')
+        parser.add_argument('--vendedores', type=int, default=None,
+                            help='Por defecto uno cada 500 clientes (mínimo 5)')
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--lote', type=int, default=LOTE, help='Filas por bulk_create')
+        parser.add_argument('--clave', default='password123', help='Contraseña de todos los usuarios generados')
+
+    def handle(self, *args, **options):
+        if Vehiculo.objects.exists():
+            raise CommandError('La base ya tiene vehículos; usar una base vacía (manage.py flush)')
+
+        def progreso(tabla, filas):
+            if options['verbosity'] > 1 and filas % 100000 < options['lote']:
+                self.stdout.write(f'  {tabla}: {filas}')
+
+        resultado = generar_datos(
+            vehiculos=options['vehiculos'],
+            clientes=options['clientes'],
+            vendedores=options['vendedores'],
+            semilla=options['semilla'],
+            lote=options['lote'],
+            clave=options['clave'],
+            progreso=progreso,
+        )
+        for tabla, filas in sorted(resultado.filas.items()):
+            self.stdout.write(f'{tabla:<24} {filas:>10}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{resultado.total} filas en {resultado.segundos:.2f}s '
+            f'({resultado.filas_por_segundo:.0f} filas/s)'
+        ))
@@ -0,0 +1,30 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.vencimientos import procesar_vencimientos
+
+
+class Command(BaseCommand):
+    help = 'Vence reservas y cotizaciones vencidas y libera sus vehículos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=settings.FLYCAR_VENCIMIENTOS_LOTE,
+                            help='Filas por transacción')
+        parser.add_argument('--intervalo', type=float, default=None,
+                            help='Repetir cada N segundos en lugar de ejecutar una sola vez')
+
+    def handle(self, *args, **options):
+        while True:
+            resultado = procesar_vencimientos(lote=options['lote'])
+            self.stdout.write(
+                f'{resultado.reservas} reservas vencidas, '
+                f'{resultado.cotizaciones} cotizaciones invalidadas, '
+                f'{resultado.vehiculos} vehículos liberados '
+                f'en {resultado.lotes} lotes, {resultado.segundos:.3f}s '
+                f'({resultado.filas_por_segundo:.0f} filas/s)'
+            )
+            if not options['intervalo']:
+                return
+            time.sleep(options['intervalo'])
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core import busqueda
+
+
+class Command(BaseCommand):
+    help = 'Reindexa la búsqueda de texto del catálogo (catalogo_busqueda, FTS5)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Alias de la base a reindexar')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        inicio = time.perf_counter()
+        # Recrea la tabla FTS o los triggers si faltan (p. ej. tras reconstruir catalogo_vehiculos)
+        busqueda.instalar(connection)
+        total = busqueda.reconstruir(connection)
+        segundos = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f'Búsqueda reindexada: {total} vehículos en {segundos:.2f}s'
+        ))
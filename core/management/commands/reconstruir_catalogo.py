@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import catalogo, condicional, facetas, instantanea
+
+
+class Command(BaseCommand):
+    help = 'Regenera el catálogo desnormalizado de vehículos (catalogo_vehiculos)'
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        total = catalogo.reconstruir()
+        facetas.invalidar()
+        condicional.invalidar('vehiculos')
+        instantanea.invalidar()
+        segundos = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f'Catálogo reconstruido: {total} vehículos en {segundos:.2f}s'
+        ))
@@ -0,0 +1,57 @@
+"""
+Middleware del sistema FLY CAR
+"""
+
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .perfilamiento import Medicion, medicion_actual, medir_sql, registro
+
+
+class PerfilamientoMiddleware:
+    """
+    Mide cada request (vista, ORM, serialización, render y hash de contraseñas), agrega el
+    header Server-Timing y registra la latencia por vista para /api/metrics.
+
+    Va primero en MIDDLEWARE para cubrir toda la request. Solo se activa
+    con FLYCAR_PERFILAMIENTO = True.
+    """
+
+    def __init__(self, get_response):
+        if not settings.FLYCAR_PERFILAMIENTO:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        medicion = Medicion()
+        token = medicion_actual.set(medicion)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(medir_sql))
+                response = self.get_response(request)
+        finally:
+            medicion_actual.reset(token)
+        medicion.terminar()
+
+        response['Server-Timing'] = medicion.server_timing()
+        match = request.resolver_match
+        vista = match.view_name if match else 'sin_ruta'
+        registro.registrar(vista, request.method, response.status_code, medicion)
+        return response
+
+    def process_template_response(self, request, response):
+        """Las respuestas de DRF se renderizan después de este hook: se mide hasta el post-render"""
+        medicion = medicion_actual.get()
+        if medicion is not None:
+            inicio = time.perf_counter()
+
+            def fin_render(response):
+                medicion.render += time.perf_counter() - inicio
+
+            response.add_post_render_callback(fin_render)
+        return response
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def poblar_catalogo(apps, schema_editor):
+    from core.catalogo import campos_catalogo
+
+    Vehiculo = apps.get_model('core', 'Vehiculo')
+    VehiculoCatalogo = apps.get_model('core', 'VehiculoCatalogo')
+    vehiculos = Vehiculo.objects.select_related('modelo__marca', 'oferta').iterator(chunk_size=1000)
+    VehiculoCatalogo.objects.bulk_create(
+        (VehiculoCatalogo(**campos_catalogo(v)) for v in vehiculos),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VehiculoCatalogo',
+            fields=[
+                ('vehiculo', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='catalogo', serialize=False, to='core.vehiculo')),
+                ('nro_chasis', models.CharField(max_length=17)),
+                ('precio', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('descripcion', models.TextField(blank=True, null=True)),
+                ('anio', models.IntegerField()),
+                ('imagen', models.URLField(blank=True, null=True)),
+                ('estado', models.CharField(max_length=20)),
+                ('eliminado', models.BooleanField(default=False)),
+                ('modelo_id', models.UUIDField()),
+                ('modelo_nombre', models.CharField(max_length=100)),
+                ('marca_nombre', models.CharField(max_length=100)),
+                ('oferta_id', models.UUIDField(blank=True, null=True)),
+                ('oferta_inicio', models.DateTimeField(blank=True, null=True)),
+                ('oferta_fin', models.DateTimeField(blank=True, null=True)),
+                ('precio_con_oferta', models.DecimalField(decimal_places=6, max_digits=16)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Catálogo de vehículo',
+                'verbose_name_plural': 'Catálogo de vehículos',
+                'db_table': 'catalogo_vehiculos',
+            },
+        ),
+        migrations.RunPython(poblar_catalogo, migrations.RunPython.noop),
+    ]
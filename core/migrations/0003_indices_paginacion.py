@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_vehiculocatalogo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='accesorio',
+            index=models.Index(fields=['eliminado', 'created_at', 'id'], name='accesorio_creado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cotizacion',
+            index=models.Index(fields=['fecha_hora_generada', 'id'], name='cotizacion_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cotizacion',
+            index=models.Index(fields=['cliente', 'fecha_hora_generada', 'id'], name='cotizacion_cliente_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['fecha_hora_generada', 'id'], name='reserva_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehiculocatalogo',
+            index=models.Index(condition=models.Q(('eliminado', False)), fields=['created_at', 'vehiculo'], name='catalogo_creado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehiculocatalogo',
+            index=models.Index(condition=models.Q(('eliminado', False)), fields=['estado', 'created_at', 'vehiculo'], name='catalogo_estado_creado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['vendedor', 'fecha_hora_generada', 'id'], name='venta_vendedor_fecha_idx'),
+        ),
+    ]
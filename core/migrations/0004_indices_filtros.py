@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_indices_paginacion'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cotizacion',
+            name='cliente',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='cotizaciones', to='core.cliente'),
+        ),
+        migrations.AlterField(
+            model_name='venta',
+            name='vendedor',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='ventas', to='core.vendedor'),
+        ),
+        migrations.AddIndex(
+            model_name='cotizacion',
+            index=models.Index(condition=models.Q(('valida', True)), fields=['cliente'], name='cotizacion_cliente_valida_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(condition=models.Q(('estado', 'ACTIVA')), fields=['fecha_hora_vencimiento'], name='reserva_activa_vence_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehiculo',
+            index=models.Index(condition=models.Q(('eliminado', False)), fields=['estado'], name='vehiculo_activo_estado_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_indices_filtros'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cotizacion',
+            index=models.Index(condition=models.Q(('valida', True)), fields=['fecha_hora_vencimiento'], name='cotizacion_valida_vence_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:36
+
+import core.identificadores
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_indice_vencimiento_cotizaciones'),
+    ]
+
+    # El default de la clave es solo de Python: no cambia el esquema. Sin
+    # SeparateDatabaseAndState, SQLite reconstruiría cada tabla copiando todas
+    # sus filas. Las claves uuid4 existentes se conservan (siguen siendo UUID
+    # válidos y las FK no cambian); solo las filas nuevas reciben UUIDv7.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='cotizacion',
+                    name='id',
+                    field=models.UUIDField(default=core.identificadores.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='cotizacionaccesorio',
+                    name='id',
+                    field=models.UUIDField(default=core.identificadores.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='cotizacionvehiculo',
+                    name='id',
+                    field=models.UUIDField(default=core.identificadores.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='pago',
+                    name='id',
+                    field=models.UUIDField(default=core.identificadores.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='reserva',
+                    name='id',
+                    field=models.UUIDField(default=core.identificadores.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='venta',
+                    name='id',
+                    field=models.UUIDField(default=core.identificadores.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_uuid7_claves_alta_insercion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CotizacionArchivada',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('fecha_hora_generada', models.DateTimeField()),
+                ('importe_final', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('valida', models.BooleanField()),
+                ('fecha_hora_vencimiento', models.DateTimeField()),
+                ('detalle', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archivada_en', models.DateTimeField(auto_now_add=True)),
+                ('cliente', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='cotizaciones_archivadas', to='core.cliente')),
+            ],
+            options={
+                'verbose_name': 'Cotización archivada',
+                'verbose_name_plural': 'Cotizaciones archivadas',
+                'db_table': 'cotizaciones_archivadas',
+                'indexes': [models.Index(fields=['fecha_hora_generada', 'id'], name='cotizacion_arch_fecha_idx'), models.Index(fields=['cliente', 'fecha_hora_generada', 'id'], name='cotizacion_arch_cliente_idx')],
+            },
+        ),
+    ]
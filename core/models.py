@@ -15,6 +15,8 @@ from django.utils import timezone
 from decimal import Decimal
 import uuid
 
+from .identificadores import uuid7
+
 
 # ==================== MANAGERS ====================
 
@@ -97,6 +99,10 @@ class Cliente(models.Model):
         db_table = 'clientes'
         verbose_name = 'Cliente'
         verbose_name_plural = 'Clientes'
+        indexes = [
+            # Sincronización incremental del autocompletado (core/autocompletado.py)
+            models.Index(fields=['updated_at'], name='cliente_actualizado_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nombre} {self.apellido} - DNI: {self.dni}"
@@ -186,9 +192,9 @@ class Oferta(models.Model):
     def __str__(self):
         return f"Oferta {self.descuento}% ({self.fecha_inicio.date()} - {self.fecha_fin.date()})"
     
-    def esta_vigente(self):
+    def esta_vigente(self, ahora=None):
         """Verifica si la oferta está vigente"""
-        now = timezone.now()
+        now = ahora or timezone.now()
         return self.fecha_inicio <= now <= self.fecha_fin
 
 
@@ -231,6 +237,12 @@ class Vehiculo(models.Model):
         db_table = 'vehiculos'
         verbose_name = 'Vehículo'
         verbose_name_plural = 'Vehículos'
+        indexes = [
+            models.Index(
+                fields=['estado'], name='vehiculo_activo_estado_idx',
+                condition=models.Q(eliminado=False)
+            ),
+        ]
     
     def __str__(self):
         return f"{self.modelo} {self.anio} - {self.nro_chasis}"
@@ -243,6 +255,56 @@ class Vehiculo(models.Model):
         return self.precio
 
 
+class VehiculoCatalogo(models.Model):
+    """Vista de lectura desnormalizada del catálogo de vehículos (ver core/catalogo.py)"""
+    
+    vehiculo = models.OneToOneField(Vehiculo, on_delete=models.CASCADE, primary_key=True, related_name='catalogo')
+    nro_chasis = models.CharField(max_length=17)
+    precio = models.DecimalField(max_digits=10, decimal_places=2)
+    descripcion = models.TextField(blank=True, null=True)
+    anio = models.IntegerField()
+    imagen = models.URLField(blank=True, null=True)
+    estado = models.CharField(max_length=20)
+    eliminado = models.BooleanField(default=False)
+    modelo_id = models.UUIDField()
+    modelo_nombre = models.CharField(max_length=100)
+    marca_nombre = models.CharField(max_length=100)
+    oferta_id = models.UUIDField(null=True, blank=True)
+    oferta_inicio = models.DateTimeField(null=True, blank=True)
+    oferta_fin = models.DateTimeField(null=True, blank=True)
+    precio_con_oferta = models.DecimalField(max_digits=16, decimal_places=6)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'catalogo_vehiculos'
+        verbose_name = 'Catálogo de vehículo'
+        verbose_name_plural = 'Catálogo de vehículos'
+        indexes = [
+            # Paginación por cursor (created_at, id) del listado público
+            models.Index(
+                fields=['created_at', 'vehiculo'], name='catalogo_creado_idx',
+                condition=models.Q(eliminado=False)
+            ),
+            models.Index(
+                fields=['estado', 'created_at', 'vehiculo'], name='catalogo_estado_creado_idx',
+                condition=models.Q(eliminado=False)
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.marca_nombre} {self.modelo_nombre} {self.anio} - {self.nro_chasis}"
+    
+    def get_precio_con_oferta(self, ahora=None):
+        """Precio efectivo según la ventana de la oferta, sin consultar la base"""
+        if self.oferta_id is None:
+            return self.precio
+        now = ahora or timezone.now()
+        if self.oferta_inicio <= now <= self.oferta_fin:
+            return self.precio_con_oferta
+        return self.precio
+
+
 class Accesorio(models.Model):
     """Modelo para accesorios de vehículos"""
     
@@ -260,20 +322,17 @@ class Accesorio(models.Model):
         db_table = 'accesorios'
         verbose_name = 'Accesorio'
         verbose_name_plural = 'Accesorios'
+        indexes = [
+            models.Index(fields=['eliminado', 'created_at', 'id'], name='accesorio_creado_idx'),
+        ]
     
     def __str__(self):
         return self.nombre
     
     def get_precio_para_modelo(self, modelo_id):
-        """Obtiene el precio del accesorio para un modelo específico"""
-        try:
-            modelo_accesorio = ModeloAccesorio.objects.get(modelo_id=modelo_id, accesorio=self)
-            if self.oferta and self.oferta.esta_vigente():
-                descuento = modelo_accesorio.precio * (self.oferta.descuento / 100)
-                return modelo_accesorio.precio - descuento
-            return modelo_accesorio.precio
-        except ModeloAccesorio.DoesNotExist:
-            return Decimal('0.00')
+        """Obtiene el precio del accesorio para un modelo específico (desde la matriz en memoria)"""
+        from .precios import matriz_precios
+        return matriz_precios().precio_accesorio(modelo_id, self.id)
 
 
 class ModeloAccesorio(models.Model):
@@ -296,15 +355,19 @@ class ModeloAccesorio(models.Model):
         return f"{self.modelo} - {self.accesorio}: ${self.precio}"
 
 
+# Las tablas de alta inserción (cotizaciones y sus líneas, pagos, reservas y
+# ventas) usan UUIDv7: claves crecientes en el tiempo (ver core/identificadores.py)
+
 class Cotizacion(models.Model):
     """Modelo para cotizaciones"""
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     fecha_hora_generada = models.DateTimeField(auto_now_add=True)
     importe_final = models.DecimalField(max_digits=12, decimal_places=2)
     valida = models.BooleanField(default=True)
     fecha_hora_vencimiento = models.DateTimeField()
-    cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, related_name='cotizaciones')
+    # Sin índice propio: lo cubre cotizacion_cliente_fecha_idx
+    cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, related_name='cotizaciones', db_index=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -312,6 +375,21 @@ class Cotizacion(models.Model):
         db_table = 'cotizaciones'
         verbose_name = 'Cotización'
         verbose_name_plural = 'Cotizaciones'
+        indexes = [
+            # Paginación por cursor (fecha_hora_generada, id)
+            models.Index(fields=['fecha_hora_generada', 'id'], name='cotizacion_fecha_idx'),
+            models.Index(fields=['cliente', 'fecha_hora_generada', 'id'], name='cotizacion_cliente_fecha_idx'),
+            # Invalidación de cotizaciones vigentes en `generar`
+            models.Index(
+                fields=['cliente'], name='cotizacion_cliente_valida_idx',
+                condition=models.Q(valida=True)
+            ),
+            # Barrido de vencimientos (core/vencimientos.py)
+            models.Index(
+                fields=['fecha_hora_vencimiento'], name='cotizacion_valida_vence_idx',
+                condition=models.Q(valida=True)
+            ),
+        ]
     
     def __str__(self):
         return f"Cotización {self.id} - Cliente: {self.cliente.nombre}"
@@ -324,7 +402,7 @@ class Cotizacion(models.Model):
 class CotizacionVehiculo(models.Model):
     """Relación entre cotización y vehículos"""
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     cotizacion = models.ForeignKey(Cotizacion, on_delete=models.CASCADE, related_name='vehiculos')
     vehiculo = models.ForeignKey(Vehiculo, on_delete=models.PROTECT)
     precio_unitario = models.DecimalField(max_digits=10, decimal_places=2)
@@ -343,7 +421,7 @@ class CotizacionVehiculo(models.Model):
 class CotizacionAccesorio(models.Model):
     """Relación entre cotización vehículo y accesorios"""
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     cotizacion = models.ForeignKey(Cotizacion, on_delete=models.CASCADE, related_name='accesorios')
     cotizacion_vehiculo = models.ForeignKey(CotizacionVehiculo, on_delete=models.CASCADE, related_name='accesorios')
     accesorio = models.ForeignKey(Accesorio, on_delete=models.PROTECT)
@@ -359,10 +437,44 @@ class CotizacionAccesorio(models.Model):
         return f"{self.cotizacion.id} - {self.accesorio}"
 
 
+class CotizacionArchivada(models.Model):
+    """
+    Cotización muerta (inválida o vencida, sin reserva ni venta) que
+    core/archivo.py sacó de `cotizaciones`. Conserva el id original; las
+    líneas de vehículos y accesorios se guardan en `detalle` (JSON).
+    """
+    
+    id = models.UUIDField(primary_key=True, editable=False)
+    fecha_hora_generada = models.DateTimeField()
+    importe_final = models.DecimalField(max_digits=12, decimal_places=2)
+    valida = models.BooleanField()
+    fecha_hora_vencimiento = models.DateTimeField()
+    # Sin índice propio: lo cubre cotizacion_arch_cliente_idx
+    cliente = models.ForeignKey(
+        Cliente, on_delete=models.CASCADE, related_name='cotizaciones_archivadas', db_index=False
+    )
+    detalle = models.JSONField(default=dict)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archivada_en = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'cotizaciones_archivadas'
+        verbose_name = 'Cotización archivada'
+        verbose_name_plural = 'Cotizaciones archivadas'
+        indexes = [
+            models.Index(fields=['fecha_hora_generada', 'id'], name='cotizacion_arch_fecha_idx'),
+            models.Index(fields=['cliente', 'fecha_hora_generada', 'id'], name='cotizacion_arch_cliente_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Cotización archivada {self.id}"
+
+
 class Pago(models.Model):
     """Modelo para pagos"""
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     nro_pago = models.CharField(max_length=100, unique=True)  # Número del sistema externo
     fecha_hora_generado = models.DateTimeField(auto_now_add=True)
     importe = models.DecimalField(max_digits=12, decimal_places=2)
@@ -387,7 +499,7 @@ class Reserva(models.Model):
         ('COMPLETADA', 'Completada'),
     ]
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     nro_reserva = models.CharField(max_length=100, unique=True, default=uuid.uuid4)
     fecha_hora_generada = models.DateTimeField(auto_now_add=True)
     estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='ACTIVA')
@@ -402,6 +514,14 @@ class Reserva(models.Model):
         db_table = 'reservas'
         verbose_name = 'Reserva'
         verbose_name_plural = 'Reservas'
+        indexes = [
+            models.Index(fields=['fecha_hora_generada', 'id'], name='reserva_fecha_idx'),
+            # Reservas activas por vencer
+            models.Index(
+                fields=['fecha_hora_vencimiento'], name='reserva_activa_vence_idx',
+                condition=models.Q(estado='ACTIVA')
+            ),
+        ]
     
     def __str__(self):
         return f"Reserva {self.nro_reserva} - Estado: {self.estado}"
@@ -414,7 +534,7 @@ class Reserva(models.Model):
 class Venta(models.Model):
     """Modelo para ventas"""
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     nro_venta = models.CharField(max_length=100, unique=True, default=uuid.uuid4)
     fecha_hora_generada = models.DateTimeField(auto_now_add=True)
     descripcion = models.TextField(blank=True, null=True)
@@ -422,7 +542,8 @@ class Venta(models.Model):
     comision = models.DecimalField(max_digits=10, decimal_places=2)
     pago = models.OneToOneField(Pago, on_delete=models.PROTECT, related_name='venta')
     cotizacion = models.OneToOneField(Cotizacion, on_delete=models.CASCADE, related_name='venta')
-    vendedor = models.ForeignKey(Vendedor, on_delete=models.PROTECT, related_name='ventas')
+    # Sin índice propio: lo cubre venta_vendedor_fecha_idx
+    vendedor = models.ForeignKey(Vendedor, on_delete=models.PROTECT, related_name='ventas', db_index=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -430,6 +551,9 @@ class Venta(models.Model):
         db_table = 'ventas'
         verbose_name = 'Venta'
         verbose_name_plural = 'Ventas'
+        indexes = [
+            models.Index(fields=['vendedor', 'fecha_hora_generada', 'id'], name='venta_vendedor_fecha_idx'),
+        ]
     
     def __str__(self):
         return f"Venta {self.nro_venta} - Vendedor: {self.vendedor.nombre}"
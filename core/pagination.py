@@ -0,0 +1,169 @@
+"""
+Paginación por cursor (keyset) para todos los listados de la API
+
+Ordena por (campo, id) según el primer elemento de `ordering` de la vista
+y filtra a partir del último registro visto, de modo que una página
+profunda cuesta lo mismo que la primera. El total (`count`) es opcional:
+solo se calcula con `?count=true`.
+
+El cursor es [valor, pk, reverso] en base64. Al leerlo se valida la forma
+y se convierten el valor y la pk con sus campos del modelo (o de la
+anotación por la que se ordena): un cursor adulterado da 404, no un error
+al armar la consulta.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    ordering = '-created_at'
+    invalid_cursor_message = 'Cursor inválido'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        campo, _ = self.get_ordering(view)
+
+        def leer(cursor, descendente, limite):
+            signo = '-' if descendente else ''
+            consulta = queryset.order_by(f'{signo}{campo}', f'{signo}pk')
+            if cursor:
+                valor, pk = cursor
+                if descendente:
+                    consulta = consulta.filter(Q(**{f'{campo}__lte': valor}) & (
+                        Q(**{f'{campo}__lt': valor}) | Q(pk__lt=pk)
+                    ))
+                else:
+                    consulta = consulta.filter(Q(**{f'{campo}__gte': valor}) & (
+                        Q(**{f'{campo}__gt': valor}) | Q(pk__gt=pk)
+                    ))
+            return list(consulta[:limite])
+
+        return self.paginar(leer, queryset.count, request, view, queryset)
+
+    def paginar(self, leer, contar, request, view=None, queryset=None):
+        """
+        Pagina cualquier fuente ordenada por (campo, pk): `leer(cursor, descendente, limite)`
+        devuelve hasta `limite` objetos estrictamente después de `cursor` ((valor, pk) o None)
+        y `contar()` el total. paginate_queryset es el caso del queryset. Con `queryset`
+        (que puede no ser el que se lee) el cursor se convierte con sus campos.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.campo, self.descendente = self.get_ordering(view)
+        cursor = self.decode_cursor(request, queryset)
+
+        self.count = None
+        if request.query_params.get(self.count_query_param, '').lower() in ('1', 'true'):
+            self.count = contar()
+
+        reverso = bool(cursor and cursor[2])
+        # Al retroceder se recorre en el orden opuesto y luego se invierte
+        descendente = self.descendente != reverso
+        resultados = leer(cursor[:2] if cursor else None, descendente, self.page_size + 1)
+        hay_mas = len(resultados) > self.page_size
+        resultados = resultados[:self.page_size]
+
+        if reverso:
+            resultados.reverse()
+            self.has_next, self.has_previous = True, hay_mas
+        else:
+            self.has_next, self.has_previous = hay_mas, cursor is not None
+
+        self.page = resultados
+        return resultados
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, view):
+        ordering = getattr(view, 'ordering', None) or [self.ordering]
+        if isinstance(ordering, str):
+            ordering = [ordering]
+        campo = ordering[0]
+        return campo.lstrip('-'), campo.startswith('-')
+
+    def campo_orden(self, queryset):
+        """Campo del modelo o de la anotación por el que se ordena `queryset`"""
+        anotacion = queryset.query.annotations.get(self.campo)
+        if anotacion is not None:
+            return anotacion.output_field
+        return queryset.model._meta.get_field(self.campo)
+
+    def decode_cursor(self, request, queryset=None):
+        codificado = request.query_params.get(self.cursor_query_param)
+        if not codificado:
+            return None
+        try:
+            datos = json.loads(base64.urlsafe_b64decode(codificado.encode('ascii')))
+            if not isinstance(datos, list) or len(datos) != 3:
+                raise ValueError(datos)
+            valor, pk, reverso = datos
+            if valor is None or not isinstance(reverso, bool):
+                raise ValueError(datos)
+            if queryset is not None:
+                valor = self.campo_orden(queryset).to_python(valor)
+                pk = queryset.model._meta.pk.to_python(pk)
+        except (TypeError, ValueError, ValidationError, FieldDoesNotExist):
+            raise NotFound(self.invalid_cursor_message)
+        return valor, pk, reverso
+
+    def encode_cursor(self, obj, reverso):
+        valor = getattr(obj, self.campo)
+        if isinstance(valor, datetime):
+            valor = valor.isoformat()
+        datos = json.dumps([valor, str(obj.pk), reverso], default=str)
+        codificado = base64.urlsafe_b64encode(datos.encode('utf-8')).decode('ascii')
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, codificado)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverso=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverso=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'nullable': True},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
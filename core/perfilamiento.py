@@ -0,0 +1,196 @@
+"""
+Perfilamiento por request
+
+`Medicion` acumula el tiempo de cada request en cinco componentes
+(vista, ORM, serialización, render y hash de contraseñas) mientras dura
+la request; la serialización es el `.data` de los serializers de list y
+retrieve (SerializacionMedidaMixin), sin las consultas que dispare;
+`RegistroMetricas` agrega histogramas de latencia por vista y los expone
+en formato de texto de Prometheus. Lo usa PerfilamientoMiddleware
+(core/middleware.py) cuando FLYCAR_PERFILAMIENTO está activo.
+"""
+
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from rest_framework.response import Response
+
+# Límites superiores de los buckets del histograma, en segundos
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+COMPONENTES = ('vista', 'orm', 'serializacion', 'render', 'hash')
+
+medicion_actual = contextvars.ContextVar('flycar_medicion', default=None)
+
+
+class Medicion:
+    """Tiempos de una request en curso (segundos)"""
+
+    __slots__ = ('inicio', 'orm', 'consultas', 'serializacion', 'render', 'hash', 'total')
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.orm = 0.0
+        self.consultas = 0
+        self.serializacion = 0.0
+        self.render = 0.0
+        self.hash = 0.0
+        self.total = 0.0
+
+    def terminar(self):
+        self.total = time.perf_counter() - self.inicio
+
+    @property
+    def vista(self):
+        """Lo que no es ORM, serialización, render ni hash: lógica de vistas, validación y middleware"""
+        return max(0.0, self.total - self.orm - self.serializacion - self.render - self.hash)
+
+    def server_timing(self):
+        return ', '.join([
+            f'vista;dur={self.vista * 1000:.2f}',
+            f'orm;dur={self.orm * 1000:.2f};desc="{self.consultas} consultas"',
+            f'serializacion;dur={self.serializacion * 1000:.2f}',
+            f'render;dur={self.render * 1000:.2f}',
+            f'hash;dur={self.hash * 1000:.2f}',
+            f'total;dur={self.total * 1000:.2f}',
+        ])
+
+
+def medir_sql(execute, sql, params, many, context):
+    """execute_wrapper que suma el tiempo de cada consulta a la medición en curso"""
+    medicion = medicion_actual.get()
+    if medicion is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        medicion.orm += time.perf_counter() - inicio
+        medicion.consultas += 1
+
+
+class PBKDF2PasswordHasherMedido(PBKDF2PasswordHasher):
+    """PBKDF2 estándar (hashes compatibles) que informa su tiempo a la medición en curso"""
+
+    def encode(self, password, salt, iterations=None):
+        medicion = medicion_actual.get()
+        if medicion is None:
+            return super().encode(password, salt, iterations)
+        inicio = time.perf_counter()
+        try:
+            return super().encode(password, salt, iterations)
+        finally:
+            medicion.hash += time.perf_counter() - inicio
+
+
+class SerializacionMedidaMixin:
+    """
+    list y retrieve de DRF que serializan con `serializar`, que suma el
+    tiempo de `.data` a la medición en curso (sin el ORM que dispare)
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.serializar(page, many=True))
+        return Response(self.serializar(queryset, many=True))
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(self.serializar(self.get_object()))
+
+    def serializar(self, *args, **kwargs):
+        serializer = self.get_serializer(*args, **kwargs)
+        medicion = medicion_actual.get()
+        if medicion is None:
+            return serializer.data
+        inicio, orm = time.perf_counter(), medicion.orm
+        try:
+            return serializer.data
+        finally:
+            medicion.serializacion += time.perf_counter() - inicio - (medicion.orm - orm)
+
+
+class _Serie:
+    __slots__ = ('buckets', 'cantidad', 'suma', 'componentes', 'consultas')
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.cantidad = 0
+        self.suma = 0.0
+        self.componentes = dict.fromkeys(COMPONENTES, 0.0)
+        self.consultas = 0
+
+
+class RegistroMetricas:
+    """Histogramas de latencia por (vista, método, status) en memoria del proceso"""
+
+    def __init__(self):
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, vista, metodo, status, medicion):
+        clave = (vista, metodo, str(status))
+        indice = bisect_left(BUCKETS, medicion.total)
+        with self._lock:
+            serie = self._series.get(clave)
+            if serie is None:
+                serie = self._series[clave] = _Serie()
+            serie.buckets[indice] += 1
+            serie.cantidad += 1
+            serie.suma += medicion.total
+            serie.consultas += medicion.consultas
+            for componente in COMPONENTES:
+                serie.componentes[componente] += getattr(medicion, componente)
+
+    def limpiar(self):
+        with self._lock:
+            self._series.clear()
+
+    def prometheus(self):
+        """Exposición en formato de texto de Prometheus (version 0.0.4)"""
+        with self._lock:
+            series = sorted(
+                (clave, list(s.buckets), s.cantidad, s.suma, dict(s.componentes), s.consultas)
+                for clave, s in self._series.items()
+            )
+        lineas = [
+            '# HELP flycar_request_duration_seconds Duración de las requests por vista',
+            '# TYPE flycar_request_duration_seconds histogram',
+        ]
+        for (vista, metodo, status), buckets, cantidad, suma, _, _ in series:
+            etiquetas = f'vista="{vista}",metodo="{metodo}",status="{status}"'
+            acumulado = 0
+            for limite, valor in zip(BUCKETS, buckets):
+                acumulado += valor
+                lineas.append(f'flycar_request_duration_seconds_bucket{{{etiquetas},le="{limite}"}} {acumulado}')
+            lineas.append(f'flycar_request_duration_seconds_bucket{{{etiquetas},le="+Inf"}} {cantidad}')
+            lineas.append(f'flycar_request_duration_seconds_sum{{{etiquetas}}} {suma:.6f}')
+            lineas.append(f'flycar_request_duration_seconds_count{{{etiquetas}}} {cantidad}')
+
+        lineas += [
+            '# HELP flycar_request_componente_seconds_total Tiempo acumulado por componente',
+            '# TYPE flycar_request_componente_seconds_total counter',
+        ]
+        for (vista, metodo, status), _, _, _, componentes, _ in series:
+            for componente in COMPONENTES:
+                lineas.append(
+                    f'flycar_request_componente_seconds_total{{vista="{vista}",metodo="{metodo}",'
+                    f'status="{status}",componente="{componente}"}} {componentes[componente]:.6f}'
+                )
+
+        lineas += [
+            '# HELP flycar_request_consultas_total Consultas SQL ejecutadas',
+            '# TYPE flycar_request_consultas_total counter',
+        ]
+        for (vista, metodo, status), _, _, _, _, consultas in series:
+            lineas.append(
+                f'flycar_request_consultas_total{{vista="{vista}",metodo="{metodo}",status="{status}"}} {consultas}'
+            )
+        return '\n'.join(lineas) + '\n'
+
+
+registro = RegistroMetricas()
@@ -0,0 +1,82 @@
+"""
+Planes de consulta de los filtros críticos
+
+Cada `ConsultaCritica` reproduce el queryset de un endpoint (o de un
+proceso interno) junto con el índice que debería resolverlo. Se usa en
+los tests y en benchmarks/indices.py para verificar con EXPLAIN QUERY PLAN
+que los índices de las migraciones realmente se aprovechan.
+"""
+
+import re
+import uuid
+from dataclasses import dataclass
+from typing import Callable
+
+from django.db import connections, router
+from django.utils import timezone
+
+from .models import Vehiculo, VehiculoCatalogo, Cotizacion, Reserva, Venta
+
+# Valores de ejemplo: el plan de SQLite no depende del valor concreto
+_UUID = uuid.UUID(int=0)
+
+_INDICE = re.compile(r'USING (?:COVERING )?INDEX (\w+)')
+
+
+@dataclass
+class ConsultaCritica:
+    nombre: str
+    indice: str
+    queryset: Callable
+
+
+CONSULTAS_CRITICAS = [
+    ConsultaCritica(
+        'vehiculos_listado', 'catalogo_estado_creado_idx',
+        lambda: VehiculoCatalogo.objects.filter(eliminado=False, estado='DISPONIBLE')
+        .order_by('-created_at', '-pk')[:11]
+    ),
+    ConsultaCritica(
+        'vehiculos_disponibles', 'vehiculo_activo_estado_idx',
+        lambda: Vehiculo.objects.filter(eliminado=False, estado='DISPONIBLE')
+    ),
+    ConsultaCritica(
+        'cotizaciones_invalidacion', 'cotizacion_cliente_valida_idx',
+        lambda: Cotizacion.objects.filter(cliente_id=_UUID, valida=True)
+    ),
+    ConsultaCritica(
+        'cotizaciones_por_vencer', 'cotizacion_valida_vence_idx',
+        lambda: Cotizacion.objects.filter(valida=True, fecha_hora_vencimiento__lt=timezone.now())
+    ),
+    ConsultaCritica(
+        'cotizaciones_listado_cliente', 'cotizacion_cliente_fecha_idx',
+        lambda: Cotizacion.objects.filter(cliente__usuario_id=_UUID)
+        .order_by('-fecha_hora_generada', '-pk')[:11]
+    ),
+    ConsultaCritica(
+        'reservas_listado', 'reserva_fecha_idx',
+        lambda: Reserva.objects.order_by('-fecha_hora_generada', '-pk')[:11]
+    ),
+    ConsultaCritica(
+        'reservas_por_vencer', 'reserva_activa_vence_idx',
+        lambda: Reserva.objects.filter(estado='ACTIVA', fecha_hora_vencimiento__lt=timezone.now())
+    ),
+    ConsultaCritica(
+        'ventas_listado_vendedor', 'venta_vendedor_fecha_idx',
+        lambda: Venta.objects.filter(vendedor__usuario_id=_UUID)
+        .order_by('-fecha_hora_generada', '-pk')[:11]
+    ),
+]
+
+
+def explicar(queryset):
+    """Devuelve las filas de detalle de EXPLAIN QUERY PLAN (solo SQLite)"""
+    connection = connections[router.db_for_read(queryset.model)]
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [fila[-1] for fila in cursor.fetchall()]
+
+
+def indices_usados(plan):
+    return {m.group(1) for linea in plan for m in _INDICE.finditer(linea)}
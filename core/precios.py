@@ -0,0 +1,176 @@
+"""
+Motor de precios de cotizaciones (C.U. 01 y C.U. 02)
+
+Resuelve vehículos, accesorios, precios por modelo y ofertas vigentes de
+un carrito completo con una cantidad fija de consultas, sin importar
+cuántos ítems tenga.
+
+Los precios de accesorios por modelo y las ventanas de las ofertas se
+leen de una matriz en memoria por proceso (`matriz_precios()`), que se
+invalida con la versión 'precios' (ver core/versiones.py) y vence sola en
+el próximo fecha_inicio/fecha_fin de alguna oferta.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.conf import settings
+from django.http import Http404
+from django.utils import timezone
+
+from . import versiones
+from .models import Vehiculo, Accesorio, ModeloAccesorio, Oferta
+
+
+def aplicar_oferta(precio, oferta, ahora):
+    """Aplica el descuento de la oferta si está vigente en `ahora`"""
+    if oferta and oferta.esta_vigente(ahora):
+        descuento = precio * (oferta.descuento / 100)
+        return precio - descuento
+    return precio
+
+
+class MatrizPrecios:
+    """Precios efectivos por (modelo_id, accesorio_id) con las ofertas vigentes ya aplicadas"""
+
+    def __init__(self, version, ahora):
+        self.version = version
+        self.creada = time.monotonic()
+        self.ofertas = {oferta.id: oferta for oferta in Oferta.objects.all()}
+        ofertas_accesorio = dict(Accesorio.objects.values_list('id', 'oferta_id'))
+        self.precios = {}
+        for modelo_id, accesorio_id, precio in ModeloAccesorio.objects.values_list(
+            'modelo_id', 'accesorio_id', 'precio'
+        ):
+            oferta = self.ofertas.get(ofertas_accesorio.get(accesorio_id))
+            self.precios[(modelo_id, accesorio_id)] = aplicar_oferta(precio, oferta, ahora)
+
+        # Próximos bordes: una oferta que empieza o una vigente que termina
+        inicios = [o.fecha_inicio for o in self.ofertas.values() if o.fecha_inicio > ahora]
+        fines = [o.fecha_fin for o in self.ofertas.values() if o.fecha_fin >= ahora]
+        self.proximo_inicio = min(inicios, default=None)
+        self.proximo_fin = min(fines, default=None)
+
+    def vigente(self, version, ahora):
+        if version != self.version:
+            return False
+        if time.monotonic() - self.creada > settings.FLYCAR_PRECIOS_TTL:
+            return False
+        if self.proximo_inicio is not None and ahora >= self.proximo_inicio:
+            return False
+        if self.proximo_fin is not None and ahora > self.proximo_fin:
+            return False
+        return True
+
+    def bordes(self, ahora):
+        """Cantidad de fecha_inicio/fecha_fin de ofertas ya pasados en `ahora` y el más reciente"""
+        pasados = [o.fecha_inicio for o in self.ofertas.values() if o.fecha_inicio <= ahora]
+        pasados += [o.fecha_fin for o in self.ofertas.values() if o.fecha_fin < ahora]
+        return len(pasados), max(pasados, default=None)
+
+    def precio_accesorio(self, modelo_id, accesorio_id):
+        """Precio del accesorio para el modelo, 0.00 si no tiene precio cargado"""
+        return self.precios.get((modelo_id, accesorio_id), Decimal('0.00'))
+
+    def precio_vehiculo(self, vehiculo, ahora):
+        return aplicar_oferta(vehiculo.precio, self.ofertas.get(vehiculo.oferta_id), ahora)
+
+
+_matriz = None
+_matriz_lock = threading.Lock()
+
+
+def matriz_precios(ahora=None):
+    """Matriz del proceso, reconstruida si cambió la versión o pasó un borde de oferta"""
+    global _matriz
+    ahora = ahora or timezone.now()
+    version = versiones.version('precios')
+    matriz = _matriz
+    if matriz is None or not matriz.vigente(version, ahora):
+        with _matriz_lock:
+            matriz = _matriz
+            if matriz is None or not matriz.vigente(version, ahora):
+                matriz = _matriz = MatrizPrecios(version, ahora)
+    return matriz
+
+
+@dataclass
+class LineaAccesorio:
+    accesorio: Accesorio
+    precio: Decimal
+
+
+@dataclass
+class LineaVehiculo:
+    vehiculo: Vehiculo
+    precio: Decimal
+    accesorios: list = field(default_factory=list)
+
+
+@dataclass
+class ResultadoCotizacion:
+    lineas: list
+    total: Decimal
+
+    def detalle(self):
+        """Desglose con el formato que devuelve `simular`"""
+        return [
+            {
+                'vehiculo': {
+                    'id': linea.vehiculo.id,
+                    'modelo': str(linea.vehiculo.modelo),
+                    'precio': linea.precio
+                },
+                'accesorios': [
+                    {
+                        'id': la.accesorio.id,
+                        'nombre': la.accesorio.nombre,
+                        'precio': la.precio
+                    }
+                    for la in linea.accesorios
+                ]
+            }
+            for linea in self.lineas
+        ]
+
+
+def cotizar(items):
+    """
+    Calcula precios de una lista de ítems validados por ItemCotizacionSerializer.
+
+    Lanza Http404 si algún vehículo o accesorio no existe, igual que
+    get_object_or_404 en la versión anterior de las vistas.
+    """
+    ahora = timezone.now()
+    matriz = matriz_precios(ahora)
+
+    vehiculo_ids = {item['vehiculo_id'] for item in items}
+    vehiculos = Vehiculo.objects.select_related('modelo__marca').in_bulk(vehiculo_ids)
+    if len(vehiculos) != len(vehiculo_ids):
+        raise Http404('No Vehiculo matches the given query.')
+
+    accesorio_ids = {acc_id for item in items for acc_id in item.get('accesorios', [])}
+    accesorios = {}
+    if accesorio_ids:
+        accesorios = Accesorio.objects.in_bulk(accesorio_ids)
+        if len(accesorios) != len(accesorio_ids):
+            raise Http404('No Accesorio matches the given query.')
+
+    total = Decimal('0.00')
+    lineas = []
+    for item in items:
+        vehiculo = vehiculos[item['vehiculo_id']]
+        linea = LineaVehiculo(vehiculo, matriz.precio_vehiculo(vehiculo, ahora))
+        total += linea.precio
+
+        for acc_id in item.get('accesorios', []):
+            accesorio = accesorios[acc_id]
+            precio = matriz.precio_accesorio(vehiculo.modelo_id, accesorio.id)
+            total += precio
+            linea.accesorios.append(LineaAccesorio(accesorio, precio))
+
+        lineas.append(linea)
+
+    return ResultadoCotizacion(lineas, total)
@@ -0,0 +1,105 @@
+"""
+Presupuestos de consultas por endpoint
+
+Cada listado y detalle de la API hace un número fijo de consultas, sin
+importar cuántas filas devuelve: el plan de carga de su viewset
+(`plan_carga`, ver core/seleccion.py) trae cada relación anidada en una
+sola consulta. `PRESUPUESTOS` declara el máximo de cada endpoint y
+`PresupuestoConsultasMixin` lo verifica en los tests con varios tamaños
+de página sobre un dataset de core/generador.py. Si alguien agrega una
+relación perezosa a un serializer (o la saca del plan) las consultas
+crecen con la página y el test falla mostrando las repetidas.
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+
+from django.db import connection
+
+from .consultas_lentas import forma
+
+
+@dataclass
+class Presupuesto:
+    ruta: str
+    consultas: int
+    # Tipo de usuario que hace el pedido ('CLIENTE', 'VENDEDOR') o None si es anónimo
+    usuario: str = None
+    params: dict = field(default_factory=dict)
+
+    @property
+    def nombre(self):
+        return f"{self.ruta} {self.usuario or 'anónimo'} {self.params or ''}".strip()
+
+
+PRESUPUESTOS = [
+    Presupuesto('vehiculo-list', 1),
+    Presupuesto('vehiculo-list', 1, params={'estado': 'DISPONIBLE'}),
+    Presupuesto('vehiculo-list', 1, params={'q': 'toyota'}),
+    Presupuesto('vehiculo-detail', 1),
+    Presupuesto('accesorio-list', 1),
+    # Cotizaciones, líneas de vehículos y líneas de accesorios
+    Presupuesto('cotizacion-list', 3, 'CLIENTE'),
+    Presupuesto('cotizacion-list', 3, 'VENDEDOR'),
+    Presupuesto('cotizacion-list', 1, 'VENDEDOR', {'fields': 'id,importe_final'}),
+    Presupuesto('cotizacion-detail', 3, 'VENDEDOR'),
+    Presupuesto('cotizacion-historial', 1, 'VENDEDOR'),
+    Presupuesto('reserva-list', 1, 'CLIENTE'),
+    Presupuesto('reserva-list', 1, 'VENDEDOR'),
+    Presupuesto('reserva-detail', 1, 'VENDEDOR'),
+    Presupuesto('venta-list', 1, 'VENDEDOR'),
+    Presupuesto('venta-detail', 1, 'VENDEDOR'),
+]
+
+
+def contar_consultas(client, url, params=None):
+    """Respuesta de GET `url` y el SQL de cada consulta que hizo, sin los valores"""
+    consultas = []
+
+    def registrar(execute, sql, params, many, context):
+        consultas.append(sql)
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(registrar):
+        response = client.get(url, params)
+    return response, consultas
+
+
+class PresupuestoConsultasMixin:
+    """
+    Para TestCase: `assertPresupuestoConsultas` pide un endpoint con cada
+    tamaño de página de `tamanios_pagina` y exige que haga siempre la misma
+    cantidad de consultas, como mucho `consultas`
+    """
+    tamanios_pagina = (1, 10, 100)
+
+    def assertPresupuestoConsultas(self, url, consultas, params=None):
+        params = dict(params or {})
+        # Los caches por proceso (matriz de precios, índices) se llenan antes de contar
+        self.assertEqual(self.client.get(url, params).status_code, 200)
+        medidas = {}
+        for tamanio in self.tamanios_pagina:
+            response, sql = contar_consultas(self.client, url, {**params, 'page_size': tamanio})
+            self.assertEqual(response.status_code, 200)
+            filas = response.data.get('results') if isinstance(response.data, dict) else None
+            medidas[tamanio] = (sql, filas)
+
+        cantidades = {tamanio: len(sql) for tamanio, (sql, _) in medidas.items()}
+        sql, filas = medidas[max(medidas)]
+        if filas is not None:
+            # Con una sola fila por página el presupuesto no prueba nada
+            self.assertGreater(len(filas), 1, f'{url}: el dataset no llena más de una fila')
+        # Las consultas N+1 tienen la misma forma (ver core/consultas_lentas.py)
+        formas = Counter(map(forma, sql))
+        repetidas = {forma(consulta): consulta for consulta in sql if formas[forma(consulta)] > 1}
+        detalle = '\n'.join(
+            [f'{formas[clave]}x {consulta}' for clave, consulta in repetidas.items()] or sql
+        )
+        self.assertEqual(
+            len(set(cantidades.values())), 1,
+            f'{url}: las consultas crecen con la página {cantidades}\n{detalle}',
+        )
+        self.assertLessEqual(
+            cantidades[max(medidas)], consultas,
+            f'{url}: {cantidades[max(medidas)]} consultas, presupuesto {consultas}\n{detalle}',
+        )
@@ -0,0 +1,73 @@
+"""
+Renderers de la API: JSON con orjson y MessagePack
+
+ORJSONRenderer produce los mismos bytes que el JSONRenderer de DRF
+(compacto, UTF-8, con U+2028/U+2029 escapados) pero serializa dicts,
+listas, strings, UUID y números en C. Los tipos que orjson no resuelve
+igual que DRF pasan por su mismo encoder: Decimal como número (los
+DecimalField ya llegan como string), datetime con milisegundos y 'Z',
+date y time, y los perezosos de Django. Si el cliente pide indentación
+(`application/json; indent=4`) o algo no serializable por orjson (enteros
+de más de 64 bits), renderiza DRF; también con UNICODE_JSON o
+COMPACT_JSON desactivados.
+
+MessagePackRenderer (`Accept: application/msgpack`) entrega los mismos
+valores que el JSON en formato binario. msgpack es opcional: sin el
+paquete el renderer no se ofrece (ver REST_FRAMEWORK en settings).
+"""
+
+from decimal import Decimal
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+_encoder = JSONEncoder()
+
+
+def convertir(obj):
+    """Valor serializable de `obj` como lo deja el encoder de DRF"""
+    # Decimal es lo más frecuente (SerializerMethodField, totales): evita la cadena de isinstance
+    if type(obj) is Decimal:
+        return float(obj)
+    return _encoder.default(obj)
+
+
+class ORJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (orjson is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=convertir, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Igual que DRF: separadores de línea escapados para poder incrustarlo en JavaScript.
+        # Buscar primero el byte inicial (memchr) evita recorrer dos veces casi siempre
+        if b'\xe2' in ret and (b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret):
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=convertir, use_bin_type=True, datetime=False)
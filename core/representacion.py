@@ -0,0 +1,200 @@
+"""
+Serialización rápida de listados con planes de campos precomputados
+
+DRF resuelve cada campo de cada fila por su maquinaria genérica:
+get_attribute con la lista de atributos, SkipField, PKOnlyObject,
+to_representation. En una página de cotizaciones con vehículos y
+accesorios anidados eso domina el CPU del listado.
+
+`ListaRapidaSerializer` (Meta.list_serializer_class) arma una vez por
+listado el plan del serializer hijo, una lista de tuplas
+(nombre, obtener, convertir), y cada fila es un recorrido de esa lista:
+
+- campos del modelo, FK (pk) y fuentes con puntos que recorren FK:
+  `operator.attrgetter` en lugar de get_attribute,
+- `convertir` es el `to_representation` del propio campo (None para
+  ReadOnlyField y la pk de una FK); los DateTimeField con la zona
+  horaria actual fijada al armar el plan,
+- SerializerMethodField: el método del serializer, con su contexto,
+- serializers anidados (también many=True): su propio plan; las FK
+  inversas se leen de prefetch_related sin crear el manager y un detalle
+  anidado por FK se arma una vez por pk en cada listado.
+
+Cualquier otro campo (callables, propiedades, relaciones no simples)
+usa la misma lógica que DRF, así que la salida es idéntica campo a campo
+(ver TestSerializacionRapida). Sirve igual para instancias de modelos con
+select_related/prefetch_related y para las filas de core/instantanea.py.
+"""
+
+import operator
+
+from django.core.exceptions import FieldDoesNotExist, ObjectDoesNotExist
+from django.db.models import ForeignKey, OneToOneField
+from django.db.models.fields.reverse_related import ForeignObjectRel, ManyToOneRel
+from django.db.models.manager import BaseManager
+from rest_framework import fields, relations, serializers
+from rest_framework.fields import SkipField
+
+OMITIR = object()
+
+
+def _campo_modelo(serializer, atributos):
+    """
+    Campo del modelo al que lleva la fuente (nombre o attname), recorriendo
+    FK hacia adelante si tiene puntos; None si no es un campo del modelo
+    """
+    modelo = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    if modelo is None:
+        return None
+    try:
+        for atributo in atributos[:-1]:
+            relacion = modelo._meta.get_field(atributo)
+            if not isinstance(relacion, (ForeignKey, OneToOneField)) or relacion.name != atributo:
+                return None
+            modelo = relacion.related_model
+        campo = modelo._meta.get_field(atributos[-1])
+    except FieldDoesNotExist:
+        return None
+    if len(atributos) > 1 and campo.is_relation:
+        return None
+    return campo
+
+
+def _ruta(campo):
+    """Fuente con puntos que recorre FK; si un intermedio falta decide get_attribute como en DRF"""
+    leer = operator.attrgetter(campo.source)
+
+    def obtener(obj):
+        try:
+            return leer(obj)
+        except (AttributeError, ObjectDoesNotExist):
+            # None si el objeto no existe; default, null u omitir si un intermedio es None
+            try:
+                return campo.get_attribute(obj)
+            except SkipField:
+                return OMITIR
+    return obtener
+
+
+def _relacion(relacion):
+    """
+    Filas de una FK inversa: las de prefetch_related si están cargadas (lo
+    mismo que devuelve el manager, sin crearlo) o las del manager si no
+    """
+    accesor = relacion.get_accessor_name()
+
+    def obtener(obj):
+        try:
+            return obj._prefetched_objects_cache[accesor]
+        except (AttributeError, KeyError):
+            return getattr(obj, accesor).all()
+    return obtener
+
+
+def _generico(campo):
+    """Igual que Serializer.to_representation de DRF para un campo cualquiera"""
+    def convertir(obj):
+        try:
+            valor = campo.get_attribute(obj)
+        except SkipField:
+            return OMITIR
+        if isinstance(valor, relations.PKOnlyObject):
+            return None if valor.pk is None else campo.to_representation(valor)
+        return None if valor is None else campo.to_representation(valor)
+    return None, convertir
+
+
+def _conversor(campo):
+    if isinstance(campo, fields.ReadOnlyField):
+        return None
+    if isinstance(campo, fields.DateTimeField) and not hasattr(campo, 'timezone'):
+        # Como DateTimeField(default_timezone=...): la zona actual se resuelve una vez por
+        # listado y no en cada fila (el campo es la copia de este serializer)
+        zona = campo.default_timezone()
+        if zona is not None:
+            campo.timezone = zona
+    return campo.to_representation
+
+
+def compilar(serializer, nombre, campo):
+    """
+    (nombre, obtener, convertir) de un campo legible de `serializer`. `obtener`
+    lee el valor de la instancia (puede devolver OMITIR) y `convertir` lo
+    representa si no es None; sin `obtener`, `convertir` recibe la instancia y
+    puede devolver OMITIR (SerializerMethodField y campos genéricos)
+    """
+    if isinstance(campo, fields.SerializerMethodField):
+        return nombre, None, getattr(serializer, campo.method_name)
+
+    if campo.source == '*':
+        return (nombre, *_generico(campo))
+    modelo_campo = _campo_modelo(serializer, campo.source_attrs)
+    if modelo_campo is None:
+        return (nombre, *_generico(campo))
+    if len(campo.source_attrs) > 1:
+        if isinstance(campo, (serializers.BaseSerializer, serializers.RelatedField)):
+            return (nombre, *_generico(campo))
+        return nombre, _ruta(campo), _conversor(campo)
+
+    if isinstance(campo, serializers.ListSerializer):
+        if isinstance(modelo_campo, ManyToOneRel) and modelo_campo.get_accessor_name() == campo.source:
+            return nombre, _relacion(modelo_campo), PlanLectura(campo.child).lista
+        return nombre, operator.attrgetter(campo.source), PlanLectura(campo.child).lista
+    if isinstance(modelo_campo, ForeignObjectRel):
+        return (nombre, *_generico(campo))
+    if isinstance(campo, serializers.BaseSerializer):
+        return nombre, operator.attrgetter(campo.source), PlanLectura(campo).representar_por_pk
+    if isinstance(modelo_campo, (ForeignKey, OneToOneField)) and modelo_campo.name == campo.source:
+        if isinstance(campo, relations.PrimaryKeyRelatedField) and campo.pk_field is None:
+            return nombre, operator.attrgetter(modelo_campo.attname), None
+        return (nombre, *_generico(campo))
+    if isinstance(campo, serializers.RelatedField):
+        return (nombre, *_generico(campo))
+    return nombre, operator.attrgetter(campo.source), _conversor(campo)
+
+
+class PlanLectura:
+    """Campos legibles de un serializer como tuplas (nombre, obtener, convertir)"""
+
+    def __init__(self, serializer):
+        self.campos = [compilar(serializer, campo.field_name, campo) for campo in serializer._readable_fields]
+        self.por_pk = {}
+
+    def representar(self, obj):
+        fila = {}
+        for nombre, obtener, convertir in self.campos:
+            if obtener is None:
+                valor = convertir(obj)
+            else:
+                valor = obtener(obj)
+                if valor is not None and valor is not OMITIR and convertir is not None:
+                    valor = convertir(valor)
+            if valor is not OMITIR:
+                fila[nombre] = valor
+        return fila
+
+    def representar_por_pk(self, obj):
+        """
+        Para detalles anidados (el mismo accesorio o vehículo en muchas líneas):
+        cada pk se arma una vez por listado; las filas vienen de la misma consulta
+        """
+        pk = obj.pk
+        if pk is None:
+            return self.representar(obj)
+        fila = self.por_pk.get(pk)
+        if fila is None:
+            fila = self.por_pk[pk] = self.representar(obj)
+        return dict(fila)
+
+    def lista(self, datos):
+        if isinstance(datos, BaseManager):
+            datos = datos.all()
+        representar = self.representar
+        return [representar(obj) for obj in datos]
+
+
+class ListaRapidaSerializer(serializers.ListSerializer):
+    """ListSerializer de solo lectura que representa las filas con un PlanLectura del hijo"""
+
+    def to_representation(self, data):
+        return PlanLectura(self.child).lista(data)
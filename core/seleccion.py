@@ -0,0 +1,268 @@
+"""
+Campos selectivos (?fields= / ?expand=) y consultas recortadas a lo que se serializa
+
+Sin parámetros la respuesta es la de siempre. Con cualquiera de los dos
+el cliente elige qué recibe:
+
+- `?fields=id,importe_final,vehiculos.vehiculo_detalle.anio`: solo esos
+  campos; con puntos se eligen campos dentro de un serializer anidado
+  (nombrar un anidado lo incluye),
+- `?expand=vehiculos.vehiculo_detalle`: los serializers anidados
+  (líneas, detalles de vehículo, accesorio o pago) se omiten salvo que se
+  expandan o se nombren en `fields`. `?expand=` vacío devuelve solo los
+  campos propios.
+
+Los nombres desconocidos se ignoran y la selección solo se aplica a GET y
+HEAD (las escrituras validan con todos los campos). CamposSelectivosMixin
+recorta los campos de cada serializer según su lugar en la respuesta.
+
+CargaSelectivaMixin arma el queryset de list y retrieve desde los campos
+que quedaron: only() con las columnas leídas, select_related para las FK
+que se recorren (fuentes con puntos y detalles anidados) y
+prefetch_related para las líneas de relaciones inversas, con su propio
+only()/select_related. Los SerializerMethodField declaran lo que leen en
+`Meta.carga` ({campo: (rutas estilo lookup, ...)}; 'oferta__*' es la FK
+con todas sus columnas); cualquier campo que no se pueda resolver carga
+todas las columnas de su modelo.
+
+Cada viewset declara explícitamente su plan de carga (`plan_carga`: las
+relaciones que se traen por adelantado, como en select_related /
+prefetch_related). Se cargan solo las del plan que la respuesta lee: una
+relación que no se pide no se consulta y una que el serializer lee pero
+no está en el plan queda perezosa, cosa que detectan los presupuestos de
+consultas de core/presupuesto.py.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+PARAMETRO_CAMPOS = 'fields'
+PARAMETRO_EXPANDIR = 'expand'
+
+
+def arbol(valores):
+    """['a,b.c', 'b.d'] -> {'a': {}, 'b': {'c': {}, 'd': {}}}"""
+    raiz = {}
+    for valor in valores:
+        for ruta in valor.split(','):
+            nodo = raiz
+            for nombre in ruta.split('.'):
+                nombre = nombre.strip()
+                if nombre:
+                    nodo = nodo.setdefault(nombre, {})
+    return raiz
+
+
+class Seleccion:
+    """Campos pedidos en un nivel de la respuesta: `campos` None son todos los propios"""
+
+    def __init__(self, campos, expandir):
+        self.campos = campos
+        self.expandir = expandir
+
+    @classmethod
+    def de_request(cls, request):
+        """Selección de ?fields= / ?expand=; None si no se pidió ninguna"""
+        params = request.query_params
+        if request.method not in ('GET', 'HEAD') or (
+                PARAMETRO_CAMPOS not in params and PARAMETRO_EXPANDIR not in params):
+            return None
+        return cls(arbol(params.getlist(PARAMETRO_CAMPOS)) or None, arbol(params.getlist(PARAMETRO_EXPANDIR)))
+
+    def incluye(self, nombre, anidado):
+        if self.campos is not None:
+            return nombre in self.campos
+        return not anidado or nombre in self.expandir
+
+    def hija(self, nombre):
+        campos = self.campos.get(nombre) if self.campos is not None else None
+        return Seleccion(campos or None, self.expandir.get(nombre, {}))
+
+
+def seleccion(serializer):
+    """Seleccion que le toca a `serializer` (raíz o anidado) según el request del contexto"""
+    contexto = serializer.context
+    if 'seleccion' not in contexto:
+        request = contexto.get('request')
+        contexto['seleccion'] = None if request is None else Seleccion.de_request(request)
+    actual = contexto['seleccion']
+    if actual is None:
+        return None
+    ruta = []
+    while serializer.parent is not None:
+        # El hijo de un ListSerializer no tiene nombre propio
+        if serializer.field_name:
+            ruta.append(serializer.field_name)
+        serializer = serializer.parent
+    for nombre in reversed(ruta):
+        actual = actual.hija(nombre)
+    return actual
+
+
+class CamposSelectivosMixin:
+    """ModelSerializer que quita los campos que no pide ?fields= / ?expand="""
+
+    def get_fields(self):
+        campos = super().get_fields()
+        actual = seleccion(self)
+        if actual is None:
+            return campos
+        return {
+            nombre: campo for nombre, campo in campos.items()
+            if actual.incluye(nombre, isinstance(campo, serializers.BaseSerializer))
+        }
+
+
+# ==================== CARGA ====================
+
+class Carga:
+    """Columnas (None: todas) y relaciones de un modelo que lee un serializer"""
+
+    def __init__(self, modelo):
+        self.modelo = modelo
+        self.columnas = set()
+        self.unir = {}
+        self.precargar = {}
+
+    def agregar(self, ruta):
+        """Agrega una ruta estilo lookup: 'precio', 'modelo__marca__nombre', 'oferta__*'"""
+        nombre, _, resto = ruta.partition('__')
+        if nombre == '*':
+            self.columnas = None
+            return
+        try:
+            campo = self.modelo._meta.get_field(nombre)
+        except FieldDoesNotExist:
+            # Propiedades, métodos o anotaciones: no se sabe qué leen
+            self.columnas = None
+            return
+        if not campo.is_relation:
+            self._columna(campo.name)
+        elif campo.concrete and (campo.many_to_one or campo.one_to_one):
+            self._columna(campo.name)
+            if resto:
+                self._hija(self.unir, campo.name, campo.related_model).agregar(resto)
+        elif campo.one_to_one:
+            # OneToOne inversa: también se une
+            self._hija(self.unir, campo.name, campo.related_model).agregar(resto or '*')
+        else:
+            # Relaciones inversas por su accesor; ManyToManyField por su nombre
+            accesor = campo.get_accessor_name() if campo.auto_created else campo.name
+            hija = self._hija(self.precargar, accesor, campo.related_model)
+            if campo.one_to_many:
+                # La FK hacia este modelo reparte las filas precargadas
+                hija._columna(campo.field.name)
+            hija.agregar(resto or '*')
+
+    def _columna(self, nombre):
+        if self.columnas is not None:
+            self.columnas.add(nombre)
+
+    def _hija(self, relaciones, nombre, modelo):
+        if nombre not in relaciones:
+            relaciones[nombre] = Carga(modelo)
+        return relaciones[nombre]
+
+    def podar(self, plan, prefijo=''):
+        """Quita las relaciones que no están en `plan` (rutas estilo lookup y sus prefijos)"""
+        for relaciones in (self.unir, self.precargar):
+            for nombre in list(relaciones):
+                ruta = f'{prefijo}{nombre}'
+                if ruta in plan:
+                    relaciones[nombre].podar(plan, f'{ruta}__')
+                else:
+                    del relaciones[nombre]
+
+    def solo(self, prefijo=''):
+        """Argumentos de only() para este modelo y los que se unen"""
+        if self.columnas is None:
+            # Se listan igual: nombrar una relación unida restringe su modelo
+            yield from (f'{prefijo}{campo.name}' for campo in self.modelo._meta.concrete_fields)
+        else:
+            yield from (f'{prefijo}{nombre}' for nombre in sorted(self.columnas))
+        for nombre, hija in self.unir.items():
+            yield from hija.solo(f'{prefijo}{nombre}__')
+
+    def uniones(self, prefijo=''):
+        for nombre, hija in self.unir.items():
+            yield f'{prefijo}{nombre}'
+            yield from hija.uniones(f'{prefijo}{nombre}__')
+
+    def precargas(self, prefijo=''):
+        for accesor, hija in self.precargar.items():
+            yield Prefetch(f'{prefijo}{accesor}', queryset=hija.aplicar(hija.modelo._default_manager.all()))
+        for nombre, hija in self.unir.items():
+            yield from hija.precargas(f'{prefijo}{nombre}__')
+
+    def aplicar(self, queryset):
+        uniones = list(self.uniones())
+        if uniones:
+            queryset = queryset.select_related(*uniones)
+        precargas = list(self.precargas())
+        if precargas:
+            queryset = queryset.prefetch_related(*precargas)
+        return queryset.only(*self.solo())
+
+
+def rutas(serializer):
+    """Rutas estilo lookup de lo que leen los campos legibles de `serializer`"""
+    pistas = getattr(getattr(serializer, 'Meta', None), 'carga', {})
+    for campo in serializer._readable_fields:
+        if campo.field_name in pistas:
+            yield from pistas[campo.field_name]
+            continue
+        if isinstance(campo, serializers.SerializerMethodField) or campo.source == '*':
+            yield '*'
+            continue
+        fuente = '__'.join(campo.source_attrs)
+        anidado = campo.child if isinstance(campo, serializers.ListSerializer) else campo
+        if isinstance(anidado, serializers.ModelSerializer):
+            yield from (f'{fuente}__{ruta}' for ruta in rutas(anidado))
+        elif isinstance(anidado, serializers.BaseSerializer):
+            yield f'{fuente}__*'
+        else:
+            yield fuente
+
+
+def prefijos(plan):
+    """('a__b__c',) -> {'a', 'a__b', 'a__b__c'}"""
+    resultado = set()
+    for ruta in plan:
+        partes = ruta.split('__')
+        resultado.update('__'.join(partes[:i]) for i in range(1, len(partes) + 1))
+    return resultado
+
+
+def cargar(queryset, serializer, plan=(), ordering=()):
+    """`queryset` con las columnas que lee `serializer` y las relaciones de `plan` que usa (ver Carga)"""
+    carga = Carga(queryset.model)
+    for ruta in rutas(serializer):
+        carga.agregar(ruta)
+    carga.podar(prefijos(plan))
+    if isinstance(ordering, str):
+        ordering = [ordering]
+    for campo in ordering or ():
+        # El paginador lee el campo de orden de la última fila para el cursor
+        try:
+            queryset.model._meta.get_field(campo.lstrip('-'))
+        except FieldDoesNotExist:
+            continue
+        carga.agregar(campo.lstrip('-'))
+    return carga.aplicar(queryset)
+
+
+class CargaSelectivaMixin:
+    """
+    list y retrieve con el queryset recortado a los campos que se van a
+    serializar (respetando ?fields= / ?expand=) y las relaciones de
+    `plan_carga` que esos campos leen
+    """
+    plan_carga = ()
+    acciones_carga = ('list', 'retrieve')
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action not in self.acciones_carga:
+            return queryset
+        return cargar(queryset, self.get_serializer(), self.plan_carga, getattr(self, 'ordering', None))
@@ -2,9 +2,13 @@ from rest_framework import serializers
 from .models import (
     Usuario, Cliente, Vendedor, Marca, Modelo, Vehiculo, Accesorio,
     ModeloAccesorio, Oferta, Cotizacion, CotizacionVehiculo,
-    CotizacionAccesorio, Reserva, Venta, Pago
+    CotizacionAccesorio, CotizacionArchivada, Reserva, Venta, Pago, VehiculoCatalogo
 )
+from .autocompletado import TIPOS as TIPOS_AUTOCOMPLETADO
+from .representacion import ListaRapidaSerializer
+from .seleccion import CamposSelectivosMixin
 from django.contrib.auth import authenticate
+from django.utils import timezone
 
 # ==================== USUARIOS Y AUTH ====================
 
@@ -66,7 +70,7 @@ class OfertaSerializer(serializers.ModelSerializer):
         model = Oferta
         fields = '__all__'
 
-class VehiculoSerializer(serializers.ModelSerializer):
+class VehiculoSerializer(CamposSelectivosMixin, serializers.ModelSerializer):
     modelo_nombre = serializers.CharField(source='modelo.nombre', read_only=True)
     marca_nombre = serializers.CharField(source='modelo.marca.nombre', read_only=True)
     precio_con_oferta = serializers.SerializerMethodField()
@@ -74,11 +78,38 @@ class VehiculoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Vehiculo
         fields = '__all__'
+        # Listados con plan de campos precompilado (ver core/representacion.py)
+        list_serializer_class = ListaRapidaSerializer
+        # Lo que lee cada SerializerMethodField (ver core/seleccion.py)
+        carga = {'precio_con_oferta': ('precio', 'oferta__*')}
     
     def get_precio_con_oferta(self, obj):
         return obj.get_precio_con_oferta()
 
-class AccesorioSerializer(serializers.ModelSerializer):
+class VehiculoCatalogoSerializer(CamposSelectivosMixin, serializers.ModelSerializer):
+    """Lectura desde el catálogo desnormalizado, con la misma salida que VehiculoSerializer"""
+    id = serializers.ReadOnlyField(source='vehiculo_id')
+    precio_con_oferta = serializers.SerializerMethodField()
+    modelo = serializers.ReadOnlyField(source='modelo_id')
+    oferta = serializers.ReadOnlyField(source='oferta_id')
+    
+    class Meta:
+        model = VehiculoCatalogo
+        fields = [
+            'id', 'modelo_nombre', 'marca_nombre', 'precio_con_oferta', 'nro_chasis',
+            'precio', 'descripcion', 'anio', 'imagen', 'estado', 'eliminado',
+            'created_at', 'updated_at', 'modelo', 'oferta'
+        ]
+        read_only_fields = fields
+        list_serializer_class = ListaRapidaSerializer
+        carga = {'precio_con_oferta': ('precio', 'precio_con_oferta', 'oferta_id', 'oferta_inicio', 'oferta_fin')}
+    
+    def get_precio_con_oferta(self, obj):
+        # Un único timezone.now() por respuesta
+        ahora = self.context.get('ahora') or self.context.setdefault('ahora', timezone.now())
+        return obj.get_precio_con_oferta(ahora)
+
+class AccesorioSerializer(CamposSelectivosMixin, serializers.ModelSerializer):
     class Meta:
         model = Accesorio
         fields = '__all__'
@@ -92,21 +123,37 @@ class ModeloAccesorioSerializer(serializers.ModelSerializer):
 
 # ==================== COTIZACIONES ====================
 
-class CotizacionVehiculoSerializer(serializers.ModelSerializer):
+class FiltroFacetasSerializer(serializers.Serializer):
+    """Filtros de /api/vehiculos/facetas/; cada faceta acepta varios valores (?marca=A&marca=B)"""
+    marca = serializers.ListField(child=serializers.CharField(), required=False)
+    modelo = serializers.ListField(child=serializers.UUIDField(), required=False)
+    anio = serializers.ListField(child=serializers.IntegerField(), required=False)
+    estado = serializers.ListField(child=serializers.ChoiceField(choices=Vehiculo.ESTADO_CHOICES), required=False)
+    oferta = serializers.ListField(child=serializers.BooleanField(), required=False)
+    precio_min = serializers.DecimalField(max_digits=12, decimal_places=2, required=False)
+    precio_max = serializers.DecimalField(max_digits=12, decimal_places=2, required=False)
+
+class AutocompletarSerializer(serializers.Serializer):
+    """Parámetros de /api/autocompletar/; sin `tipo` se buscan todos (?tipo=marca&tipo=modelo)"""
+    q = serializers.CharField(max_length=100)
+    tipo = serializers.ListField(child=serializers.ChoiceField(choices=TIPOS_AUTOCOMPLETADO), required=False)
+    limite = serializers.IntegerField(min_value=1, max_value=50, default=10)
+
+class CotizacionVehiculoSerializer(CamposSelectivosMixin, serializers.ModelSerializer):
     vehiculo_detalle = VehiculoSerializer(source='vehiculo', read_only=True)
     
     class Meta:
         model = CotizacionVehiculo
         fields = ['id', 'vehiculo', 'vehiculo_detalle', 'precio_unitario']
 
-class CotizacionAccesorioSerializer(serializers.ModelSerializer):
+class CotizacionAccesorioSerializer(CamposSelectivosMixin, serializers.ModelSerializer):
     accesorio_detalle = AccesorioSerializer(source='accesorio', read_only=True)
     
     class Meta:
         model = CotizacionAccesorio
         fields = ['id', 'accesorio', 'accesorio_detalle', 'precio_unitario', 'cotizacion_vehiculo']
 
-class CotizacionSerializer(serializers.ModelSerializer):
+class CotizacionSerializer(CamposSelectivosMixin, serializers.ModelSerializer):
     vehiculos = CotizacionVehiculoSerializer(many=True, read_only=True)
     accesorios = CotizacionAccesorioSerializer(many=True, read_only=True)
     
@@ -114,6 +161,16 @@ class CotizacionSerializer(serializers.ModelSerializer):
         model = Cotizacion
         fields = '__all__'
         read_only_fields = ['fecha_hora_generada', 'importe_final', 'valida', 'fecha_hora_vencimiento']
+        list_serializer_class = ListaRapidaSerializer
+
+class CotizacionArchivadaSerializer(serializers.ModelSerializer):
+    """Misma forma que CotizacionSerializer; las líneas salen de `detalle`"""
+    vehiculos = serializers.ReadOnlyField(source='detalle.vehiculos')
+    accesorios = serializers.ReadOnlyField(source='detalle.accesorios')
+    
+    class Meta:
+        model = CotizacionArchivada
+        exclude = ['detalle']
 
 class ItemCotizacionSerializer(serializers.Serializer):
     vehiculo_id = serializers.UUIDField()
@@ -134,15 +191,30 @@ class GenerarCotizacionSerializer(serializers.Serializer):
     )
     cliente_id = serializers.UUIDField(required=False)  # Para vendedores
 
+class GenerarCotizacionFlotaSerializer(serializers.Serializer):
+    """Cotización de flota: mismo formato que GenerarCotizacionSerializer, hasta 500 vehículos"""
+    vehiculos = serializers.ListField(
+        child=ItemCotizacionSerializer(),
+        min_length=1,
+        max_length=500
+    )
+    cliente_id = serializers.UUIDField(required=False)  # Para vendedores
+    
+    def validate_vehiculos(self, value):
+        ids = [item['vehiculo_id'] for item in value]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError('Un vehículo no puede repetirse en la cotización')
+        return value
+
 # ==================== RESERVAS Y VENTAS ====================
 
-class PagoSerializer(serializers.ModelSerializer):
+class PagoSerializer(CamposSelectivosMixin, serializers.ModelSerializer):
     class Meta:
         model = Pago
         fields = '__all__'
         read_only_fields = ['nro_pago', 'fecha_hora_generado']
 
-class ReservaSerializer(serializers.ModelSerializer):
+class ReservaSerializer(CamposSelectivosMixin, serializers.ModelSerializer):
     pago_detalle = PagoSerializer(source='pago', read_only=True)
     
     class Meta:
@@ -150,7 +222,7 @@ class ReservaSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ['nro_reserva', 'fecha_hora_generada', 'estado', 'fecha_hora_vencimiento']
 
-class VentaSerializer(serializers.ModelSerializer):
+class VentaSerializer(CamposSelectivosMixin, serializers.ModelSerializer):
     pago_detalle = PagoSerializer(source='pago', read_only=True)
     vendedor_nombre = serializers.CharField(source='vendedor.nombre', read_only=True)
     
@@ -0,0 +1,178 @@
+"""
+Señales del sistema FLY CAR
+
+`vehiculos_actualizados` se envía cuando se modifican vehículos con
+UPDATE masivos (que no disparan post_save), con `ids` de los afectados.
+"""
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete, post_migrate
+from django.dispatch import Signal, receiver
+
+from . import autocompletado, busqueda, catalogo, condicional, consultas_lentas, facetas, instantanea, versiones
+from .models import (
+    Vehiculo, Modelo, Marca, Oferta, Accesorio, ModeloAccesorio, Cliente, Cotizacion, Reserva, Pago
+)
+
+vehiculos_actualizados = Signal()
+
+
+# ==================== CATÁLOGO ====================
+
+@receiver(post_save, sender=Vehiculo, dispatch_uid='catalogo_vehiculo')
+def catalogo_vehiculo_guardado(sender, instance, raw=False, **kwargs):
+    if not raw:
+        catalogo.sincronizar_vehiculos([instance.pk])
+
+
+@receiver(vehiculos_actualizados, dispatch_uid='catalogo_vehiculos_actualizados')
+def catalogo_vehiculos_actualizados(sender, ids, **kwargs):
+    catalogo.sincronizar_vehiculos(ids)
+
+
+@receiver(post_save, sender=Modelo, dispatch_uid='catalogo_modelo')
+def catalogo_modelo_guardado(sender, instance, raw=False, **kwargs):
+    if not raw:
+        catalogo.actualizar_modelo(instance)
+
+
+@receiver(post_save, sender=Marca, dispatch_uid='catalogo_marca')
+def catalogo_marca_guardada(sender, instance, raw=False, **kwargs):
+    if not raw:
+        catalogo.actualizar_marca(instance)
+
+
+@receiver(post_save, sender=Oferta, dispatch_uid='catalogo_oferta')
+def catalogo_oferta_guardada(sender, instance, raw=False, **kwargs):
+    if not raw:
+        catalogo.sincronizar_vehiculos_de(oferta_id=instance.pk)
+
+
+@receiver(post_delete, sender=Oferta, dispatch_uid='catalogo_oferta_eliminada')
+def catalogo_oferta_eliminada(sender, instance, **kwargs):
+    catalogo.quitar_oferta(instance.pk)
+
+
+# ==================== BÚSQUEDA DE TEXTO ====================
+
+@receiver(post_migrate, dispatch_uid='busqueda_fts')
+def instalar_busqueda(sender, using, **kwargs):
+    # En post_migrate y no en una migración: los tests corren con --nomigrations
+    if sender.name == 'core':
+        busqueda.instalar(connections[using])
+
+
+# ==================== ÍNDICE DE FACETAS ====================
+
+@receiver(post_save, sender=Vehiculo, dispatch_uid='facetas_vehiculo')
+@receiver(post_delete, sender=Vehiculo, dispatch_uid='facetas_vehiculo_eliminado')
+def facetas_vehiculo_guardado(sender, instance, raw=False, **kwargs):
+    if not raw:
+        facetas.actualizar([instance.pk])
+
+
+@receiver(vehiculos_actualizados, dispatch_uid='facetas_vehiculos_actualizados')
+def facetas_vehiculos_actualizados(sender, ids, **kwargs):
+    facetas.actualizar(ids)
+
+
+@receiver(post_save, sender=Modelo, dispatch_uid='facetas_modelo')
+@receiver(post_save, sender=Marca, dispatch_uid='facetas_marca')
+@receiver(post_save, sender=Oferta, dispatch_uid='facetas_oferta')
+@receiver(post_delete, sender=Oferta, dispatch_uid='facetas_oferta_eliminada')
+def facetas_invalidadas(sender, **kwargs):
+    facetas.invalidar()
+
+
+# ==================== AUTOCOMPLETADO ====================
+
+@receiver(post_save, sender=Marca, dispatch_uid='autocompletado_marca')
+@receiver(post_save, sender=Modelo, dispatch_uid='autocompletado_modelo')
+@receiver(post_save, sender=Cliente, dispatch_uid='autocompletado_cliente')
+def autocompletado_modificado(sender, raw=False, **kwargs):
+    if not raw:
+        autocompletado.modificado()
+
+
+@receiver(post_delete, sender=Marca, dispatch_uid='autocompletado_marca_eliminada')
+@receiver(post_delete, sender=Modelo, dispatch_uid='autocompletado_modelo_eliminado')
+@receiver(post_delete, sender=Cliente, dispatch_uid='autocompletado_cliente_eliminado')
+def autocompletado_eliminado(sender, **kwargs):
+    autocompletado.invalidar()
+
+
+# ==================== RESPUESTAS CONDICIONALES ====================
+
+@receiver(post_save, sender=Vehiculo, dispatch_uid='condicional_vehiculo')
+@receiver(post_delete, sender=Vehiculo, dispatch_uid='condicional_vehiculo_eliminado')
+@receiver(vehiculos_actualizados, dispatch_uid='condicional_vehiculos_actualizados')
+@receiver(post_save, sender=Modelo, dispatch_uid='condicional_modelo')
+@receiver(post_save, sender=Marca, dispatch_uid='condicional_marca')
+@receiver(post_save, sender=Oferta, dispatch_uid='condicional_oferta')
+@receiver(post_delete, sender=Oferta, dispatch_uid='condicional_oferta_eliminada')
+def condicional_vehiculos(sender, **kwargs):
+    condicional.invalidar('vehiculos')
+
+
+@receiver(post_save, sender=Accesorio, dispatch_uid='condicional_accesorio')
+@receiver(post_delete, sender=Accesorio, dispatch_uid='condicional_accesorio_eliminado')
+def condicional_accesorios(sender, **kwargs):
+    condicional.invalidar('accesorios')
+
+
+@receiver(post_save, sender=Cotizacion, dispatch_uid='condicional_cotizacion')
+@receiver(post_delete, sender=Cotizacion, dispatch_uid='condicional_cotizacion_eliminada')
+def condicional_cotizaciones(sender, **kwargs):
+    condicional.invalidar('cotizaciones')
+
+
+@receiver(post_save, sender=Reserva, dispatch_uid='condicional_reserva')
+@receiver(post_delete, sender=Reserva, dispatch_uid='condicional_reserva_eliminada')
+@receiver(post_save, sender=Pago, dispatch_uid='condicional_pago')
+def condicional_reservas(sender, **kwargs):
+    condicional.invalidar('reservas')
+
+
+# ==================== MATRIZ DE PRECIOS ====================
+
+@receiver(post_save, sender=ModeloAccesorio, dispatch_uid='precios_modelo_accesorio')
+@receiver(post_delete, sender=ModeloAccesorio, dispatch_uid='precios_modelo_accesorio_eliminado')
+@receiver(post_save, sender=Accesorio, dispatch_uid='precios_accesorio')
+@receiver(post_delete, sender=Accesorio, dispatch_uid='precios_accesorio_eliminado')
+@receiver(post_save, sender=Oferta, dispatch_uid='precios_oferta')
+@receiver(post_delete, sender=Oferta, dispatch_uid='precios_oferta_eliminada')
+def precios_modificados(sender, **kwargs):
+    versiones.invalidar('precios')
+
+
+# ==================== INSTANTÁNEA DEL CATÁLOGO ====================
+
+@receiver(post_save, sender=Vehiculo, dispatch_uid='instantanea_vehiculo')
+@receiver(post_delete, sender=Vehiculo, dispatch_uid='instantanea_vehiculo_eliminado')
+def instantanea_vehiculo_modificado(sender, instance, **kwargs):
+    instantanea.vehiculos_modificados([instance.pk])
+
+
+@receiver(vehiculos_actualizados, dispatch_uid='instantanea_vehiculos_actualizados')
+def instantanea_vehiculos_actualizados(sender, ids, **kwargs):
+    instantanea.vehiculos_modificados(ids)
+
+
+@receiver(post_save, sender=Modelo, dispatch_uid='instantanea_modelo')
+@receiver(post_save, sender=Marca, dispatch_uid='instantanea_marca')
+@receiver(post_save, sender=Oferta, dispatch_uid='instantanea_oferta')
+@receiver(post_delete, sender=Oferta, dispatch_uid='instantanea_oferta_eliminada')
+@receiver(post_save, sender=Accesorio, dispatch_uid='instantanea_accesorio')
+@receiver(post_delete, sender=Accesorio, dispatch_uid='instantanea_accesorio_eliminado')
+@receiver(post_save, sender=ModeloAccesorio, dispatch_uid='instantanea_modelo_accesorio')
+@receiver(post_delete, sender=ModeloAccesorio, dispatch_uid='instantanea_modelo_accesorio_eliminado')
+def instantanea_vencida(sender, **kwargs):
+    instantanea.invalidar()
+
+
+# ==================== CONSULTAS LENTAS ====================
+
+@receiver(connection_created, dispatch_uid='consultas_lentas')
+def instalar_monitor_consultas(sender, connection, **kwargs):
+    consultas_lentas.instalar(connection)
@@ -1,13 +1,25 @@
+from django.conf import settings
 from django.urls import reverse
+from django.test import TransactionTestCase, override_settings
 from rest_framework import status
 from rest_framework.test import APITestCase
 from decimal import Decimal
 from django.utils import timezone
 from datetime import timedelta
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from importlib.util import find_spec
+import json
+import threading
+import unittest
+import uuid
 from core.models import (
     Usuario, Cliente, Vendedor, Marca, Modelo, Vehiculo, 
-    Accesorio, ModeloAccesorio, Cotizacion, Reserva, Pago, Venta
+    Accesorio, ModeloAccesorio, Oferta, Cotizacion, CotizacionVehiculo, Reserva, Pago, Venta
 )
+from core.precios import cotizar, matriz_precios
+from core.presupuesto import PRESUPUESTOS, PresupuestoConsultasMixin
 
 class TestCasosDeUso(APITestCase):
     
@@ -273,3 +285,1973 @@ class TestCasosDeUso(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertTrue(Usuario.objects.filter(email='nuevo@cliente.com').exists())
         self.assertTrue(Cliente.objects.filter(dni='11223344').exists())
+
+
+class TestMotorPrecios(APITestCase):
+    """Regresión de cantidad de consultas del motor de precios (C.U. 01)"""
+
+    def setUp(self):
+        self.marca = Marca.objects.create(nombre='Ford')
+        self.modelo = Modelo.objects.create(nombre='Ranger', marca=self.marca)
+        self.oferta = Oferta.objects.create(
+            descuento=Decimal('10.00'),
+            fecha_inicio=timezone.now() - timedelta(days=1),
+            fecha_fin=timezone.now() + timedelta(days=1)
+        )
+        self.accesorios = [
+            Accesorio.objects.create(nombre=f'Accesorio {i}', stock=10, oferta=self.oferta if i == 0 else None)
+            for i in range(3)
+        ]
+        for accesorio in self.accesorios:
+            ModeloAccesorio.objects.create(modelo=self.modelo, accesorio=accesorio, precio=Decimal('1000.00'))
+        self.vehiculos = [
+            Vehiculo.objects.create(
+                nro_chasis=f'1FTER4FH0LLA{i:05d}',
+                precio=Decimal('30000.00'),
+                anio=2024,
+                modelo=self.modelo,
+                oferta=self.oferta if i % 2 else None
+            )
+            for i in range(10)
+        ]
+        # Matriz de precios ya construida: las mediciones cubren solo el carrito
+        matriz_precios()
+
+    def _items(self, cantidad):
+        return [
+            {'vehiculo_id': v.id, 'accesorios': [a.id for a in self.accesorios]}
+            for v in self.vehiculos[:cantidad]
+        ]
+
+    def test_cantidad_de_consultas_constante(self):
+        with CaptureQueriesContext(connection) as uno:
+            cotizar(self._items(1))
+        with CaptureQueriesContext(connection) as muchos:
+            cotizar(self._items(10))
+        self.assertEqual(len(uno), len(muchos))
+        self.assertLessEqual(len(muchos), 2)
+
+    def test_simular_cantidad_de_consultas_constante(self):
+        url = reverse('cotizacion-simular')
+        with CaptureQueriesContext(connection) as uno:
+            response = self.client.post(url, {'vehiculos': self._items(1)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with CaptureQueriesContext(connection) as dos:
+            response = self.client.post(url, {'vehiculos': self._items(2)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(uno), len(dos))
+
+    def test_desglose_igual_al_calculo_por_objeto(self):
+        resultado = cotizar(self._items(2))
+        esperado = Decimal('0.00')
+        for linea in resultado.lineas:
+            self.assertEqual(linea.precio, linea.vehiculo.get_precio_con_oferta())
+            esperado += linea.precio
+            for linea_acc in linea.accesorios:
+                self.assertEqual(linea_acc.precio, linea_acc.accesorio.get_precio_para_modelo(self.modelo.id))
+                esperado += linea_acc.precio
+        self.assertEqual(resultado.total, esperado)
+        self.assertEqual(resultado.detalle()[1]['vehiculo']['precio'], Decimal('27000.00'))
+
+    def test_matriz_sin_consultas_por_busqueda(self):
+        with CaptureQueriesContext(connection) as consultas:
+            for vehiculo in self.vehiculos:
+                for accesorio in self.accesorios:
+                    accesorio.get_precio_para_modelo(vehiculo.modelo_id)
+        self.assertEqual(len(consultas), 0)
+
+    def test_matriz_se_invalida_con_cambios(self):
+        accesorio = self.accesorios[1]
+        self.assertEqual(accesorio.get_precio_para_modelo(self.modelo.id), Decimal('1000.00'))
+        ModeloAccesorio.objects.get(modelo=self.modelo, accesorio=accesorio).delete()
+        self.assertEqual(accesorio.get_precio_para_modelo(self.modelo.id), Decimal('0.00'))
+        ModeloAccesorio.objects.create(modelo=self.modelo, accesorio=accesorio, precio=Decimal('1500.00'))
+        self.assertEqual(accesorio.get_precio_para_modelo(self.modelo.id), Decimal('1500.00'))
+        accesorio.oferta = self.oferta
+        accesorio.save()
+        self.assertEqual(accesorio.get_precio_para_modelo(self.modelo.id), Decimal('1350.00'))
+
+    def test_matriz_vence_en_borde_de_oferta(self):
+        from unittest.mock import patch
+        accesorio = self.accesorios[0]
+        self.assertEqual(accesorio.get_precio_para_modelo(self.modelo.id), Decimal('900.00'))
+        # Pasado fecha_fin, la matriz se reconstruye sin que nada cambie en la base
+        futuro = self.oferta.fecha_fin + timedelta(seconds=1)
+        with patch('django.utils.timezone.now', return_value=futuro):
+            self.assertEqual(accesorio.get_precio_para_modelo(self.modelo.id), Decimal('1000.00'))
+            resultado = cotizar(self._items(2))
+            self.assertEqual(resultado.lineas[1].precio, Decimal('30000.00'))
+
+    def test_vehiculo_inexistente(self):
+        url = reverse('cotizacion-simular')
+        data = {'vehiculos': [{'vehiculo_id': str(uuid.uuid4()), 'accesorios': []}]}
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TestCatalogoVehiculos(APITestCase):
+    """Modelo de lectura desnormalizado de /api/vehiculos/"""
+
+    def setUp(self):
+        self.marca = Marca.objects.create(nombre='Toyota')
+        self.modelo = Modelo.objects.create(nombre='Hilux', marca=self.marca)
+        self.oferta = Oferta.objects.create(
+            descuento=Decimal('15.00'),
+            fecha_inicio=timezone.now() - timedelta(days=1),
+            fecha_fin=timezone.now() + timedelta(days=1)
+        )
+        self.vehiculo = Vehiculo.objects.create(
+            nro_chasis='8AJFB3CD0P1234567',
+            precio=Decimal('40000.00'),
+            anio=2024,
+            modelo=self.modelo,
+            oferta=self.oferta
+        )
+        self.url = reverse('vehiculo-list')
+
+    def _resultados(self, params=None):
+        response = self.client.get(self.url, params or {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['results']
+
+    def test_salida_igual_a_vehiculo_serializer(self):
+        from rest_framework.renderers import JSONRenderer
+        from core.serializers import VehiculoSerializer
+        esperado = JSONRenderer().render(VehiculoSerializer(self.vehiculo).data)
+        obtenido = JSONRenderer().render(self._resultados()[0])
+        self.assertEqual(obtenido, esperado)
+
+    def test_listado_lee_solo_del_catalogo(self):
+        # El validador condicional usa la matriz de precios, cacheada por proceso
+        matriz_precios()
+        with CaptureQueriesContext(connection) as consultas:
+            self._resultados({'estado': 'DISPONIBLE'})
+        for consulta in consultas:
+            self.assertIn('catalogo_vehiculos', consulta['sql'])
+            self.assertNotIn('"vehiculos"', consulta['sql'])
+
+    def test_cambios_de_modelo_marca_y_oferta(self):
+        self.modelo.nombre = 'Hilux SRX'
+        self.modelo.save()
+        self.marca.nombre = 'Toyota Argentina'
+        self.marca.save()
+        self.oferta.descuento = Decimal('20.00')
+        self.oferta.save()
+        fila = self._resultados()[0]
+        self.assertEqual(fila['modelo_nombre'], 'Hilux SRX')
+        self.assertEqual(fila['marca_nombre'], 'Toyota Argentina')
+        self.assertEqual(fila['precio_con_oferta'], Decimal('32000.00'))
+
+        self.oferta.delete()
+        fila = self._resultados()[0]
+        self.assertIsNone(fila['oferta'])
+        self.assertEqual(fila['precio_con_oferta'], Decimal('40000.00'))
+
+    def test_modelo_reasignado_a_otra_marca(self):
+        self.modelo.marca = Marca.objects.create(nombre='Lexus')
+        self.modelo.save()
+        fila = self._resultados()[0]
+        self.assertEqual(fila['marca_nombre'], 'Lexus')
+        self.assertEqual(self._resultados({'q': 'lexus'})[0]['id'], self.vehiculo.id)
+
+    def test_oferta_fuera_de_ventana(self):
+        self.oferta.fecha_fin = timezone.now() - timedelta(hours=1)
+        self.oferta.save()
+        self.assertEqual(self._resultados()[0]['precio_con_oferta'], Decimal('40000.00'))
+
+    def test_estado_y_eliminado(self):
+        self.vehiculo.estado = 'RESERVADO'
+        self.vehiculo.save()
+        self.assertEqual(self._resultados({'estado': 'DISPONIBLE'}), [])
+        self.vehiculo.eliminado = True
+        self.vehiculo.save()
+        self.assertEqual(self._resultados(), [])
+        response = self.client.get(reverse('vehiculo-detail', args=[self.vehiculo.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_reconstruir(self):
+        from core import catalogo
+        from core.models import VehiculoCatalogo
+        VehiculoCatalogo.objects.all().delete()
+        self.assertEqual(catalogo.reconstruir(), 1)
+        self.assertEqual(self._resultados()[0]['id'], self.vehiculo.id)
+
+
+class TestPaginacionCursor(APITestCase):
+    """Paginación keyset de los listados"""
+
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(
+            email='pagina@test.com', password='password123', tipo_usuario='CLIENTE'
+        )
+        self.cliente = Cliente.objects.create(
+            usuario=self.usuario, dni='22334455', nombre='Paula', apellido='Gina',
+            fecha_nacimiento='1990-01-01', direccion='Calle 1', email='pagina@test.com'
+        )
+        self.cotizaciones = [
+            Cotizacion.objects.create(
+                cliente=self.cliente,
+                importe_final=Decimal('100.00'),
+                fecha_hora_vencimiento=timezone.now() + timedelta(days=1)
+            )
+            for _ in range(7)
+        ]
+        # Fechas repetidas para forzar el desempate por id
+        Cotizacion.objects.filter(id__in=[c.id for c in self.cotizaciones[:4]]).update(
+            fecha_hora_generada=timezone.now() - timedelta(hours=1)
+        )
+        self.esperado = [
+            str(c.id) for c in Cotizacion.objects.order_by('-fecha_hora_generada', '-id')
+        ]
+        self.client.force_authenticate(user=self.usuario)
+
+    def _recorrer(self, url):
+        ids, paginas = [], []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            paginas.append(response.data)
+            ids += [str(c['id']) for c in response.data['results']]
+            url = response.data['next']
+        return ids, paginas
+
+    def test_recorrido_completo_sin_offset(self):
+        with CaptureQueriesContext(connection) as consultas:
+            ids, paginas = self._recorrer(reverse('cotizacion-list') + '?page_size=3')
+        self.assertEqual(ids, self.esperado)
+        self.assertEqual(len(paginas), 3)
+        self.assertIsNone(paginas[0]['count'])
+        self.assertIsNone(paginas[0]['previous'])
+        for consulta in consultas:
+            self.assertNotIn('OFFSET', consulta['sql'])
+            self.assertNotIn('COUNT(', consulta['sql'])
+
+    def test_retroceso(self):
+        _, paginas = self._recorrer(reverse('cotizacion-list') + '?page_size=3')
+        response = self.client.get(paginas[-1]['previous'])
+        self.assertEqual([str(c['id']) for c in response.data['results']], self.esperado[3:6])
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([str(c['id']) for c in response.data['results']], self.esperado[:3])
+        self.assertIsNone(response.data['previous'])
+
+    def test_total_opcional(self):
+        response = self.client.get(reverse('cotizacion-list') + '?count=true')
+        self.assertEqual(response.data['count'], 7)
+
+    def test_cursor_invalido(self):
+        response = self.client.get(reverse('cotizacion-list') + '?cursor=no-es-un-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_adulterado(self):
+        import base64
+        import json
+
+        def cursor(datos):
+            return base64.urlsafe_b64encode(json.dumps(datos).encode()).decode()
+
+        pk = str(self.cotizaciones[0].id)
+        adulterados = [
+            ['2024-01-01T00:00:00', 'no-uuid', False],
+            ['no-fecha', pk, False],
+            [None, pk, False],
+            ['2024-01-01T00:00:00', pk],
+            ['2024-01-01T00:00:00', pk, 'no'],
+            {'valor': '2024-01-01T00:00:00', 'pk': pk},
+            'texto',
+        ]
+        self.client.force_authenticate(user=None)
+        for url in (reverse('accesorio-list'), reverse('vehiculo-list'), reverse('vehiculo-list') + '?q=toyota'):
+            for datos in adulterados:
+                with self.subTest(url=url, datos=datos):
+                    separador = '&' if '?' in url else '?'
+                    response = self.client.get(f'{url}{separador}cursor={cursor(datos)}')
+                    self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        # La búsqueda ordena por relevancia (un número), no por fecha
+        response = self.client.get(f"{reverse('vehiculo-list')}?q=toyota&cursor={cursor([-1.5, pk, False])}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class TestPlanesDeConsulta(APITestCase):
+    """Las consultas críticas deben resolverse con sus índices (ver benchmarks/indices.py)"""
+
+    def test_consultas_criticas_usan_indice(self):
+        from core.planes import CONSULTAS_CRITICAS, explicar, indices_usados
+        for consulta in CONSULTAS_CRITICAS:
+            with self.subTest(consulta=consulta.nombre):
+                plan = explicar(consulta.queryset())
+                self.assertIn(consulta.indice, indices_usados(plan), plan)
+
+
+class TestBarridoVencimientos(APITestCase):
+    """Barrido de reservas y cotizaciones vencidas"""
+
+    def setUp(self):
+        usuario = Usuario.objects.create_user(email='vence@test.com', password='password123', tipo_usuario='CLIENTE')
+        self.cliente = Cliente.objects.create(
+            usuario=usuario, dni='33445566', nombre='Vera', apellido='Vence',
+            fecha_nacimiento='1990-01-01', direccion='Calle 2', email='vence@test.com'
+        )
+        marca = Marca.objects.create(nombre='Renault')
+        self.modelo = Modelo.objects.create(nombre='Kangoo', marca=marca)
+        self.pasado = timezone.now() - timedelta(hours=1)
+        self.futuro = timezone.now() + timedelta(days=1)
+        self.vencidas = [self._reserva(i, self.pasado) for i in range(3)]
+        self.vigente = self._reserva(3, self.futuro)
+        self.cotizacion_vencida = Cotizacion.objects.create(
+            cliente=self.cliente, importe_final=Decimal('1.00'), fecha_hora_vencimiento=self.pasado
+        )
+
+    def _reserva(self, i, vencimiento):
+        vehiculo = Vehiculo.objects.create(
+            nro_chasis=f'VF1KW0000000{i:05d}', precio=Decimal('20000.00'), anio=2024,
+            modelo=self.modelo, estado='RESERVADO'
+        )
+        cotizacion = Cotizacion.objects.create(
+            cliente=self.cliente, importe_final=vehiculo.precio, fecha_hora_vencimiento=vencimiento
+        )
+        CotizacionVehiculo.objects.create(cotizacion=cotizacion, vehiculo=vehiculo, precio_unitario=vehiculo.precio)
+        pago = Pago.objects.create(nro_pago=f'VENCE-{i}', importe=Decimal('1000.00'))
+        return Reserva.objects.create(
+            cotizacion=cotizacion, pago=pago, importe=pago.importe, fecha_hora_vencimiento=vencimiento
+        )
+
+    def test_barrido_por_lotes(self):
+        from core.models import VehiculoCatalogo
+        from core.vencimientos import procesar_vencimientos
+        resultado = procesar_vencimientos(lote=2)
+        self.assertEqual(resultado.reservas, 3)
+        self.assertEqual(resultado.vehiculos, 3)
+        # 3 cotizaciones de reservas vencidas + la cotización suelta
+        self.assertEqual(resultado.cotizaciones, 4)
+        self.assertEqual(resultado.lotes, 4)
+
+        for reserva in self.vencidas:
+            reserva.refresh_from_db()
+            self.assertEqual(reserva.estado, 'VENCIDA')
+            vehiculo = reserva.cotizacion.vehiculos.get().vehiculo
+            self.assertEqual(vehiculo.estado, 'DISPONIBLE')
+            self.assertEqual(VehiculoCatalogo.objects.get(vehiculo=vehiculo).estado, 'DISPONIBLE')
+        self.vigente.refresh_from_db()
+        self.assertEqual(self.vigente.estado, 'ACTIVA')
+        self.assertTrue(self.vigente.cotizacion.valida)
+        self.cotizacion_vencida.refresh_from_db()
+        self.assertFalse(self.cotizacion_vencida.valida)
+
+        self.assertEqual(procesar_vencimientos().filas, 0)
+
+    def test_comando(self):
+        from io import StringIO
+        from django.core.management import call_command
+        salida = StringIO()
+        call_command('procesar_vencimientos', '--lote', '10', stdout=salida)
+        self.assertIn('3 reservas vencidas', salida.getvalue())
+        self.assertIn('filas/s', salida.getvalue())
+
+
+class TestReservasConcurrentes(TransactionTestCase):
+    """Reservas simultáneas del mismo vehículo: exactamente un ganador"""
+
+    HILOS = 8
+
+    def setUp(self):
+        marca = Marca.objects.create(nombre='Peugeot')
+        modelo = Modelo.objects.create(nombre='208', marca=marca)
+        self.vehiculo = Vehiculo.objects.create(
+            nro_chasis='VF3CCHMZ6PT000001', precio=Decimal('18000.00'), anio=2024, modelo=modelo
+        )
+        self.cotizaciones = []
+        for i in range(self.HILOS):
+            usuario = Usuario.objects.create_user(
+                email=f'concurrente{i}@test.com', password='password123', tipo_usuario='CLIENTE'
+            )
+            cliente = Cliente.objects.create(
+                usuario=usuario, dni=f'4455{i:04d}', nombre='Concurrente', apellido=str(i),
+                fecha_nacimiento='1990-01-01', direccion='Calle 3', email=usuario.email
+            )
+            cotizacion = Cotizacion.objects.create(
+                cliente=cliente, importe_final=self.vehiculo.precio,
+                fecha_hora_vencimiento=timezone.now() + timedelta(hours=48)
+            )
+            CotizacionVehiculo.objects.create(
+                cotizacion=cotizacion, vehiculo=self.vehiculo, precio_unitario=self.vehiculo.precio
+            )
+            self.cotizaciones.append((usuario, cotizacion))
+
+    def _reservar(self, usuario, cotizacion, barrera, resultados):
+        from django.db import connections
+        from rest_framework.test import APIClient
+        # Sin re-lanzar excepciones: el cliente de test las comparte entre hilos
+        cliente_http = APIClient(raise_request_exception=False)
+        cliente_http.force_authenticate(user=usuario)
+        barrera.wait()
+        try:
+            response = cliente_http.post(reverse('reserva-crear'), {'cotizacion_id': str(cotizacion.id)}, format='json')
+            resultados.append(response.status_code)
+        finally:
+            connections.close_all()
+
+    # En memoria compartida SQLite no respeta el busy_timeout: los escritores esperan el
+    # lock solo con la base de test en archivo y BEGIN IMMEDIATE de settings_test
+    @unittest.skipUnless(
+        settings.DATABASES['default'].get('OPTIONS', {}).get('transaction_mode') == 'IMMEDIATE'
+        and settings.DATABASES['default'].get('TEST', {}).get('NAME'),
+        'Sin base de test en archivo con BEGIN IMMEDIATE (usar flycar_project.settings_test)'
+    )
+    def test_un_solo_ganador(self):
+        barrera = threading.Barrier(self.HILOS)
+        resultados = []
+        hilos = [
+            threading.Thread(target=self._reservar, args=(usuario, cotizacion, barrera, resultados))
+            for usuario, cotizacion in self.cotizaciones
+        ]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertNotIn(status.HTTP_500_INTERNAL_SERVER_ERROR, resultados)
+        self.assertEqual(len(resultados), self.HILOS)
+        self.assertEqual(resultados.count(status.HTTP_201_CREATED), 1)
+        self.assertEqual(resultados.count(status.HTTP_409_CONFLICT), self.HILOS - 1)
+        # Sin actualizaciones perdidas ni registros huérfanos de los perdedores
+        self.assertEqual(Reserva.objects.count(), 1)
+        self.assertEqual(Pago.objects.count(), 1)
+        self.vehiculo.refresh_from_db()
+        self.assertEqual(self.vehiculo.estado, 'RESERVADO')
+
+    def test_transicion_parcial_se_revierte(self):
+        from core import inventario
+        otro = Vehiculo.objects.create(
+            nro_chasis='VF3CCHMZ6PT000002', precio=Decimal('18000.00'), anio=2024,
+            modelo=self.vehiculo.modelo, estado='VENDIDO'
+        )
+        with self.assertRaises(inventario.TransicionInvalida):
+            inventario.reservar([self.vehiculo.id, otro.id])
+        self.vehiculo.refresh_from_db()
+        self.assertEqual(self.vehiculo.estado, 'DISPONIBLE')
+
+
+class TestCotizacionFlota(APITestCase):
+    """Cotizaciones de flota con inserciones masivas (C.U. 02)"""
+
+    def setUp(self):
+        self.vendedor_user = Usuario.objects.create_user(
+            email='flota@test.com', password='password123', tipo_usuario='VENDEDOR'
+        )
+        Vendedor.objects.create(usuario=self.vendedor_user, dni='55667788', nombre='Flor', apellido='Flota')
+        cliente_user = Usuario.objects.create_user(
+            email='empresa@test.com', password='password123', tipo_usuario='CLIENTE'
+        )
+        self.cliente = Cliente.objects.create(
+            usuario=cliente_user, dni='66778899', nombre='Rent', apellido='ACar',
+            fecha_nacimiento='1980-01-01', direccion='Parque Industrial', email='empresa@test.com'
+        )
+        marca = Marca.objects.create(nombre='Fiat')
+        self.modelo = Modelo.objects.create(nombre='Cronos', marca=marca)
+        self.accesorio = Accesorio.objects.create(nombre='Rastreo satelital', stock=500)
+        ModeloAccesorio.objects.create(modelo=self.modelo, accesorio=self.accesorio, precio=Decimal('250.00'))
+        Vehiculo.objects.bulk_create([
+            Vehiculo(
+                nro_chasis=f'8AP359A00R{i:07d}', precio=Decimal('15000.00'), anio=2024, modelo=self.modelo
+            )
+            for i in range(60)
+        ])
+        self.vehiculos = list(Vehiculo.objects.all())
+        matriz_precios()
+        self.client.force_authenticate(user=self.vendedor_user)
+        self.url = reverse('cotizacion-generar-flota')
+
+    def _datos(self, cantidad):
+        return {
+            'cliente_id': str(self.cliente.id),
+            'vehiculos': [
+                {'vehiculo_id': str(v.id), 'accesorios': [str(self.accesorio.id)]}
+                for v in self.vehiculos[:cantidad]
+            ]
+        }
+
+    def test_flota(self):
+        response = self.client.post(self.url, self._datos(60), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['vehiculos']), 60)
+        self.assertEqual(len(response.data['accesorios']), 60)
+        self.assertEqual(Decimal(response.data['importe_final']), Decimal('15250.00') * 60)
+        cotizacion = Cotizacion.objects.get()
+        self.assertEqual(cotizacion.vehiculos.count(), 60)
+        self.assertEqual(cotizacion.accesorios.count(), 60)
+
+    def test_consultas_independientes_del_tamanio(self):
+        with CaptureQueriesContext(connection) as chica:
+            self.client.post(self.url, self._datos(5), format='json')
+        with CaptureQueriesContext(connection) as grande:
+            self.client.post(self.url, self._datos(60), format='json')
+        self.assertEqual(len(chica), len(grande))
+
+    def test_flota_maxima_con_consultas_por_lote(self):
+        """500 vehículos (el máximo): las consultas solo crecen con los lotes de bulk_create, no por línea"""
+        from core.models import CotizacionAccesorio
+        Vehiculo.objects.bulk_create([
+            Vehiculo(
+                nro_chasis=f'8AP359A00S{i:07d}', precio=Decimal('15000.00'), anio=2024, modelo=self.modelo
+            )
+            for i in range(500 - len(self.vehiculos))
+        ])
+        self.vehiculos = list(Vehiculo.objects.all())
+        matriz_precios()
+        consultas = {}
+        for cantidad in (1, 500):
+            with CaptureQueriesContext(connection) as capturadas:
+                response = self.client.post(self.url, self._datos(cantidad), format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(len(response.data['vehiculos']), cantidad)
+            consultas[cantidad] = [q['sql'] for q in capturadas.captured_queries]
+        # Lotes de INSERT por tabla según el límite de parámetros de la base
+        lotes = 0
+        for modelo in (CotizacionVehiculo, CotizacionAccesorio):
+            por_lote = min(500, connection.ops.bulk_batch_size(modelo._meta.concrete_fields, [None] * 500))
+            lotes += -(-500 // por_lote) - 1
+        self.assertLessEqual(len(consultas[500]), len(consultas[1]) + lotes, '\n'.join(consultas[500]))
+        cotizacion = Cotizacion.objects.get(id=response.data['id'])
+        self.assertEqual(cotizacion.vehiculos.count(), 500)
+        self.assertEqual(cotizacion.accesorios.count(), 500)
+        self.assertEqual(cotizacion.importe_final, Decimal('15250.00') * 500)
+
+    def test_vehiculo_repetido(self):
+        datos = self._datos(2)
+        datos['vehiculos'].append(datos['vehiculos'][0])
+        response = self.client.post(self.url, datos, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Cotizacion.objects.count(), 0)
+
+    def test_generar_sigue_limitado_a_dos(self):
+        response = self.client.post(reverse('cotizacion-generar'), self._datos(3), format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestGeneradorDatos(APITestCase):
+    """Generador determinístico de datos sintéticos (manage.py generar_datos)"""
+
+    def _generar(self):
+        from core.generador import generar_datos
+        with transaction.atomic():
+            resultado = generar_datos(vehiculos=400, semilla=7, lote=100)
+            chasis = list(Vehiculo.objects.order_by('id').values_list('id', 'nro_chasis'))
+            importes = sorted(Cotizacion.objects.values_list('importe_final', flat=True))
+            transaction.set_rollback(True)
+        return resultado, chasis, importes
+
+    def test_misma_semilla_mismos_datos(self):
+        resultado, chasis, importes = self._generar()
+        self.assertEqual(resultado.filas['vehiculos'], 400)
+        self.assertEqual(resultado.filas['catalogo_vehiculos'], 400)
+        self.assertEqual((chasis, importes), self._generar()[1:])
+
+    def test_datos_coherentes(self):
+        from core.generador import generar_datos, digito_verificador
+        generar_datos(vehiculos=400, semilla=7, lote=100)
+        for vehiculo in Vehiculo.objects.all():
+            vehiculo.full_clean()
+            self.assertEqual(vehiculo.nro_chasis[8], digito_verificador(vehiculo.nro_chasis))
+        self.assertEqual(
+            Vehiculo.objects.filter(estado='RESERVADO').count(),
+            Reserva.objects.filter(estado='ACTIVA').count(),
+        )
+        self.assertEqual(Vehiculo.objects.filter(estado='VENDIDO').count(), Venta.objects.count())
+        self.assertFalse(
+            Cotizacion.objects.filter(valida=True, reserva__isnull=True, venta__isnull=True)
+            .values('cliente').annotate(n=Count('id')).filter(n__gt=1).exists()
+        )
+        cliente = Cliente.objects.order_by('dni').first()
+        response = self.client.post(
+            reverse('login'), {'email': cliente.email, 'password': 'password123'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+@override_settings(FLYCAR_PERFILAMIENTO=True)
+class TestPerfilamiento(APITestCase):
+    """Server-Timing y métricas por vista de PerfilamientoMiddleware"""
+
+    def setUp(self):
+        from core.perfilamiento import registro
+        registro.limpiar()
+        Usuario.objects.create_user(email='perf@test.com', password='password123', tipo_usuario='CLIENTE')
+
+    def _tiempos(self, response):
+        tiempos = {}
+        for parte in response['Server-Timing'].split(', '):
+            nombre, duracion = parte.split(';')[:2]
+            tiempos[nombre] = float(duracion.removeprefix('dur='))
+        return tiempos
+
+    def test_server_timing(self):
+        response = self.client.get(reverse('vehiculo-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('desc="1 consultas"', response['Server-Timing'])
+        tiempos = self._tiempos(response)
+        self.assertEqual(set(tiempos), {'vista', 'orm', 'serializacion', 'render', 'hash', 'total'})
+        self.assertGreater(tiempos['render'], 0)
+        self.assertGreater(tiempos['serializacion'], 0)
+        # La serialización ya no se cuenta como tiempo de la vista
+        self.assertLessEqual(
+            tiempos['vista'] + tiempos['orm'] + tiempos['serializacion'] + tiempos['render'], tiempos['total'] + 0.05
+        )
+
+    def test_hash_de_contrasena(self):
+        response = self.client.post(
+            reverse('login'), {'email': 'perf@test.com', 'password': 'password123'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        tiempos = self._tiempos(response)
+        self.assertGreater(tiempos['hash'], 0)
+        self.assertLessEqual(tiempos['hash'], tiempos['total'])
+
+    def test_metricas_prometheus(self):
+        self.client.get(reverse('vehiculo-list'))
+        self.client.get(reverse('vehiculo-list'))
+        self.client.force_authenticate(user=Usuario.objects.create_superuser(email='admin@test.com', password='password123'))
+        response = self.client.get(reverse('metricas'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        texto = response.content.decode()
+        self.assertIn('# TYPE flycar_request_duration_seconds histogram', texto)
+        self.assertIn(
+            'flycar_request_duration_seconds_count{vista="vehiculo-list",metodo="GET",status="200"} 2', texto
+        )
+        self.assertIn(
+            'flycar_request_consultas_total{vista="vehiculo-list",metodo="GET",status="200"} 2', texto
+        )
+
+    def test_metricas_restringidas(self):
+        url = reverse('metricas')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.force_authenticate(user=Usuario.objects.get(email='perf@test.com'))
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=None)
+        # El cliente de test pide desde 127.0.0.1
+        with self.settings(FLYCAR_METRICAS_IPS=['127.0.0.1']):
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+            self.assertEqual(self.client.get(url, REMOTE_ADDR='10.0.0.9').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(FLYCAR_PERFILAMIENTO=False, FLYCAR_METRICAS_IPS=['127.0.0.1'])
+    def test_desactivado(self):
+        response = self.client.get(reverse('vehiculo-list'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(self.client.get(reverse('metricas')).status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TestConsultasLentas(APITestCase):
+    """Registro de consultas lentas con EXPLAIN por forma (manage.py consultas_lentas)"""
+
+    def setUp(self):
+        import tempfile
+        from core.consultas_lentas import MonitorConsultasLentas
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.archivo = f'{directorio.name}/lentas.jsonl'
+        # Umbral 0: se registran todas las consultas
+        self.monitor = MonitorConsultasLentas(0, capacidad=20, archivo=self.archivo)
+        marca = Marca.objects.create(nombre='Renault')
+        modelo = Modelo.objects.create(nombre='Duster', marca=marca)
+        for i in range(3):
+            Vehiculo.objects.create(nro_chasis=f'93YHSR3H0PJ00000{i}', precio=Decimal('25000.00'), anio=2023, modelo=modelo)
+
+    def test_registra_vista_pila_y_plan(self):
+        with connection.execute_wrapper(self.monitor):
+            self.client.get(reverse('vehiculo-list'))
+            self.client.get(reverse('vehiculo-list'), {'estado': 'DISPONIBLE'})
+        registros = [r for r in self.monitor.registros if 'catalogo_vehiculos' in r['sql']]
+        self.assertEqual(len(registros), 2)
+        self.assertEqual(registros[0]['vista'], 'VehiculoViewSet.list')
+        self.assertTrue(any('core/pagination.py' in frame for frame in registros[0]['pila']))
+        self.assertTrue(any('catalogo_' in linea for linea in registros[1]['plan']))
+
+    def test_sin_parametros_por_defecto(self):
+        """Los valores (emails, DNI, hashes) no llegan al buffer ni al archivo; el EXPLAIN sí los usa"""
+        from pathlib import Path
+        from core.consultas_lentas import MonitorConsultasLentas
+        email = 'privado@test.com'
+        with connection.execute_wrapper(self.monitor):
+            list(Usuario.objects.filter(email=email))
+        registro = self.monitor.registros[-1]
+        self.assertNotIn('params', registro)
+        self.assertTrue(registro['plan'])
+        self.assertNotIn(email, Path(self.archivo).read_text())
+
+        monitor = MonitorConsultasLentas(0, parametros=True)
+        with connection.execute_wrapper(monitor):
+            list(Usuario.objects.filter(email=email))
+        self.assertIn(email, monitor.registros[-1]['params'])
+
+    def test_un_explain_por_forma(self):
+        from core.consultas_lentas import forma
+        with connection.execute_wrapper(self.monitor):
+            with CaptureQueriesContext(connection) as consultas:
+                for cantidad in range(1, 4):
+                    list(Vehiculo.objects.filter(id__in=[uuid.uuid4() for _ in range(cantidad)]))
+        self.assertEqual(sum('EXPLAIN' in q['sql'] for q in consultas.captured_queries), 1)
+        self.assertEqual(len({r['forma'] for r in self.monitor.registros}), 1)
+        self.assertEqual(forma('SELECT 1 WHERE id IN (%s, %s)'), forma('SELECT 1 WHERE id IN (%s, %s, %s)'))
+
+    def test_buffer_acotado_y_comando(self):
+        from io import StringIO
+        from django.core.management import call_command
+        with connection.execute_wrapper(self.monitor):
+            for _ in range(30):
+                Vehiculo.objects.count()
+        self.assertEqual(len(self.monitor.registros), 20)
+        salida = StringIO()
+        call_command('consultas_lentas', archivo=self.archivo, top=1, json=True, stdout=salida)
+        peores = json.loads(salida.getvalue())
+        self.assertEqual(len(peores), 1)
+        self.assertEqual(peores[0]['cantidad'], 30)
+        self.assertIn('COUNT(*)', peores[0]['sql'])
+
+    def test_archivo_rota_al_superar_el_maximo(self):
+        from io import StringIO
+        from pathlib import Path
+        from django.core.management import call_command
+        from core.consultas_lentas import MonitorConsultasLentas, anterior
+        monitor = MonitorConsultasLentas(0, capacidad=20, archivo=self.archivo, max_bytes=4096)
+        with connection.execute_wrapper(monitor):
+            for _ in range(30):
+                Vehiculo.objects.count()
+        archivo = Path(self.archivo)
+        self.assertTrue(anterior(archivo).exists())
+        # Cada archivo supera el máximo a lo sumo por un registro
+        for ruta in (archivo, anterior(archivo)):
+            if ruta.exists():
+                self.assertLess(ruta.stat().st_size, 4096 * 2)
+        # El comando lee el archivo y la copia anterior
+        lineas = sum(len(ruta.read_text().splitlines()) for ruta in (archivo, anterior(archivo)) if ruta.exists())
+        salida = StringIO()
+        call_command('consultas_lentas', archivo=self.archivo, json=True, stdout=salida)
+        self.assertEqual(json.loads(salida.getvalue())[0]['cantidad'], lineas)
+        self.assertLess(lineas, 30)
+
+    def test_buffer_del_worker_por_endpoint(self):
+        from core import consultas_lentas
+        url = reverse('consultas-lentas')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+        admin = Usuario.objects.create_superuser(email='admin@test.com', password='password123')
+        self.client.force_authenticate(user=admin)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+        with connection.execute_wrapper(self.monitor):
+            for _ in range(3):
+                Vehiculo.objects.count()
+        original, consultas_lentas.monitor = consultas_lentas.monitor, self.monitor
+        self.addCleanup(setattr, consultas_lentas, 'monitor', original)
+        response = self.client.get(url, {'top': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['registros'], 3)
+        self.assertEqual(len(response.data['peores']), 1)
+        self.assertIn('COUNT(*)', response.data['peores'][0]['sql'])
+
+        vendedor = Usuario.objects.create_user(email='no-staff@test.com', password='password123', tipo_usuario='VENDEDOR')
+        self.client.force_authenticate(user=vendedor)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+
+class TestPerfilProduccion(APITestCase):
+    """PRAGMA y modo de transacción del perfil settings_produccion"""
+
+    def test_pragmas_en_conexion_nueva(self):
+        import copy
+        import tempfile
+        from django.db.backends.sqlite3.base import DatabaseWrapper
+        from flycar_project.settings_produccion import DATABASES, SQLITE_PRAGMAS
+
+        with tempfile.TemporaryDirectory() as directorio:
+            configuracion = copy.deepcopy(connection.settings_dict)
+            configuracion.update(copy.deepcopy(DATABASES['default']))
+            configuracion['NAME'] = f'{directorio}/produccion.sqlite3'
+            conexion = DatabaseWrapper(configuracion, alias='produccion')
+            try:
+                with conexion.cursor() as cursor:
+                    valores = {}
+                    for pragma in SQLITE_PRAGMAS:
+                        cursor.execute(f'PRAGMA {pragma}')
+                        valores[pragma] = cursor.fetchone()[0]
+            finally:
+                conexion.close()
+
+        self.assertEqual(valores['journal_mode'], 'wal')
+        self.assertEqual(valores['synchronous'], 1)  # NORMAL
+        self.assertEqual(valores['temp_store'], 2)  # MEMORY
+        self.assertEqual(valores['busy_timeout'], SQLITE_PRAGMAS['busy_timeout'])
+        self.assertEqual(valores['cache_size'], SQLITE_PRAGMAS['cache_size'])
+        self.assertEqual(valores['mmap_size'], SQLITE_PRAGMAS['mmap_size'])
+        self.assertEqual(conexion.transaction_mode, 'IMMEDIATE')
+        self.assertEqual(DATABASES['default']['CONN_MAX_AGE'], 600)
+        self.assertTrue(DATABASES['default']['CONN_HEALTH_CHECKS'])
+
+
+@unittest.skipUnless('replica' in settings.DATABASES, 'Sin base "replica" (usar flycar_project.settings_test)')
+# Sin validadores condicionales (cache por proceso): con ETag las lecturas van a la primaria
+@override_settings(
+    FLYCAR_REPLICAS=['replica'], FLYCAR_REPLICA_FIJACION_SEGUNDOS=60, FLYCAR_CACHE_UN_PROCESO=False,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class TestRouterReplicas(TransactionTestCase):
+    """Lecturas a la réplica, escrituras a la primaria y read-your-writes"""
+
+    databases = {'default', 'replica'} & set(settings.DATABASES)
+
+    def setUp(self):
+        from django.core.cache import cache
+        from core.db_router import sincronizar_replicas
+        cache.clear()
+        self.vendedores = []
+        for i in range(2):
+            usuario = Usuario.objects.create_user(
+                email=f'replica{i}@test.com', password='password123', tipo_usuario='VENDEDOR'
+            )
+            Vendedor.objects.create(usuario=usuario, dni=f'7788990{i}', nombre='Rita', apellido=f'Replica{i}')
+            self.vendedores.append(usuario)
+        cliente_user = Usuario.objects.create_user(
+            email='leida@test.com', password='password123', tipo_usuario='CLIENTE'
+        )
+        self.cliente = Cliente.objects.create(
+            usuario=cliente_user, dni='88990011', nombre='Lea', apellido='Lectora',
+            fecha_nacimiento='1990-01-01', direccion='Calle 5', email='leida@test.com'
+        )
+        marca = Marca.objects.create(nombre='Renault')
+        modelo = Modelo.objects.create(nombre='Kwid', marca=marca)
+        self.vehiculo = Vehiculo.objects.create(
+            nro_chasis='93YRBB001RJ000001', precio=Decimal('12000.00'), anio=2024, modelo=modelo
+        )
+        sincronizar_replicas()
+
+    def _cliente_http(self, usuario):
+        from rest_framework.test import APIClient
+        from rest_framework_simplejwt.tokens import RefreshToken
+        cliente_http = APIClient()
+        cliente_http.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(usuario).access_token}')
+        return cliente_http
+
+    def test_lee_de_la_replica(self):
+        from core.db_router import sincronizar_replicas
+        self.vehiculo.precio = Decimal('13000.00')
+        self.vehiculo.save()
+        anonimo = self.client
+        response = anonimo.get(reverse('vehiculo-detail', args=[self.vehiculo.id]))
+        self.assertEqual(Decimal(response.data['precio']), Decimal('12000.00'))
+        sincronizar_replicas()
+        response = anonimo.get(reverse('vehiculo-detail', args=[self.vehiculo.id]))
+        self.assertEqual(Decimal(response.data['precio']), Decimal('13000.00'))
+
+    def test_lee_sus_propias_escrituras(self):
+        from core.db_router import sincronizar_replicas
+        autor, otro = (self._cliente_http(v) for v in self.vendedores)
+        response = autor.post(reverse('cotizacion-generar'), {
+            'cliente_id': str(self.cliente.id),
+            'vehiculos': [{'vehiculo_id': str(self.vehiculo.id), 'accesorios': []}],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        # El autor queda fijado a la primaria; el otro vendedor todavía lee la réplica
+        self.assertEqual(len(autor.get(reverse('cotizacion-list')).data['results']), 1)
+        self.assertEqual(len(otro.get(reverse('cotizacion-list')).data['results']), 0)
+
+        sincronizar_replicas()
+        self.assertEqual(len(otro.get(reverse('cotizacion-list')).data['results']), 1)
+
+    def test_fijacion_por_usuario_con_cualquier_token(self):
+        from core.db_router import clave_cliente
+        from django.test import RequestFactory
+        autor = self.vendedores[0]
+        response = self._cliente_http(autor).post(reverse('cotizacion-generar'), {
+            'cliente_id': str(self.cliente.id),
+            'vehiculos': [{'vehiculo_id': str(self.vehiculo.id), 'accesorios': []}],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # Otro token del mismo usuario (nuevo login, otra pestaña) también lee la primaria
+        self.assertEqual(len(self._cliente_http(autor).get(reverse('cotizacion-list')).data['results']), 1)
+
+        fabrica = RequestFactory()
+        anonimo = fabrica.get('/', REMOTE_ADDR='10.0.0.1')
+        invalido = fabrica.get('/', REMOTE_ADDR='10.0.0.1', HTTP_AUTHORIZATION='Bearer no-es-un-token')
+        self.assertEqual(clave_cliente(invalido), clave_cliente(anonimo))
+        self.assertNotEqual(clave_cliente(anonimo), clave_cliente(fabrica.get('/', REMOTE_ADDR='10.0.0.2')))
+
+    @override_settings(FLYCAR_CACHE_UN_PROCESO=True)
+    def test_respuestas_con_etag_leen_de_la_primaria(self):
+        """El ETag sale de las versiones de la primaria: el cuerpo no puede venir de una réplica atrasada"""
+        url = reverse('vehiculo-detail', args=[self.vehiculo.id])
+        self.vehiculo.precio = Decimal('13000.00')
+        self.vehiculo.save()
+        response = self.client.get(url)
+        self.assertIn('ETag', response)
+        self.assertEqual(Decimal(response.data['precio']), Decimal('13000.00'))
+
+    def test_fuera_de_requests_y_en_transacciones_usa_la_primaria(self):
+        from core.db_router import RouterLecturaEscritura, usar_replicas
+        router = RouterLecturaEscritura()
+        self.assertEqual(router.db_for_read(Vehiculo), 'default')
+        self.assertEqual(router.db_for_write(Vehiculo), 'default')
+        token = usar_replicas.set(True)
+        try:
+            self.assertEqual(router.db_for_read(Vehiculo), 'replica')
+            with transaction.atomic():
+                self.assertEqual(router.db_for_read(Vehiculo), 'default')
+        finally:
+            usar_replicas.reset(token)
+        with override_settings(FLYCAR_REPLICAS=[]):
+            self.assertIsNone(router.db_for_read(Vehiculo))
+
+
+class TestIdentificadoresUUID7(APITestCase):
+    """Claves UUIDv7 de las tablas de alta inserción"""
+
+    def test_formato_y_fecha(self):
+        from core.identificadores import fecha_de, uuid7
+        identificador = uuid7()
+        self.assertEqual(identificador.version, 7)
+        self.assertEqual(identificador.variant, uuid.RFC_4122)
+        self.assertLess(abs(fecha_de(identificador) - timezone.now()), timedelta(seconds=5))
+        self.assertIsNone(fecha_de(uuid.uuid4()))
+
+    def test_crecientes_aunque_el_reloj_retroceda(self):
+        from unittest import mock
+        from core import identificadores
+        relojes = [2_000_000_000_000_000_000] * 50 + [1_999_999_999_000_000_000] * 50
+        with mock.patch.object(identificadores.time, 'time_ns', side_effect=relojes), \
+                mock.patch.multiple(identificadores, _ultimo_ms=0, _contador=0):
+            generados = [identificadores.uuid7() for _ in relojes]
+        self.assertEqual(generados, sorted(generados, key=lambda u: u.int))
+        self.assertEqual(len(set(generados)), len(generados))
+        self.assertEqual(identificadores.construir(1, 0, 0).version, 7)
+
+    def test_default_de_los_modelos(self):
+        pagos = [Pago.objects.create(nro_pago=f'UUID7-{i}', importe=Decimal('10.00')) for i in range(20)]
+        self.assertTrue(all(pago.id.version == 7 for pago in pagos))
+        self.assertEqual(list(Pago.objects.order_by('id')), pagos)
+        self.assertEqual(Vehiculo._meta.pk.default, uuid.uuid4)
+
+
+class TestArchivoCotizaciones(APITestCase):
+    """Archivo de cotizaciones muertas y lectura del historial"""
+
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(
+            email='archivo@test.com', password='password123', tipo_usuario='CLIENTE'
+        )
+        self.cliente = Cliente.objects.create(
+            usuario=self.usuario, dni='12121212', nombre='Ana', apellido='Archivo',
+            fecha_nacimiento='1990-01-01', direccion='Calle 6', email='archivo@test.com'
+        )
+        marca = Marca.objects.create(nombre='Toyota')
+        modelo = Modelo.objects.create(nombre='Yaris', marca=marca)
+        self.vehiculo = Vehiculo.objects.create(
+            nro_chasis='9BRBL3HE0R0000001', precio=Decimal('21000.00'), anio=2024, modelo=modelo
+        )
+        accesorio = Accesorio.objects.create(nombre='Cámara de retroceso', stock=50)
+        ModeloAccesorio.objects.create(modelo=modelo, accesorio=accesorio, precio=Decimal('300.00'))
+        self.client.force_authenticate(user=self.usuario)
+        datos = {'vehiculos': [{'vehiculo_id': str(self.vehiculo.id), 'accesorios': [str(accesorio.id)]}]}
+        # Cada `generar` invalida la anterior: quedan dos muertas y una vigente
+        self.generadas = [
+            self.client.post(reverse('cotizacion-generar'), datos, format='json').data for _ in range(3)
+        ]
+        # Inválida pero con reserva: no se archiva
+        con_reserva = Cotizacion.objects.create(
+            cliente=self.cliente, importe_final=Decimal('1.00'), valida=False,
+            fecha_hora_vencimiento=timezone.now() - timedelta(hours=1)
+        )
+        pago = Pago.objects.create(nro_pago='ARCHIVO-1', importe=Decimal('1.00'))
+        Reserva.objects.create(
+            cotizacion=con_reserva, pago=pago, importe=pago.importe, estado='CANCELADA',
+            fecha_hora_vencimiento=con_reserva.fecha_hora_vencimiento
+        )
+
+    def test_archiva_por_lotes(self):
+        from core.archivo import archivar_cotizaciones
+        from core.models import CotizacionAccesorio, CotizacionArchivada
+        resultado = archivar_cotizaciones(ahora=timezone.now(), dias=0, lote=1)
+        self.assertEqual(resultado.cotizaciones, 2)
+        self.assertEqual(resultado.lineas, 4)
+        self.assertEqual(resultado.lotes, 2)
+        muertas = {c['id'] for c in self.generadas[:2]}
+        self.assertEqual({str(pk) for pk in CotizacionArchivada.objects.values_list('id', flat=True)}, muertas)
+        self.assertFalse(Cotizacion.objects.filter(id__in=muertas).exists())
+        self.assertFalse(CotizacionVehiculo.objects.filter(cotizacion_id__in=muertas).exists())
+        self.assertFalse(CotizacionAccesorio.objects.filter(cotizacion_id__in=muertas).exists())
+        self.assertEqual(Cotizacion.objects.count(), 2)
+
+        # Sin antigüedad suficiente no se archiva nada
+        self.assertEqual(archivar_cotizaciones(ahora=timezone.now(), dias=30).filas, 0)
+
+    def test_lectura_del_historial(self):
+        from core.archivo import archivar_cotizaciones
+        archivar_cotizaciones(ahora=timezone.now(), dias=0)
+        original = self.generadas[0]
+        response = self.client.get(reverse('cotizacion-detail', args=[original['id']]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['importe_final'], original['importe_final'])
+        self.assertEqual(response.data['cliente'], self.cliente.id)
+        for campo in ('vehiculos', 'accesorios'):
+            self.assertEqual(
+                response.data[campo],
+                [{k: str(v) for k, v in linea.items() if not k.endswith('_detalle')} for linea in original[campo]]
+            )
+
+        historial = self.client.get(reverse('cotizacion-historial'))
+        self.assertEqual([c['id'] for c in historial.data['results']], [str(c['id']) for c in self.generadas[1::-1]])
+        self.assertEqual(len(self.client.get(reverse('cotizacion-list')).data['results']), 2)
+
+        otro = Usuario.objects.create_user(email='ajeno@test.com', password='password123', tipo_usuario='CLIENTE')
+        self.client.force_authenticate(user=otro)
+        response = self.client.get(reverse('cotizacion-detail', args=[original['id']]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(reverse('cotizacion-historial')).data['results'], [])
+
+    def test_comando(self):
+        from io import StringIO
+        from django.core.management import call_command
+        salida = StringIO()
+        call_command('archivar_cotizaciones', '--dias', '0', stdout=salida)
+        self.assertIn('2 cotizaciones archivadas', salida.getvalue())
+
+
+class TestFacetasCatalogo(APITestCase):
+    """Índice de facetas en memoria y /api/vehiculos/facetas/"""
+
+    def setUp(self):
+        from core import facetas
+        ahora = timezone.now()
+        oferta = Oferta.objects.create(
+            descuento=Decimal('10.00'), fecha_inicio=ahora - timedelta(days=1), fecha_fin=ahora + timedelta(days=1)
+        )
+        fiat = Marca.objects.create(nombre='Fiat')
+        toyota = Marca.objects.create(nombre='Toyota')
+        self.cronos = Modelo.objects.create(nombre='Cronos', marca=fiat)
+        self.argo = Modelo.objects.create(nombre='Argo', marca=fiat)
+        self.hilux = Modelo.objects.create(nombre='Hilux', marca=toyota)
+        especificacion = [
+            # (modelo, año, precio, estado, oferta, eliminado)
+            (self.cronos, 2023, '14000.00', 'DISPONIBLE', None, False),
+            (self.cronos, 2024, '15000.00', 'DISPONIBLE', None, False),
+            (self.argo, 2024, '17500.00', 'RESERVADO', None, False),
+            (self.argo, 2024, '20000.00', 'DISPONIBLE', oferta, False),  # 18000 con la oferta
+            (self.hilux, 2024, '42000.00', 'DISPONIBLE', None, False),
+            (self.hilux, 2022, '39000.00', 'DISPONIBLE', None, True),
+        ]
+        self.vehiculos = [
+            Vehiculo.objects.create(
+                nro_chasis=f'9BD358A1ZR{i:07d}', modelo=modelo, anio=anio, precio=Decimal(precio),
+                estado=estado, oferta=oferta, eliminado=eliminado
+            )
+            for i, (modelo, anio, precio, estado, oferta, eliminado) in enumerate(especificacion)
+        ]
+        # El índice es global del proceso: descartar el de tests anteriores
+        facetas.invalidar()
+        self.url = reverse('vehiculo-facetas')
+
+    @staticmethod
+    def _conteos(data, faceta):
+        return {str(f['valor']): f['cantidad'] for f in data['facetas'][faceta]}
+
+    def test_conteos_y_filtros(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total'], 5)
+        self.assertEqual(self._conteos(response.data, 'marca'), {'Fiat': 4, 'Toyota': 1})
+        self.assertEqual(self._conteos(response.data, 'oferta'), {'False': 4, 'True': 1})
+        self.assertEqual(
+            [(r['desde'], r['cantidad']) for r in response.data['facetas']['precio']],
+            [(Decimal('10000'), 1), (Decimal('15000'), 3), (Decimal('40000'), 1)]
+        )
+
+        # Los conteos de una faceta ignoran su propio filtro
+        response = self.client.get(self.url, {'marca': 'Fiat', 'anio': [2024]})
+        self.assertEqual(response.data['total'], 3)
+        self.assertEqual(self._conteos(response.data, 'marca'), {'Fiat': 3, 'Toyota': 1})
+        self.assertEqual(self._conteos(response.data, 'anio'), {'2023': 1, '2024': 3})
+        self.assertEqual(
+            {m['nombre']: m['cantidad'] for m in response.data['facetas']['modelo']}, {'Argo': 2, 'Cronos': 1}
+        )
+
+        # Precio efectivo (con la oferta vigente) y bordes inclusivos
+        response = self.client.get(self.url, {'precio_min': '15000', 'precio_max': '18000'})
+        self.assertEqual(response.data['total'], 3)
+        response = self.client.get(self.url, {'oferta': 'true', 'estado': ['DISPONIBLE', 'RESERVADO']})
+        self.assertEqual(response.data['total'], 1)
+        response = self.client.get(self.url, {'modelo': [str(self.cronos.id), str(self.hilux.id)]})
+        self.assertEqual(response.data['total'], 3)
+
+    def test_actualizacion_incremental(self):
+        from core.facetas import indice_facetas
+        indice = indice_facetas()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vehiculos[0].estado = 'VENDIDO'
+            self.vehiculos[0].save()
+            self.vehiculos[1].eliminado = True
+            self.vehiculos[1].save()
+            Vehiculo.objects.create(nro_chasis='9BD358A1ZR0000099', modelo=self.hilux, anio=2025,
+                                    precio=Decimal('45000.00'))
+        self.assertIs(indice_facetas(), indice)
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['total'], 5)
+        self.assertEqual(self._conteos(response.data, 'estado'), {'DISPONIBLE': 3, 'RESERVADO': 1, 'VENDIDO': 1})
+        self.assertEqual(self._conteos(response.data, 'anio'), {'2023': 1, '2024': 3, '2025': 1})
+
+        # Un cambio de marca invalida el índice completo
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hilux.marca.nombre = 'Toyota Argentina'
+            self.hilux.marca.save()
+        response = self.client.get(self.url)
+        self.assertIsNot(indice_facetas(), indice)
+        self.assertEqual(self._conteos(response.data, 'marca'), {'Fiat': 3, 'Toyota Argentina': 2})
+
+    def test_cambios_de_otro_proceso(self):
+        """Los cambios publicados por otro proceso se aplican sin reconstruir ni perderse"""
+        from django.core.cache import cache
+        from core import catalogo, facetas, versiones
+        indice = facetas.indice_facetas()
+        version = versiones.version('facetas')
+        # Otro proceso cambia dos vehículos y publica cada uno desde la misma pista vieja
+        Vehiculo.objects.filter(pk=self.vehiculos[0].pk).update(estado='VENDIDO')
+        Vehiculo.objects.filter(pk=self.vehiculos[4].pk).update(estado='RESERVADO')
+        catalogo.sincronizar_vehiculos([self.vehiculos[0].pk, self.vehiculos[4].pk])
+        propio, facetas._indice = facetas._indice, None
+        try:
+            facetas._aplicar([self.vehiculos[0].pk])
+            cache.set(f'{facetas.CAMBIOS}{version}:ultimo', 0, None)
+            facetas._aplicar([self.vehiculos[4].pk])
+        finally:
+            facetas._indice = propio
+        self.assertEqual(versiones.version('facetas'), version)
+        self.assertEqual(cache.get(facetas._entrada(version, 1)), [self.vehiculos[4].pk])
+
+        response = self.client.get(self.url)
+        self.assertIs(facetas.indice_facetas(), indice)
+        self.assertEqual(indice.cambios, 2)
+        self.assertEqual(self._conteos(response.data, 'estado'), {'DISPONIBLE': 2, 'RESERVADO': 2, 'VENDIDO': 1})
+
+        # Un índice que no se sincronizó por más tiempo del que duran las entradas se reconstruye
+        indice.sincronizado -= facetas.DURACION_CAMBIOS + 1
+        self.assertIsNot(facetas.indice_facetas(), indice)
+        self.assertEqual(facetas.indice_facetas().cambios, 2)
+
+    def test_filtro_invalido(self):
+        response = self.client.get(self.url, {'anio': 'dos mil'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestBusquedaCatalogo(APITestCase):
+    """Búsqueda de texto del catálogo con FTS5 (?q=)"""
+
+    def setUp(self):
+        toyota = Marca.objects.create(nombre='Toyota')
+        self.hilux = Modelo.objects.create(nombre='Hilux', marca=toyota)
+        corolla = Modelo.objects.create(nombre='Corolla', marca=toyota)
+        datos = [
+            (self.hilux, 2024, 'Cabina doble, equipamiento full'),
+            (self.hilux, 2023, 'Cabina simple'),
+            (corolla, 2024, 'Sedán híbrido full, poco uso con la hilux de la familia'),
+            (corolla, 2022, None),
+        ]
+        self.vehiculos = [
+            Vehiculo.objects.create(
+                nro_chasis=f'8AJBA3CD0R{i:07d}', modelo=modelo, anio=anio, descripcion=descripcion,
+                precio=Decimal('30000.00')
+            )
+            for i, (modelo, anio, descripcion) in enumerate(datos)
+        ]
+        self.url = reverse('vehiculo-list')
+
+    def _buscar(self, q, **params):
+        response = self.client.get(self.url, {'q': q, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [r['id'] for r in response.data['results']]
+
+    def test_ranking_y_prefijos(self):
+        ids = [v.id for v in self.vehiculos]
+        self.assertEqual(self._buscar('hilux 2024 full'), [ids[0], ids[2]])
+        # La coincidencia en el modelo pesa más que en la descripción
+        self.assertEqual(self._buscar('hilux')[-1], ids[2])
+        self.assertEqual(set(self._buscar('hil')), {ids[0], ids[1], ids[2]})
+        self.assertEqual(self._buscar('HIBRIDO'), [ids[2]])
+        self.assertEqual(self._buscar('toyota', estado='VENDIDO'), [])
+        self.assertEqual(self._buscar('"); DROP TABLE vehiculos; --'), [])
+        self.assertEqual(self._buscar('  '), [])
+
+    def test_paginacion_por_relevancia(self):
+        todos = self._buscar('toyota')
+        self.assertEqual(len(todos), 4)
+        paginas, url = [], self.url + '?q=toyota&page_size=3'
+        while url:
+            response = self.client.get(url)
+            paginas += [r['id'] for r in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(paginas, todos)
+
+    def test_sincronizado_con_el_catalogo(self):
+        from io import StringIO
+        from django.core.management import call_command
+        self.hilux.nombre = 'Hilux SRX'
+        self.hilux.save()
+        self.assertEqual(len(self._buscar('srx')), 2)
+        self.vehiculos[3].descripcion = 'Motor nafta'
+        self.vehiculos[3].save()
+        self.assertEqual(self._buscar('nafta'), [self.vehiculos[3].id])
+        self.vehiculos[3].delete()
+        self.assertEqual(self._buscar('nafta'), [])
+
+        salida = StringIO()
+        call_command('reconstruir_busqueda', stdout=salida)
+        self.assertIn('3 vehículos', salida.getvalue())
+        self.assertEqual(len(self._buscar('srx')), 2)
+
+
+class TestAutocompletado(APITestCase):
+    """Índice de autocompletado en memoria y /api/autocompletar/"""
+
+    def setUp(self):
+        from core import autocompletado
+        toyota = Marca.objects.create(nombre='Toyota')
+        self.peugeot = Marca.objects.create(nombre='Peugeot')
+        Modelo.objects.create(nombre='Corolla', marca=toyota)
+        Modelo.objects.create(nombre='Hilux', marca=toyota)
+        Modelo.objects.create(nombre='208', marca=self.peugeot)
+        self.clientes = {}
+        for dni, apellido in (('30111222', 'Peña'), ('30999888', 'Pereyra')):
+            usuario = Usuario.objects.create_user(
+                email=f'{dni}@test.com', password='password123', tipo_usuario='CLIENTE'
+            )
+            self.clientes[apellido] = Cliente.objects.create(
+                usuario=usuario, dni=dni, nombre='Ana', apellido=apellido,
+                fecha_nacimiento='1990-01-01', direccion='Calle 1', email=f'{dni}@test.com'
+            )
+        self.vendedor_user = Usuario.objects.create_user(
+            email='vendedor@test.com', password='password123', tipo_usuario='VENDEDOR'
+        )
+        # El índice es global del proceso: descartar el de tests anteriores
+        autocompletado.invalidar()
+        self.url = reverse('autocompletar')
+
+    def _nombres(self, q, tipo, **params):
+        response = self.client.get(self.url, {'q': q, 'tipo': tipo, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        campo = 'apellido' if tipo == 'cliente' else 'nombre'
+        return [fila[campo] for fila in response.data[f'{tipo}s']]
+
+    def test_prefijos_y_visibilidad(self):
+        response = self.client.get(self.url, {'q': 'pe'})
+        self.assertEqual(response.data['marcas'], [{'id': str(self.peugeot.id), 'nombre': 'Peugeot'}])
+        self.assertEqual(response.data['clientes'], [])
+        self.assertEqual(self._nombres('CO', 'modelo'), ['Corolla'])
+        self.assertEqual(self.client.get(self.url, {'q': '2', 'tipo': 'modelo'}).data['modelos'][0]['marca'], 'Peugeot')
+        self.assertEqual(self.client.get(self.url, {'tipo': 'marca'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Vendedor: todos los clientes, por apellido (sin tildes) o por DNI
+        self.client.force_authenticate(user=self.vendedor_user)
+        self.assertEqual(self._nombres('pe', 'cliente'), ['Peña', 'Pereyra'])
+        self.assertEqual(self._nombres('PEÑ', 'cliente'), ['Peña'])
+        self.assertEqual(self._nombres('309', 'cliente'), ['Pereyra'])
+        self.assertEqual(self._nombres('30', 'cliente', limite=1), ['Peña'])
+
+        # Un cliente solo se encuentra a sí mismo
+        self.client.force_authenticate(user=self.clientes['Pereyra'].usuario)
+        self.assertEqual(self._nombres('pe', 'cliente'), ['Pereyra'])
+        self.assertEqual(self._nombres('301', 'cliente'), [])
+
+    def test_sincronizacion_incremental(self):
+        from core import autocompletado
+        self.client.force_authenticate(user=self.vendedor_user)
+        indice = autocompletado.indice_autocompletado()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            usuario = Usuario.objects.create_user(
+                email='nuevo@test.com', password='password123', tipo_usuario='CLIENTE'
+            )
+            Cliente.objects.create(
+                usuario=usuario, dni='30555444', nombre='Luis', apellido='Pérez',
+                fecha_nacimiento='1990-01-01', direccion='Calle 2', email='nuevo@test.com'
+            )
+            self.peugeot.nombre = 'Peugeot Argentina'
+            self.peugeot.save()
+
+        # Altas y modificaciones: el mismo índice, sincronizado en el lugar
+        self.assertEqual(self._nombres('pe', 'cliente'), ['Peña', 'Pereyra', 'Pérez'])
+        self.assertIs(autocompletado.indice_autocompletado(), indice)
+        self.assertEqual(self._nombres('peugeot a', 'marca'), ['Peugeot Argentina'])
+        self.assertEqual(self.client.get(self.url, {'q': '208', 'tipo': 'modelo'}).data['modelos'][0]['marca'],
+                         'Peugeot Argentina')
+
+        # Las bajas reconstruyen
+        with self.captureOnCommitCallbacks(execute=True):
+            self.clientes['Peña'].delete()
+        self.assertEqual(self._nombres('pe', 'cliente'), ['Pereyra', 'Pérez'])
+        self.assertIsNot(autocompletado.indice_autocompletado(), indice)
+
+
+class TestRespuestasCondicionales(APITestCase):
+    """ETag en listados: 304 sin consultas y validadores por usuario"""
+
+    def setUp(self):
+        marca = Marca.objects.create(nombre='Renault')
+        self.modelo = Modelo.objects.create(nombre='Kwid', marca=marca)
+        ahora = timezone.now()
+        self.oferta = Oferta.objects.create(
+            descuento=Decimal('10.00'), fecha_inicio=ahora + timedelta(days=1), fecha_fin=ahora + timedelta(days=2)
+        )
+        self.vehiculo = Vehiculo.objects.create(
+            nro_chasis='93YRBB00000000001', precio=Decimal('12000.00'), anio=2024, modelo=self.modelo,
+            oferta=self.oferta
+        )
+        self.usuarios = []
+        for dni in ('41000001', '41000002'):
+            usuario = Usuario.objects.create_user(email=f'{dni}@test.com', password='password123', tipo_usuario='CLIENTE')
+            cliente = Cliente.objects.create(
+                usuario=usuario, dni=dni, nombre='Eva', apellido='Condicional',
+                fecha_nacimiento='1990-01-01', direccion='Calle 7', email=f'{dni}@test.com'
+            )
+            Cotizacion.objects.create(
+                cliente=cliente, importe_final=Decimal('12000.00'),
+                fecha_hora_vencimiento=ahora - timedelta(hours=1)
+            )
+            self.usuarios.append(usuario)
+
+    def _get(self, url, etag=None, **params):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(url, params, **headers)
+
+    def test_304_sin_consultas(self):
+        url = reverse('vehiculo-list')
+        response = self._get(url, estado='DISPONIBLE')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        self.assertNotIn('Last-Modified', response)
+        self.assertIn('Authorization', response['Vary'])
+        self.assertIn('private', response['Cache-Control'])
+
+        with self.assertNumQueries(0):
+            response = self._get(url, etag, estado='DISPONIBLE')
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        # Otro filtro es otra respuesta
+        self.assertEqual(self._get(url, etag, estado='VENDIDO').status_code, status.HTTP_200_OK)
+
+        self.vehiculo.precio = Decimal('12500.00')
+        self.vehiculo.save()
+        response = self._get(url, etag, estado='DISPONIBLE')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        # Sin Last-Modified, If-Modified-Since solo no produce 304 (una escritura en el mismo segundo)
+        response = self.client.get(url, {'estado': 'DISPONIBLE'}, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_borde_de_oferta_cambia_el_validador(self):
+        from unittest import mock
+        url = reverse('vehiculo-detail', args=[self.vehiculo.id])
+        etag = self._get(url)['ETag']
+        self.assertEqual(self._get(url, etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        # Empieza la oferta: cambia precio_con_oferta sin ninguna escritura
+        with mock.patch('django.utils.timezone.now', return_value=self.oferta.fecha_inicio + timedelta(hours=1)):
+            response = self._get(url, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['precio_con_oferta'], Decimal('10800.00'))
+
+    def test_validador_por_usuario_y_actualizaciones_masivas(self):
+        from core.vencimientos import procesar_vencimientos
+        url = reverse('cotizacion-list')
+        self.client.force_authenticate(user=self.usuarios[0])
+        etag = self._get(url)['ETag']
+        self.assertEqual(self._get(url, etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # El ETag de un cliente no valida la respuesta de otro
+        self.client.force_authenticate(user=self.usuarios[1])
+        response = self._get(url, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+
+        # El barrido de vencimientos actualiza con UPDATE masivos
+        self.client.force_authenticate(user=self.usuarios[0])
+        self.assertEqual(procesar_vencimientos().cotizaciones, 2)
+        response = self._get(url, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['results'][0]['valida'])
+
+    def test_sin_validadores_con_cache_por_proceso(self):
+        """Con LocMemCache y varios procesos otro worker no vería las escrituras: no hay ETag ni 304"""
+        from core import versiones
+        url = reverse('vehiculo-list')
+        etag = self._get(url)['ETag']
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        with self.settings(FLYCAR_CACHE_UN_PROCESO=False, CACHES=locmem):
+            self.assertFalse(versiones.cache_compartido())
+            response = self._get(url, etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('ETag', response)
+            self.assertNotIn('Last-Modified', response)
+            self.assertIn('Authorization', response['Vary'])
+            with self.settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'}}):
+                self.assertTrue(versiones.cache_compartido())
+
+    def test_aviso_al_arrancar_con_cache_por_proceso(self):
+        from core import versiones
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        with self.settings(FLYCAR_CACHE_UN_PROCESO=False, CACHES=locmem):
+            with self.assertLogs('core.versiones', 'WARNING') as registro:
+                versiones.verificar_cache()
+        self.assertIn('LocMemCache', registro.output[0])
+        with self.assertNoLogs('core.versiones', 'WARNING'):
+            versiones.verificar_cache()
+
+    def test_arranque_sin_precargas_por_defecto(self):
+        """iniciar() no consulta la base ni arranca hilos salvo que se configure"""
+        from unittest import mock
+        from django.db import connections
+        from core import arranque, autocompletado, facetas
+        # Las precargas cierran las conexiones del proceso al terminar, incluida la del test
+        with mock.patch.object(facetas, 'indice_facetas') as facetas_, \
+                mock.patch.object(autocompletado, 'indice_autocompletado') as autocompletado_, \
+                mock.patch.object(connections, 'close_all'):
+            with self.assertNumQueries(0):
+                arranque.iniciar()
+            facetas_.assert_not_called()
+            autocompletado_.assert_not_called()
+            with self.settings(FLYCAR_FACETAS_PRECARGAR=True, FLYCAR_AUTOCOMPLETADO_PRECARGAR=True):
+                arranque.iniciar()
+            facetas_.assert_called_once()
+            autocompletado_.assert_called_once()
+
+
+class TestInstantaneaCatalogo(APITestCase):
+    """Catálogo y simulación servidos desde la instantánea mapeada en memoria, con la misma salida que la base"""
+
+    def setUp(self):
+        import tempfile
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.ruta = f'{directorio.name}/catalogo.bin'
+        self.enterContext(override_settings(FLYCAR_INSTANTANEA_RUTA=self.ruta))
+
+        marca = Marca.objects.create(nombre='Citroën')
+        self.modelo = Modelo.objects.create(nombre='C4 Cactus', marca=marca)
+        ahora = timezone.now()
+        self.oferta = Oferta.objects.create(
+            descuento=Decimal('12.50'), fecha_inicio=ahora - timedelta(days=1), fecha_fin=ahora + timedelta(days=1)
+        )
+        self.accesorios = [
+            Accesorio.objects.create(nombre='Llantas', oferta=self.oferta),
+            Accesorio.objects.create(nombre='Barras portaequipaje'),
+            Accesorio.objects.create(nombre='Polarizado'),
+        ]
+        ModeloAccesorio.objects.create(modelo=self.modelo, accesorio=self.accesorios[0], precio=Decimal('900.00'))
+        ModeloAccesorio.objects.create(modelo=self.modelo, accesorio=self.accesorios[1], precio=Decimal('333.33'))
+        self.vehiculos = [
+            Vehiculo.objects.create(
+                nro_chasis=f'935SUNFN0PB00000{i}', precio=Decimal('21000.00') + i, anio=2020 + i, modelo=self.modelo,
+                estado=estado, oferta=self.oferta if i % 2 else None, descripcion='Único dueño' if i == 2 else None,
+            )
+            for i, estado in enumerate(['DISPONIBLE', 'DISPONIBLE', 'RESERVADO', 'DISPONIBLE', 'VENDIDO'])
+        ]
+        self.eliminado = Vehiculo.objects.create(
+            nro_chasis='935SUNFN0PB000099', precio=Decimal('19999.99'), anio=2019, modelo=self.modelo, eliminado=True
+        )
+        # El validador condicional usa la matriz de precios, cacheada por proceso
+        matriz_precios()
+
+    def _comparar(self, metodo, url, datos=None):
+        """Respuesta desde la instantánea (sin consultas) igual byte a byte a la de la base"""
+        from core import instantanea
+        self.assertIsNotNone(instantanea.vigente())
+        with self.assertNumQueries(0):
+            obtenida = getattr(self.client, metodo)(url, datos, format='json' if metodo == 'post' else None)
+        with self.settings(FLYCAR_INSTANTANEA_RUTA=None):
+            esperada = getattr(self.client, metodo)(url, datos, format='json' if metodo == 'post' else None)
+        self.assertEqual(obtenida.status_code, esperada.status_code)
+        self.assertEqual(obtenida.content, esperada.content)
+        return obtenida
+
+    def test_listado_y_detalle(self):
+        from core.instantanea import actualizar
+        self.assertEqual(actualizar().vehiculos, 5)
+        url = reverse('vehiculo-list')
+        for params in ({}, {'estado': 'DISPONIBLE'}, {'count': 'true', 'estado': 'RESERVADO'}, {'estado': 'NINGUNO'}):
+            self._comparar('get', url, params)
+        # Recorrido completo con cursores en ambas direcciones
+        siguiente, paginas = f'{url}?page_size=2&count=1', []
+        while siguiente:
+            paginas.append(self._comparar('get', siguiente).data)
+            siguiente = paginas[-1]['next']
+        self.assertEqual(sum(len(p['results']) for p in paginas), 5)
+        self._comparar('get', paginas[-1]['previous'])
+        for vehiculo in [*self.vehiculos, self.eliminado]:
+            self._comparar('get', reverse('vehiculo-detail', args=[vehiculo.id]))
+        self._comparar('get', reverse('vehiculo-detail', args=[self.vehiculos[2].id]), {'estado': 'DISPONIBLE'})
+        self.assertEqual(self.client.get(f'{url}?cursor=WzEsMiwzXQ==').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_simular(self):
+        from core.instantanea import actualizar
+        actualizar()
+        url = reverse('cotizacion-simular')
+        self._comparar('post', url, {'vehiculos': [
+            {'vehiculo_id': str(self.vehiculos[1].id), 'accesorios': [str(a.id) for a in self.accesorios]},
+            {'vehiculo_id': str(self.vehiculos[0].id), 'accesorios': [str(self.accesorios[1].id)]},
+        ]})
+        # Vehículo eliminado o inexistente: decide la base
+        for vehiculo_id in (self.eliminado.id, uuid.uuid4()):
+            datos = {'vehiculos': [{'vehiculo_id': str(vehiculo_id), 'accesorios': []}]}
+            obtenida = self.client.post(url, datos, format='json')
+            with self.settings(FLYCAR_INSTANTANEA_RUTA=None):
+                self.assertEqual(obtenida.content, self.client.post(url, datos, format='json').content)
+
+    def test_version_y_reemplazo_atomico(self):
+        from core import instantanea
+        self.assertIsNone(instantanea.vigente())
+        instantanea.actualizar()
+        anterior = instantanea.vigente()
+        self.assertIsNone(instantanea.actualizar())
+
+        # Un cambio de vehículo no la vence: esa fila se lee de la base hasta la siguiente
+        vehiculo = self.vehiculos[0]
+        vehiculo.precio = Decimal('25000.00')
+        vehiculo.save()
+        self.assertIs(instantanea.vigente(), anterior)
+        self.assertEqual(anterior.modificados, {vehiculo.id})
+        response = self.client.get(reverse('vehiculo-detail', args=[vehiculo.id]))
+        self.assertEqual(response.data['precio'], '25000.00')
+
+        self.assertIsNotNone(instantanea.actualizar())
+        actual = instantanea.vigente()
+        self.assertIsNotNone(actual)
+        self.assertNotEqual(actual.identidad, anterior.identidad)
+        self.assertEqual(actual.vehiculo(vehiculo.id).precio, Decimal('25000.00'))
+        self.assertEqual(actual.modificados, set())
+        # Quien tenía la anterior la sigue leyendo intacta
+        self.assertEqual(anterior.vehiculo(vehiculo.id).precio, Decimal('21000.00'))
+
+        # Un cambio de modelo sí la vence: se lee de la base hasta que se publique la siguiente
+        self.modelo.nombre = 'C4'
+        self.modelo.save()
+        self.assertIsNone(instantanea.vigente())
+
+    def test_vehiculos_cambiados_superpuestos(self):
+        """Con vehículos cambiados, nuevos y eliminados la salida sigue igual a la de la base"""
+        from core import instantanea
+        instantanea.actualizar()
+        self.vehiculos[1].estado = 'RESERVADO'
+        self.vehiculos[1].save()
+        self.vehiculos[3].eliminado = True
+        self.vehiculos[3].save()
+        nuevo = Vehiculo.objects.create(
+            nro_chasis='935SUNFN0PB000050', precio=Decimal('30000.00'), anio=2025, modelo=self.modelo
+        )
+        self.assertEqual(instantanea.vigente().modificados, {self.vehiculos[1].id, self.vehiculos[3].id, nuevo.id})
+
+        url = reverse('vehiculo-list')
+        for params in ({'count': 'true'}, {'count': 'true', 'estado': 'RESERVADO'}, {'estado': 'DISPONIBLE'}):
+            with self.settings(FLYCAR_INSTANTANEA_RUTA=None):
+                esperada = self.client.get(url, params)
+            # Una sola consulta: la de los vehículos cambiados
+            with self.assertNumQueries(1):
+                self.assertEqual(self.client.get(url, params).content, esperada.content)
+        for ordering, page_size in (('', 2), ('', 1), ('-created_at', 2)):
+            siguiente, recorrido = f'{url}?page_size={page_size}&count=1', []
+            while siguiente:
+                with self.settings(FLYCAR_INSTANTANEA_RUTA=None):
+                    esperada = self.client.get(siguiente)
+                obtenida = self.client.get(siguiente)
+                self.assertEqual(obtenida.content, esperada.content)
+                recorrido += [v['id'] for v in obtenida.data['results']]
+                siguiente = obtenida.data['next']
+            self.assertEqual(len(recorrido), 5)
+
+        # El detalle y la simulación de un vehículo cambiado deciden en la base; los demás no consultan
+        self._comparar('get', reverse('vehiculo-detail', args=[self.vehiculos[0].id]))
+        for vehiculo in (self.vehiculos[1], self.vehiculos[3], nuevo):
+            obtenida = self.client.get(reverse('vehiculo-detail', args=[vehiculo.id]))
+            with self.settings(FLYCAR_INSTANTANEA_RUTA=None):
+                self.assertEqual(obtenida.content, self.client.get(reverse('vehiculo-detail', args=[vehiculo.id])).content)
+        datos = {'vehiculos': [{'vehiculo_id': str(self.vehiculos[3].id), 'accesorios': []}]}
+        obtenida = self.client.post(reverse('cotizacion-simular'), datos, format='json')
+        with self.settings(FLYCAR_INSTANTANEA_RUTA=None):
+            self.assertEqual(obtenida.content, self.client.post(reverse('cotizacion-simular'), datos, format='json').content)
+
+        # Demasiados cambios: vuelve a la base hasta la próxima regeneración
+        from unittest import mock
+        with mock.patch.object(instantanea, 'MAX_SUPERPUESTOS', 2):
+            self.assertIsNone(instantanea.vigente())
+
+
+class TestRenderers(APITestCase):
+    """ORJSONRenderer con la misma salida que DRF y MessagePack por Accept"""
+
+    def setUp(self):
+        marca = Marca.objects.create(nombre='Peugeot')
+        self.modelo = Modelo.objects.create(nombre='208', marca=marca)
+        oferta = Oferta.objects.create(
+            descuento=Decimal('7.50'), fecha_inicio=timezone.now() - timedelta(days=1),
+            fecha_fin=timezone.now() + timedelta(days=1)
+        )
+        self.vehiculo = Vehiculo.objects.create(
+            nro_chasis='8AD2A9HP0PG000001', precio=Decimal('18999.99'), anio=2024, modelo=self.modelo,
+            oferta=oferta, descripcion='Único dueño “impecable” 🚗'
+        )
+        self.accesorio = Accesorio.objects.create(nombre='Alarma')
+        ModeloAccesorio.objects.create(modelo=self.modelo, accesorio=self.accesorio, precio=Decimal('150.00'))
+        self.simulacion = {'vehiculos': [
+            {'vehiculo_id': str(self.vehiculo.id), 'accesorios': [str(self.accesorio.id)]}
+        ]}
+
+    def test_json_igual_a_drf(self):
+        import datetime as dt
+        from django.utils.translation import gettext_lazy
+        from rest_framework.renderers import JSONRenderer
+        from core.renderers import ORJSONRenderer
+        respuestas = [
+            self.client.get(reverse('vehiculo-list')).data,
+            self.client.get(reverse('vehiculo-detail', args=[self.vehiculo.id])).data,
+            self.client.post(reverse('cotizacion-simular'), self.simulacion, format='json').data,
+            {
+                'fecha': timezone.now(), 'dia': dt.date(2024, 2, 29), 'hora': dt.time(10, 30, 15, 123456),
+                'duracion': timedelta(hours=1), 'id': uuid.uuid4(), 'importe': Decimal('0.10'),
+                'texto': gettext_lazy('Not found.'), 1: [2 ** 70, None, 1.5, ('a', 'b')],
+            },
+        ]
+        for datos in respuestas:
+            self.assertEqual(ORJSONRenderer().render(datos), JSONRenderer().render(datos))
+        self.assertEqual(
+            ORJSONRenderer().render(respuestas[0], 'application/json; indent=4'),
+            JSONRenderer().render(respuestas[0], 'application/json; indent=4'),
+        )
+        response = self.client.post(
+            reverse('cotizacion-simular'), '{"vehiculos": [', content_type='application/json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('JSON parse error', response.data['detail'])
+
+    @unittest.skipUnless(find_spec('msgpack'), 'requiere msgpack')
+    def test_msgpack_por_accept(self):
+        import msgpack
+        url = reverse('vehiculo-list')
+        json_respuesta = self.client.get(url)
+        response = self.client.get(url, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content), json.loads(json_respuesta.content))
+        self.assertNotEqual(response['ETag'], json_respuesta['ETag'])
+
+        response = self.client.post(
+            reverse('cotizacion-simular'), msgpack.packb(self.simulacion),
+            content_type='application/msgpack', HTTP_ACCEPT='application/msgpack'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(msgpack.unpackb(response.content)['importe_total'], float(response.data['importe_total']))
+        response = self.client.post(
+            reverse('cotizacion-simular'), b'\xc1', content_type='application/msgpack'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestSerializacionRapida(APITestCase):
+    """ListaRapidaSerializer con la misma salida byte a byte que el ListSerializer de DRF"""
+
+    def setUp(self):
+        from core.models import CotizacionAccesorio
+        usuario = Usuario.objects.create_user(email='rapida@test.com', password='password123', tipo_usuario='CLIENTE')
+        self.cliente = Cliente.objects.create(
+            usuario=usuario, dni='44556677', nombre='Ana', apellido='Gómez', fecha_nacimiento='1985-05-05',
+            direccion='Av. Siempre Viva 742', email='rapida@test.com'
+        )
+        marca = Marca.objects.create(nombre='Renault')
+        modelo = Modelo.objects.create(nombre='Kangoo', marca=marca)
+        ahora = timezone.now()
+        oferta = Oferta.objects.create(
+            descuento=Decimal('12.50'), fecha_inicio=ahora - timedelta(days=1), fecha_fin=ahora + timedelta(days=1)
+        )
+        self.accesorios = [
+            Accesorio.objects.create(nombre='Enganche', descripcion='Reforzado', oferta=oferta),
+            Accesorio.objects.create(nombre='Alfombras'),
+        ]
+        self.vehiculos = [
+            Vehiculo.objects.create(
+                nro_chasis=f'93YFCRB0PB00000{i}', precio=Decimal('17500.55') + i, anio=2021 + i, modelo=modelo,
+                oferta=oferta if i % 2 else None, descripcion='Utilitario “ágil”' if i == 0 else None,
+            )
+            for i in range(3)
+        ]
+        for i in range(2):
+            cotizacion = Cotizacion.objects.create(
+                cliente=self.cliente, importe_final=Decimal('40000.10') + i,
+                fecha_hora_vencimiento=ahora + timedelta(days=7), valida=bool(i),
+            )
+            # El mismo vehículo y accesorio en ambas cotizaciones: el detalle anidado se reutiliza por pk
+            for vehiculo in self.vehiculos[i:]:
+                linea = CotizacionVehiculo.objects.create(
+                    cotizacion=cotizacion, vehiculo=vehiculo, precio_unitario=vehiculo.precio
+                )
+                for accesorio in self.accesorios[:1 + i]:
+                    CotizacionAccesorio.objects.create(
+                        cotizacion=cotizacion, cotizacion_vehiculo=linea, accesorio=accesorio,
+                        precio_unitario=Decimal('120.00'),
+                    )
+        # Cotización sin líneas
+        Cotizacion.objects.create(
+            cliente=self.cliente, importe_final=Decimal('0.00'), fecha_hora_vencimiento=ahora + timedelta(days=7)
+        )
+
+    def _comparar(self, serializer_class, objetos, contexto=None):
+        from rest_framework import serializers
+        from rest_framework.renderers import JSONRenderer
+        from core.representacion import ListaRapidaSerializer
+        contexto = {'ahora': timezone.now(), **(contexto or {})}
+        esperada = serializers.ListSerializer(objetos, child=serializer_class(), context=contexto).data
+        obtenida = ListaRapidaSerializer(objetos, child=serializer_class(), context=contexto).data
+        self.assertEqual(JSONRenderer().render(obtenida), JSONRenderer().render(esperada))
+        return obtenida
+
+    def test_vehiculos_y_catalogo(self):
+        from core.models import VehiculoCatalogo
+        from core.serializers import VehiculoCatalogoSerializer, VehiculoSerializer
+        vehiculos = list(Vehiculo.objects.select_related('modelo__marca', 'oferta').order_by('nro_chasis'))
+        with self.assertNumQueries(0):
+            filas = self._comparar(VehiculoSerializer, vehiculos)
+        self.assertEqual(
+            [fila['precio_con_oferta'] for fila in filas],
+            [Decimal('17500.55'), Decimal('15313.85625'), Decimal('17502.55')],
+        )
+        self.assertIsNone(filas[0]['oferta'])
+        # Sin select_related los FK se leen de la base igual que en DRF
+        self._comparar(VehiculoSerializer, Vehiculo.objects.order_by('nro_chasis'))
+        self._comparar(VehiculoCatalogoSerializer, list(VehiculoCatalogo.objects.order_by('nro_chasis')))
+
+    def test_cotizaciones_anidadas(self):
+        from django.db.models import Prefetch
+        from core.models import CotizacionAccesorio
+        from core.serializers import CotizacionSerializer
+        cotizaciones = list(Cotizacion.objects.order_by('importe_final').prefetch_related(
+            Prefetch('vehiculos', CotizacionVehiculo.objects.select_related('vehiculo__modelo__marca', 'vehiculo__oferta')),
+            Prefetch('accesorios', CotizacionAccesorio.objects.select_related('accesorio')),
+        ))
+        with self.assertNumQueries(0):
+            filas = self._comparar(CotizacionSerializer, cotizaciones)
+        self.assertEqual([len(fila['vehiculos']) for fila in filas], [0, 3, 2])
+        self.assertEqual([len(fila['accesorios']) for fila in filas], [0, 3, 4])
+        # Filas anidadas repetidas: dicts distintos con el mismo contenido
+        repetido = self.vehiculos[2].id
+        detalles = [
+            linea['vehiculo_detalle'] for fila in filas for linea in fila['vehiculos'] if linea['vehiculo'] == repetido
+        ]
+        self.assertEqual(len(detalles), 2)
+        self.assertEqual(detalles[0], detalles[1])
+        self.assertIsNot(detalles[0], detalles[1])
+        # Sin prefetch: los managers de cada cotización
+        self._comparar(CotizacionSerializer, Cotizacion.objects.order_by('importe_final'))
+
+    def test_listados_de_la_api(self):
+        """Cada fila del listado (con el plan) es igual al detalle (serializer de DRF)"""
+        response = self.client.get(reverse('vehiculo-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        filas = json.loads(response.content)['results']
+        self.assertEqual(len(filas), 3)
+        for fila in filas:
+            self.assertEqual(fila, json.loads(self.client.get(reverse('vehiculo-detail', args=[fila['id']])).content))
+
+
+class TestCamposSelectivos(APITestCase):
+    """?fields= / ?expand= en cotizaciones, reservas, ventas y vehículos, con consultas recortadas"""
+
+    def setUp(self):
+        from core.models import CotizacionAccesorio
+        self.usuario = Usuario.objects.create_user(email='campos@test.com', password='password123', tipo_usuario='VENDEDOR')
+        vendedor = Vendedor.objects.create(usuario=self.usuario, dni='11223344', nombre='Luis', apellido='Paz')
+        usuario_cliente = Usuario.objects.create_user(
+            email='cliente.campos@test.com', password='password123', tipo_usuario='CLIENTE'
+        )
+        cliente = Cliente.objects.create(
+            usuario=usuario_cliente, dni='55667788', nombre='Eva', apellido='Ruiz', fecha_nacimiento='1990-01-01',
+            direccion='Belgrano 100', email='cliente.campos@test.com'
+        )
+        marca = Marca.objects.create(nombre='Fiat')
+        modelo = Modelo.objects.create(nombre='Cronos', marca=marca)
+        ahora = timezone.now()
+        oferta = Oferta.objects.create(
+            descuento=Decimal('10.00'), fecha_inicio=ahora - timedelta(days=1), fecha_fin=ahora + timedelta(days=1)
+        )
+        accesorio = Accesorio.objects.create(nombre='Sensor de estacionamiento')
+        for i in range(3):
+            cotizacion = Cotizacion.objects.create(
+                cliente=cliente, importe_final=Decimal('30000.00') + i, fecha_hora_vencimiento=ahora + timedelta(days=2)
+            )
+            for j in range(2):
+                vehiculo = Vehiculo.objects.create(
+                    nro_chasis=f'9BD358A4NPY00{i}{j}00', precio=Decimal('15000.00'), anio=2023, modelo=modelo,
+                    oferta=oferta if j else None,
+                )
+                linea = CotizacionVehiculo.objects.create(
+                    cotizacion=cotizacion, vehiculo=vehiculo, precio_unitario=vehiculo.get_precio_con_oferta()
+                )
+                CotizacionAccesorio.objects.create(
+                    cotizacion=cotizacion, cotizacion_vehiculo=linea, accesorio=accesorio, precio_unitario=Decimal('80.00')
+                )
+            pago = Pago.objects.create(nro_pago=f'PAY-CAMPOS{i}', importe=Decimal('1500.00'))
+            if i < 2:
+                Reserva.objects.create(
+                    cotizacion=cotizacion, pago=pago, importe=pago.importe, fecha_hora_vencimiento=ahora + timedelta(days=7)
+                )
+            else:
+                Venta.objects.create(cotizacion=cotizacion, pago=pago, vendedor=vendedor, comision=Decimal('3000.00'))
+        self.client.force_authenticate(user=self.usuario)
+        # El validador condicional usa la matriz de precios, cacheada por proceso
+        matriz_precios()
+
+    def _get(self, url, params=None):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return json.loads(response.content), [consulta['sql'] for consulta in consultas.captured_queries]
+
+    def test_cotizaciones(self):
+        url = reverse('cotizacion-list')
+        completo, consultas_completo = self._get(url)
+        # Sin parámetros: la respuesta de siempre, con las líneas precargadas (sin N+1)
+        self.assertEqual(set(completo['results'][0]), {
+            'id', 'vehiculos', 'accesorios', 'fecha_hora_generada', 'importe_final', 'valida',
+            'fecha_hora_vencimiento', 'cliente', 'created_at', 'updated_at',
+        })
+        self.assertEqual(len(completo['results'][0]['vehiculos'][0]['vehiculo_detalle']), 15)
+        _, consultas_mas = self._get(url, {'page_size': 1})
+        self.assertEqual(len(consultas_completo), len(consultas_mas))
+
+        datos, consultas = self._get(url, {'fields': 'id,importe_final,fecha_hora_generada'})
+        self.assertEqual(datos['results'], [
+            {'id': fila['id'], 'importe_final': fila['importe_final'], 'fecha_hora_generada': fila['fecha_hora_generada']}
+            for fila in completo['results']
+        ])
+        self.assertFalse([sql for sql in consultas if 'cotizacion_vehiculos' in sql or '"valida"' in sql])
+
+        # Líneas sin el detalle del vehículo: no se consulta la tabla de vehículos
+        datos, consultas = self._get(url, {'expand': 'vehiculos'})
+        self.assertNotIn('accesorios', datos['results'][0])
+        self.assertEqual(datos['results'][0]['vehiculos'], [
+            {clave: linea[clave] for clave in ('id', 'vehiculo', 'precio_unitario')}
+            for linea in completo['results'][0]['vehiculos']
+        ])
+        self.assertFalse([sql for sql in consultas if '"vehiculos"' in sql])
+
+        datos, consultas = self._get(url, {'fields': 'id,vehiculos.vehiculo_detalle.anio,vehiculos.vehiculo_detalle.precio_con_oferta'})
+        self.assertEqual(datos['results'][0]['vehiculos'], [
+            {'vehiculo_detalle': {
+                'anio': linea['vehiculo_detalle']['anio'],
+                'precio_con_oferta': linea['vehiculo_detalle']['precio_con_oferta'],
+            }} for linea in completo['results'][0]['vehiculos']
+        ])
+        self.assertFalse([sql for sql in consultas if '"marcas"' in sql])
+
+        datos, _ = self._get(url, {'expand': 'vehiculos.vehiculo_detalle,accesorios.accesorio_detalle'})
+        self.assertEqual(datos['results'], completo['results'])
+        # El detalle también respeta la selección
+        detalle, _ = self._get(reverse('cotizacion-detail', args=[completo['results'][0]['id']]), {'fields': 'valida'})
+        self.assertEqual(detalle, {'valida': True})
+
+    def test_reservas_y_ventas(self):
+        completo, consultas = self._get(reverse('reserva-list'))
+        self.assertEqual(len(completo['results']), 2)
+        self.assertFalse([sql for sql in consultas if sql.startswith('SELECT') and '"pagos"' in sql and 'JOIN' not in sql])
+        datos, consultas = self._get(reverse('reserva-list'), {'fields': 'nro_reserva,pago_detalle.importe'})
+        self.assertEqual(datos['results'], [
+            {'nro_reserva': fila['nro_reserva'], 'pago_detalle': {'importe': fila['pago_detalle']['importe']}}
+            for fila in completo['results']
+        ])
+        datos, consultas = self._get(reverse('reserva-list'), {'expand': ''})
+        self.assertNotIn('pago_detalle', datos['results'][0])
+        self.assertFalse([sql for sql in consultas if '"pagos"' in sql])
+
+        completo, _ = self._get(reverse('venta-list'))
+        self.assertEqual(completo['results'][0]['vendedor_nombre'], 'Luis')
+        datos, consultas = self._get(reverse('venta-list'), {'fields': 'vendedor_nombre,comision'})
+        self.assertEqual(datos['results'], [{'vendedor_nombre': 'Luis', 'comision': '3000.00'}])
+        self.assertFalse([sql for sql in consultas if '"pagos"' in sql])
+
+    def test_vehiculos_y_escrituras(self):
+        url = reverse('vehiculo-list')
+        completo, _ = self._get(url)
+        datos, _ = self._get(url, {'fields': 'id,precio_con_oferta,marca_nombre'})
+        self.assertEqual(datos['results'], [
+            {'id': fila['id'], 'precio_con_oferta': fila['precio_con_oferta'], 'marca_nombre': fila['marca_nombre']}
+            for fila in completo['results']
+        ])
+        # Las escrituras validan y responden con todos los campos
+        vehiculo = completo['results'][0]
+        response = self.client.patch(f"{reverse('vehiculo-detail', args=[vehiculo['id']])}?fields=id", {'anio': 2024})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['anio'], 2024)
+        self.assertIn('precio', response.data)
+
+
+class TestPresupuestoConsultas(PresupuestoConsultasMixin, APITestCase):
+    """Cada endpoint hace las mismas consultas con cualquier tamaño de página (core/presupuesto.py)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        from core.archivo import archivar_cotizaciones
+        from core.generador import generar_datos
+        generar_datos(vehiculos=1000, semilla=11, lote=1000)
+        archivar_cotizaciones(ahora=timezone.now(), dias=0)
+        cliente = Cliente.objects.annotate(n=Count('cotizaciones__reserva')).order_by('-n', 'dni').first()
+        vendedor = Vendedor.objects.annotate(n=Count('ventas')).order_by('-n', 'dni').first()
+        cls.usuarios = {'CLIENTE': cliente.usuario, 'VENDEDOR': vendedor.usuario}
+
+    def _url(self, presupuesto):
+        if not presupuesto.ruta.endswith('-detail'):
+            return reverse(presupuesto.ruta)
+        listado = self.client.get(reverse(presupuesto.ruta.replace('-detail', '-list')))
+        return reverse(presupuesto.ruta, args=[listado.data['results'][0]['id']])
+
+    def test_presupuestos(self):
+        for presupuesto in PRESUPUESTOS:
+            with self.subTest(presupuesto.nombre):
+                self.client.force_authenticate(user=self.usuarios.get(presupuesto.usuario))
+                self.assertPresupuestoConsultas(self._url(presupuesto), presupuesto.consultas, presupuesto.params)
+
+    def test_relacion_fuera_del_plan(self):
+        """Una relación que el serializer lee y el plan no carga hace fallar el presupuesto"""
+        from unittest import mock
+        from core.views import CotizacionViewSet, VentaViewSet
+        self.client.force_authenticate(user=self.usuarios['VENDEDOR'])
+        with mock.patch.object(VentaViewSet, 'plan_carga', ('pago',)):
+            with self.assertRaisesRegex(AssertionError, 'crecen con la página'):
+                self.assertPresupuestoConsultas(reverse('venta-list'), 1)
+        plan = ('vehiculos__vehiculo__modelo__marca', 'accesorios__accesorio')
+        with mock.patch.object(CotizacionViewSet, 'plan_carga', plan):
+            with self.assertRaisesRegex(AssertionError, '"ofertas"'):
+                self.assertPresupuestoConsultas(reverse('cotizacion-list'), 3)
+
+
+class TestRegresionesBenchmark(unittest.TestCase):
+    """Comparación contra la línea base de benchmarks/endpoints.py"""
+
+    def setUp(self):
+        from benchmarks.endpoints import regresiones
+        self.regresiones = regresiones
+        self.base = {'simular': {'p50': 10.0, 'p95': 20.0, 'consultas': 4}}
+
+    def _comparar(self, umbral=0.25, **metricas):
+        return self.regresiones({'simular': {**self.base['simular'], **metricas}}, self.base, umbral, 2.0)
+
+    def test_umbral_relativo_mas_holgura_en_tiempos(self):
+        # 10 * 1.25 + 2 = 14.5
+        self.assertEqual(self._comparar(p50=14.5), [])
+        self.assertEqual(self._comparar(p50=14.6), [('simular', 'p50', 10.0, 14.6)])
+        # Sin la holgura 13 ya sería regresión
+        self.assertEqual(self.regresiones({'simular': {'p50': 13.0}}, self.base, 0.25, 0.0),
+                         [('simular', 'p50', 10.0, 13.0)])
+        self.assertEqual(self._comparar(p50=13.0), [])
+
+    def test_tiempos_solo_con_umbral(self):
+        # Sin umbral los tiempos dependen de la máquina y no se comparan
+        self.assertEqual(self._comparar(umbral=None, p50=1000.0), [])
+        self.assertEqual(self._comparar(umbral=None, consultas=5), [('simular', 'consultas', 4, 5)])
+
+    def test_consultas_exactas(self):
+        self.assertEqual(self._comparar(consultas=5), [('simular', 'consultas', 4, 5)])
+        self.assertEqual(self._comparar(consultas=3), [])
+        self.assertEqual(self._comparar(umbral=10.0, consultas=5), [('simular', 'consultas', 4, 5)])
+
+    def test_ignora_endpoints_y_metricas_sin_base(self):
+        actual = {'nuevo': {'p50': 100.0}, 'simular': {'p99': 100.0, 'p95': 19.0}}
+        self.assertEqual(self.regresiones(actual, self.base, 0.25, 2.0), [])
@@ -2,7 +2,8 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     RegistroClienteView, LoginView, VehiculoViewSet, AccesorioViewSet,
-    CotizacionViewSet, ReservaViewSet, VentaViewSet, PagoView
+    CotizacionViewSet, ReservaViewSet, VentaViewSet, PagoView, MetricasView, ConsultasLentasView,
+    AutocompletarView
 )
 
 router = DefaultRouter()
@@ -16,5 +17,8 @@ urlpatterns = [
     path('', include(router.urls)),
     path('auth/registro/', RegistroClienteView.as_view(), name='registro'),
     path('auth/login/', LoginView.as_view(), name='login'),
+    path('autocompletar/', AutocompletarView.as_view(), name='autocompletar'),
     path('pagos/realizar/', PagoView.as_view(), name='realizar-pago'),
+    path('metrics', MetricasView.as_view(), name='metricas'),
+    path('metrics/consultas-lentas', ConsultasLentasView.as_view(), name='consultas-lentas'),
 ]
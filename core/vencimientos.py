@@ -0,0 +1,140 @@
+"""
+Barrido de vencimientos de reservas y cotizaciones
+
+Pasa a VENCIDA las reservas activas vencidas, libera sus vehículos
+(RESERVADO -> DISPONIBLE) e invalida las cotizaciones vencidas, todo con
+UPDATE por lotes acotados. Se ejecuta con `manage.py procesar_vencimientos`
+o con el hilo periódico que arranca `iniciar_barrido_periodico()` cuando
+FLYCAR_VENCIMIENTOS_INTERVALO está configurado.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from . import condicional
+from .models import Vehiculo, Cotizacion, CotizacionVehiculo, Reserva
+from .signals import vehiculos_actualizados
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ResultadoBarrido:
+    reservas: int = 0
+    cotizaciones: int = 0
+    vehiculos: int = 0
+    lotes: int = 0
+    segundos: float = 0.0
+
+    @property
+    def filas(self):
+        return self.reservas + self.cotizaciones + self.vehiculos
+
+    @property
+    def filas_por_segundo(self):
+        return self.filas / self.segundos if self.segundos else 0.0
+
+
+def vencer_reservas(ahora, lote, resultado):
+    """Vence reservas ACTIVA con fecha_hora_vencimiento < ahora y libera sus vehículos"""
+    while True:
+        with transaction.atomic():
+            ids = list(
+                Reserva.objects.filter(estado='ACTIVA', fecha_hora_vencimiento__lt=ahora)
+                .values_list('id', flat=True)[:lote]
+            )
+            if not ids:
+                return
+            resultado.reservas += Reserva.objects.filter(id__in=ids, estado='ACTIVA').update(
+                estado='VENCIDA', updated_at=ahora
+            )
+            condicional.invalidar('reservas')
+            vehiculo_ids = list(
+                CotizacionVehiculo.objects.filter(cotizacion__reserva__id__in=ids)
+                .values_list('vehiculo_id', flat=True)
+            )
+            resultado.vehiculos += Vehiculo.objects.filter(id__in=vehiculo_ids, estado='RESERVADO').update(
+                estado='DISPONIBLE', updated_at=ahora
+            )
+            vehiculos_actualizados.send(sender=Vehiculo, ids=vehiculo_ids)
+            resultado.lotes += 1
+
+
+def vencer_cotizaciones(ahora, lote, resultado):
+    """Invalida cotizaciones vigentes vencidas que no sostienen una reserva activa"""
+    while True:
+        with transaction.atomic():
+            ids = list(
+                Cotizacion.objects.filter(valida=True, fecha_hora_vencimiento__lt=ahora)
+                .exclude(reserva__estado='ACTIVA')
+                .values_list('id', flat=True)[:lote]
+            )
+            if not ids:
+                return
+            resultado.cotizaciones += Cotizacion.objects.filter(id__in=ids, valida=True).update(
+                valida=False, updated_at=ahora
+            )
+            condicional.invalidar('cotizaciones')
+            resultado.lotes += 1
+
+
+def procesar_vencimientos(ahora=None, lote=None):
+    """Ejecuta un barrido completo; las reservas primero para liberar vehículos cuanto antes"""
+    ahora = ahora or timezone.now()
+    lote = lote or settings.FLYCAR_VENCIMIENTOS_LOTE
+    resultado = ResultadoBarrido()
+    inicio = time.perf_counter()
+    vencer_reservas(ahora, lote, resultado)
+    vencer_cotizaciones(ahora, lote, resultado)
+    resultado.segundos = time.perf_counter() - inicio
+    return resultado
+
+
+class BarridoPeriodico(threading.Thread):
+    """Hilo daemon que ejecuta el barrido cada `intervalo` segundos"""
+
+    def __init__(self, intervalo, lote=None):
+        super().__init__(name='flycar-vencimientos', daemon=True)
+        self.intervalo = intervalo
+        self.lote = lote
+        self.detenido = threading.Event()
+
+    def run(self):
+        while not self.detenido.wait(self.intervalo):
+            close_old_connections()
+            try:
+                resultado = procesar_vencimientos(lote=self.lote)
+            except Exception:
+                logger.exception('Falló el barrido de vencimientos')
+                continue
+            finally:
+                close_old_connections()
+            if resultado.filas:
+                logger.info(
+                    'Vencimientos: %d reservas, %d cotizaciones, %d vehículos liberados (%.0f filas/s)',
+                    resultado.reservas, resultado.cotizaciones, resultado.vehiculos,
+                    resultado.filas_por_segundo,
+                )
+
+    def detener(self):
+        self.detenido.set()
+
+
+_barrido = None
+
+
+def iniciar_barrido_periodico():
+    """Arranca el hilo periódico una vez por proceso si está configurado"""
+    global _barrido
+    intervalo = settings.FLYCAR_VENCIMIENTOS_INTERVALO
+    if not intervalo or _barrido is not None:
+        return _barrido
+    _barrido = BarridoPeriodico(intervalo)
+    _barrido.start()
+    return _barrido
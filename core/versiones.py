@@ -0,0 +1,73 @@
+"""
+Contadores de versión para invalidar caches en memoria de cada proceso
+
+Las versiones viven en el cache de Django. Son marcas de tiempo en
+nanosegundos estrictamente crecientes, de modo que una clave desalojada
+nunca repite un valor ya visto.
+
+Requisito: con más de un proceso (varios workers de gunicorn/uvicorn)
+el cache `default` tiene que ser compartido (Redis o Memcached; el de
+archivos no hace `add` atómico, del que dependen los registros de cambios
+de core/facetas.py y core/instantanea.py). Con LocMemCache cada worker tiene sus propias
+versiones: una escritura atendida por un worker no invalida los caches
+de los demás y sus ETags siguen validando datos viejos. Por eso
+core/condicional.py no emite validadores con un cache por proceso y
+`verificar_cache` (llamada desde core/arranque.py) lo avisa al
+arrancar. FLYCAR_CACHE_UN_PROCESO declara que hay un solo proceso (tests,
+runserver) y desactiva ambas cosas.
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+PREFIJO = 'flycar:version:'
+
+# Backends que cada proceso tiene por separado
+LOCALES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_compartido():
+    """True si todos los procesos ven las mismas versiones (o si se declaró un solo proceso)"""
+    return settings.FLYCAR_CACHE_UN_PROCESO or settings.CACHES['default']['BACKEND'] not in LOCALES
+
+
+def verificar_cache():
+    """Avisa al arrancar si el cache de las versiones no se comparte entre procesos"""
+    if not cache_compartido():
+        logger.warning(
+            'El cache default (%s) es por proceso: con varios workers las versiones no se '
+            'comparten y las respuestas condicionales quedan desactivadas. Use '
+            'settings_produccion (Redis en FLYCAR_CACHE_URL) o declare FLYCAR_CACHE_UN_PROCESO.',
+            settings.CACHES['default']['BACKEND'],
+        )
+
+
+def version(clave):
+    """Versión actual de `clave`; la inicializa si el cache no la tiene"""
+    valor = cache.get(PREFIJO + clave)
+    if valor is None:
+        cache.add(PREFIJO + clave, time.time_ns(), None)
+        valor = cache.get(PREFIJO + clave)
+    return valor
+
+
+def incrementar(clave):
+    """Publica una versión nueva de `clave` y la devuelve"""
+    nuevo = max(time.time_ns(), (cache.get(PREFIJO + clave) or 0) + 1)
+    cache.set(PREFIJO + clave, nuevo, None)
+    return nuevo
+
+
+def invalidar(clave):
+    """Incrementa ya (lecturas dentro de la transacción) y otra vez al confirmarla"""
+    incrementar(clave)
+    transaction.on_commit(lambda: incrementar(clave))
@@ -5,21 +5,32 @@ from rest_framework.views import APIView
 from django.utils import timezone
 from django.db import transaction
 from django.shortcuts import get_object_or_404
+from django.http import Http404, HttpResponse
+from django.conf import settings
 from decimal import Decimal
 from datetime import timedelta
 import uuid
 
 from .models import (
     Usuario, Cliente, Vendedor, Vehiculo, Accesorio, Cotizacion,
-    CotizacionVehiculo, CotizacionAccesorio, Reserva, Venta, Pago,
-    ModeloAccesorio, Oferta
+    CotizacionVehiculo, CotizacionAccesorio, CotizacionArchivada, Reserva, Venta, Pago,
+    ModeloAccesorio, Oferta, VehiculoCatalogo
 )
 from .serializers import (
     UsuarioSerializer, RegistroClienteSerializer, LoginSerializer,
-    VehiculoSerializer, AccesorioSerializer, CotizacionSerializer,
-    SimularCotizacionSerializer, GenerarCotizacionSerializer,
+    VehiculoSerializer, VehiculoCatalogoSerializer, AccesorioSerializer, CotizacionSerializer,
+    CotizacionArchivadaSerializer, FiltroFacetasSerializer, AutocompletarSerializer,
+    SimularCotizacionSerializer, GenerarCotizacionSerializer, GenerarCotizacionFlotaSerializer,
     ReservaSerializer, VentaSerializer, PagoSerializer, RealizarPagoSerializer
 )
+from .precios import cotizar
+from .facetas import FACETAS, indice_facetas
+from .autocompletado import TIPOS as TIPOS_AUTOCOMPLETADO, indice_autocompletado
+from .perfilamiento import SerializacionMedidaMixin, registro as registro_metricas
+from .condicional import RespuestaCondicionalMixin
+from .instantanea import CatalogoInstantaneaMixin
+from .seleccion import CargaSelectivaMixin, cargar
+from . import busqueda, condicional, consultas_lentas, instantanea, inventario
 
 # ==================== AUTHENTICATION ====================
 
@@ -47,28 +58,94 @@ class LoginView(APIView):
 
 # ==================== PRODUCTOS ====================
 
-class VehiculoViewSet(viewsets.ModelViewSet):
+class VehiculoViewSet(RespuestaCondicionalMixin, CatalogoInstantaneaMixin, CargaSelectivaMixin, SerializacionMedidaMixin,
+                      viewsets.ModelViewSet):
     queryset = Vehiculo.objects.filter(eliminado=False)
     serializer_class = VehiculoSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    ordering = ['-created_at']
+    versiones_condicionales = ('vehiculos',)
+    condicional_ofertas = True
+    # El catálogo desnormalizado no tiene relaciones que cargar
+    plan_carga = ()
+    
+    # Las lecturas se sirven desde la instantánea mapeada en memoria si está al día
+    # (ver core/instantanea.py) o del catálogo desnormalizado (ver core/catalogo.py)
+    acciones_catalogo = ('list', 'retrieve')
     
     def get_queryset(self):
-        queryset = super().get_queryset()
+        if self.action in self.acciones_catalogo:
+            queryset = VehiculoCatalogo.objects.filter(eliminado=False)
+            q = self.request.query_params.get('q')
+            if q is not None and self.action == 'list':
+                # Búsqueda de texto (core/busqueda.py): resultados por relevancia
+                queryset = busqueda.filtrar(queryset, q)
+                self.ordering = ['relevancia']
+        else:
+            queryset = super().get_queryset()
         estado = self.request.query_params.get('estado')
         if estado:
             queryset = queryset.filter(estado=estado)
         return queryset
+    
+    def get_serializer_class(self):
+        if self.action in self.acciones_catalogo:
+            return VehiculoCatalogoSerializer
+        return super().get_serializer_class()
 
-class AccesorioViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['get'])
+    def facetas(self, request):
+        """Total y conteos por faceta para una combinación de filtros (ver core/facetas.py)"""
+        serializer = FiltroFacetasSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        datos = serializer.validated_data
+        filtros = {faceta: datos[faceta] for faceta in FACETAS if faceta in datos}
+        return Response(indice_facetas().consultar(filtros, datos.get('precio_min'), datos.get('precio_max')))
+
+class AccesorioViewSet(RespuestaCondicionalMixin, CargaSelectivaMixin, SerializacionMedidaMixin, viewsets.ModelViewSet):
     queryset = Accesorio.objects.filter(eliminado=False)
     serializer_class = AccesorioSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    ordering = ['-created_at']
+    versiones_condicionales = ('accesorios',)
+    plan_carga = ()
+
+class AutocompletarView(APIView):
+    """Sugerencias por prefijo de marcas, modelos y clientes (ver core/autocompletado.py)"""
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        serializer = AutocompletarSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        datos = serializer.validated_data
+        indice = indice_autocompletado()
+        respuesta = {}
+        for tipo in datos.get('tipo') or TIPOS_AUTOCOMPLETADO:
+            respuesta[f'{tipo}s'] = indice.buscar(
+                tipo, datos['q'], datos['limite'], ids=self.clientes_visibles() if tipo == 'cliente' else None
+            )
+        return Response(respuesta)
+
+    def clientes_visibles(self):
+        """None si ve todos los clientes; si no, los ids que puede ver (un cliente solo se ve a sí mismo)"""
+        user = self.request.user
+        if user.is_authenticated and user.tipo_usuario == 'VENDEDOR':
+            return None
+        if user.is_authenticated and user.tipo_usuario == 'CLIENTE':
+            return list(Cliente.objects.filter(usuario=user).values_list('id', flat=True))
+        return []
 
 # ==================== COTIZACIONES ====================
 
-class CotizacionViewSet(viewsets.ModelViewSet):
+class CotizacionViewSet(RespuestaCondicionalMixin, CargaSelectivaMixin, SerializacionMedidaMixin, viewsets.ModelViewSet):
     serializer_class = CotizacionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    ordering = ['-fecha_hora_generada']
+    # Las líneas muestran el vehículo (con precio de oferta) y el accesorio
+    versiones_condicionales = ('cotizaciones', 'vehiculos', 'accesorios')
+    condicional_ofertas = True
+    # Líneas con su vehículo (modelo, marca y oferta para el precio) y su accesorio
+    plan_carga = ('vehiculos__vehiculo__modelo__marca', 'vehiculos__vehiculo__oferta', 'accesorios__accesorio')
     
     def get_queryset(self):
         user = self.request.user
@@ -78,54 +155,61 @@ class CotizacionViewSet(viewsets.ModelViewSet):
             return Cotizacion.objects.all() # Vendedores ven todas
         return Cotizacion.objects.none()
 
+    def get_queryset_archivadas(self):
+        """Cotizaciones archivadas (core/archivo.py) con la misma visibilidad que get_queryset"""
+        user = self.request.user
+        if user.tipo_usuario == 'CLIENTE':
+            return CotizacionArchivada.objects.filter(cliente__usuario=user)
+        elif user.tipo_usuario == 'VENDEDOR':
+            return CotizacionArchivada.objects.all()
+        return CotizacionArchivada.objects.none()
+
+    def retrieve(self, request, *args, **kwargs):
+        # Una cotización archivada sigue accesible por su id
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            archivada = generics.get_object_or_404(self.get_queryset_archivadas(), pk=kwargs['pk'])
+            return Response(CotizacionArchivadaSerializer(archivada).data)
+
+    @action(detail=False, methods=['get'])
+    def historial(self, request):
+        """Cotizaciones archivadas, paginadas igual que el listado"""
+        pagina = self.paginate_queryset(self.get_queryset_archivadas())
+        return self.get_paginated_response(CotizacionArchivadaSerializer(pagina, many=True).data)
+
     @action(detail=False, methods=['post'], permission_classes=[permissions.AllowAny])
     def simular(self, request):
         """C.U. 01 - Simular Cotización"""
         serializer = SimularCotizacionSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        data = serializer.validated_data
-        vehiculos_data = data['vehiculos']
-        
-        total = Decimal('0.00')
-        detalle = []
-        
-        for v_data in vehiculos_data:
-            vehiculo = get_object_or_404(Vehiculo, id=v_data['vehiculo_id'])
-            precio_vehiculo = vehiculo.get_precio_con_oferta()
-            total += precio_vehiculo
-            
-            accesorios_detalle = []
-            if 'accesorios' in v_data:
-                for acc_id in v_data['accesorios']:
-                    accesorio = get_object_or_404(Accesorio, id=acc_id)
-                    precio_acc = accesorio.get_precio_para_modelo(vehiculo.modelo.id)
-                    total += precio_acc
-                    accesorios_detalle.append({
-                        'id': accesorio.id,
-                        'nombre': accesorio.nombre,
-                        'precio': precio_acc
-                    })
-            
-            detalle.append({
-                'vehiculo': {
-                    'id': vehiculo.id,
-                    'modelo': str(vehiculo.modelo),
-                    'precio': precio_vehiculo
-                },
-                'accesorios': accesorios_detalle
-            })
+        items = serializer.validated_data['vehiculos']
+        actual = instantanea.vigente()
+        # Sin consultas desde la instantánea; si le falta algún ítem decide la base
+        resultado = actual and actual.cotizar(items)
+        if resultado is None:
+            resultado = cotizar(items)
             
         return Response({
-            'importe_total': total,
-            'detalle': detalle
+            'importe_total': resultado.total,
+            'detalle': resultado.detalle()
         })
 
     @action(detail=False, methods=['post'])
     @transaction.atomic
     def generar(self, request):
         """C.U. 02 - Generar Cotización"""
-        serializer = GenerarCotizacionSerializer(data=request.data)
+        return self._generar(request, GenerarCotizacionSerializer)
+
+    @action(detail=False, methods=['post'], url_path='generar-flota')
+    @transaction.atomic
+    def generar_flota(self, request):
+        """C.U. 02 - Generar Cotización de flota (clientes corporativos, hasta 500 vehículos)"""
+        return self._generar(request, GenerarCotizacionFlotaSerializer)
+
+    def _generar(self, request, serializer_class):
+        serializer = serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
         
         data = serializer.validated_data
@@ -141,63 +225,56 @@ class CotizacionViewSet(viewsets.ModelViewSet):
             ).exclude(
                 reserva__estado='ACTIVA'
             ).update(valida=False)
+            condicional.invalidar('cotizaciones')
         elif user.tipo_usuario == 'VENDEDOR':
             cliente_id = data.get('cliente_id')
             cliente = get_object_or_404(Cliente, id=cliente_id)
         else:
             return Response({'error': 'Rol no autorizado'}, status=status.HTTP_403_FORBIDDEN)
-            
-        # Crear cotización
+        
+        # Precios de todo el carrito antes de insertar: un solo INSERT de la cotización
+        resultado = cotizar(data['vehiculos'])
+        
         cotizacion = Cotizacion.objects.create(
             cliente=cliente,
-            importe_final=0, # Se calcula después
+            importe_final=resultado.total,
             fecha_hora_vencimiento=timezone.now() + timedelta(hours=48)
         )
         
-        total = Decimal('0.00')
-        
-        # Procesar vehículos y accesorios
-        for v_data in data['vehiculos']:
-            vehiculo = get_object_or_404(Vehiculo, id=v_data['vehiculo_id'])
-            
-            # Reservar vehículo temporalmente (lógica simplificada)
-            # En realidad el estado cambia a RESERVADO solo con la Reserva (C.U. 3)
-            # Pero aquí ya se asocia a la cotización
-            
-            precio_vehiculo = vehiculo.get_precio_con_oferta()
-            total += precio_vehiculo
-            
-            cot_vehiculo = CotizacionVehiculo.objects.create(
+        # Registrar vehículos y accesorios con los precios calculados
+        # (el estado del vehículo cambia a RESERVADO recién con la Reserva, C.U. 3)
+        lineas_vehiculo = []
+        lineas_accesorio = []
+        for linea in resultado.lineas:
+            cot_vehiculo = CotizacionVehiculo(
                 cotizacion=cotizacion,
-                vehiculo=vehiculo,
-                precio_unitario=precio_vehiculo
+                vehiculo=linea.vehiculo,
+                precio_unitario=linea.precio
             )
-            
-            if 'accesorios' in v_data:
-                for acc_id in v_data['accesorios']:
-                    accesorio = get_object_or_404(Accesorio, id=acc_id)
-                    precio_acc = accesorio.get_precio_para_modelo(vehiculo.modelo.id)
-                    total += precio_acc
-                    
-                    CotizacionAccesorio.objects.create(
-                        cotizacion=cotizacion,
-                        cotizacion_vehiculo=cot_vehiculo,
-                        accesorio=accesorio,
-                        precio_unitario=precio_acc
-                    )
-        
-        cotizacion.importe_final = total
-        cotizacion.save()
+            lineas_vehiculo.append(cot_vehiculo)
+            for linea_acc in linea.accesorios:
+                lineas_accesorio.append(CotizacionAccesorio(
+                    cotizacion=cotizacion,
+                    cotizacion_vehiculo=cot_vehiculo,
+                    accesorio=linea_acc.accesorio,
+                    precio_unitario=linea_acc.precio
+                ))
+        CotizacionVehiculo.objects.bulk_create(lineas_vehiculo, batch_size=500)
+        CotizacionAccesorio.objects.bulk_create(lineas_accesorio, batch_size=500)
         
+        # Con el mismo plan de carga que el detalle
+        cotizacion = cargar(Cotizacion.objects.all(), CotizacionSerializer(), self.plan_carga).get(pk=cotizacion.pk)
         return Response(CotizacionSerializer(cotizacion).data, status=status.HTTP_201_CREATED)
 
 # ==================== RESERVAS Y PAGOS ====================
 
-class ReservaViewSet(viewsets.ModelViewSet):
+class ReservaViewSet(RespuestaCondicionalMixin, CargaSelectivaMixin, SerializacionMedidaMixin, viewsets.ModelViewSet):
     serializer_class = ReservaSerializer
     permission_classes = [permissions.IsAuthenticated]
     ordering_fields = ['fecha_hora_generada']
     ordering = ['-fecha_hora_generada']
+    versiones_condicionales = ('reservas',)
+    plan_carga = ('pago',)
     
     def get_queryset(self):
         user = self.request.user
@@ -221,6 +298,12 @@ class ReservaViewSet(viewsets.ModelViewSet):
         if hasattr(cotizacion, 'reserva'):
             return Response({'error': 'Cotización ya tiene reserva'}, status=status.HTTP_400_BAD_REQUEST)
             
+        # Reservar vehículos (UPDATE condicionado: solo gana una reserva por vehículo)
+        try:
+            inventario.reservar(inventario.vehiculos_de(cotizacion))
+        except inventario.TransicionInvalida:
+            return Response({'error': 'Vehículo no disponible'}, status=status.HTTP_409_CONFLICT)
+            
         # Calcular seña (5%)
         importe_seña = cotizacion.importe_final * Decimal('0.05')
         
@@ -240,11 +323,6 @@ class ReservaViewSet(viewsets.ModelViewSet):
             fecha_hora_vencimiento=timezone.now() + timedelta(days=7)
         )
         
-        # Actualizar estado de vehículos a RESERVADO
-        for cv in cotizacion.vehiculos.all():
-            cv.vehiculo.estado = 'RESERVADO'
-            cv.vehiculo.save()
-            
         # Extender validez de cotización
         cotizacion.fecha_hora_vencimiento = reserva.fecha_hora_vencimiento
         cotizacion.save()
@@ -257,25 +335,31 @@ class ReservaViewSet(viewsets.ModelViewSet):
         """C.U. 06 - Cancelar Reserva"""
         reserva = self.get_object()
         
-        if reserva.estado != 'ACTIVA':
+        # Cancelación condicionada al estado, para que dos cancelaciones no compitan
+        cancelada = Reserva.objects.filter(id=reserva.id, estado='ACTIVA').update(
+            estado='CANCELADA', updated_at=timezone.now()
+        )
+        if not cancelada:
             return Response({'error': 'Reserva no activa'}, status=status.HTTP_400_BAD_REQUEST)
+        condicional.invalidar('reservas')
             
         # Devolución de pago (Simulado)
         # ... lógica de devolución ...
         
-        reserva.estado = 'CANCELADA'
-        reserva.save()
-        
         # Liberar vehículos
-        for cv in reserva.cotizacion.vehiculos.all():
-            cv.vehiculo.estado = 'DISPONIBLE'
-            cv.vehiculo.save()
+        try:
+            inventario.liberar(inventario.vehiculos_de(reserva.cotizacion_id))
+        except inventario.TransicionInvalida:
+            transaction.set_rollback(True)
+            return Response({'error': 'Vehículos en estado inconsistente'}, status=status.HTTP_409_CONFLICT)
             
         return Response({'status': 'Reserva cancelada y pago devuelto'})
 
-class VentaViewSet(viewsets.ModelViewSet):
+class VentaViewSet(CargaSelectivaMixin, SerializacionMedidaMixin, viewsets.ModelViewSet):
     serializer_class = VentaSerializer
     permission_classes = [permissions.IsAuthenticated] # Solo vendedores
+    ordering = ['-fecha_hora_generada']
+    plan_carga = ('pago', 'vendedor')
     
     def get_queryset(self):
         if self.request.user.tipo_usuario == 'VENDEDOR':
@@ -295,10 +379,22 @@ class VentaViewSet(viewsets.ModelViewSet):
             
         # Calcular importe a pagar
         importe_total = cotizacion.importe_final
-        if hasattr(cotizacion, 'reserva') and cotizacion.reserva.estado == 'ACTIVA':
+        reservada = hasattr(cotizacion, 'reserva') and cotizacion.reserva.estado == 'ACTIVA'
+        if reservada:
+            completada = Reserva.objects.filter(id=cotizacion.reserva.id, estado='ACTIVA').update(
+                estado='COMPLETADA', updated_at=timezone.now()
+            )
+            if not completada:
+                return Response({'error': 'Reserva no activa'}, status=status.HTTP_409_CONFLICT)
+            condicional.invalidar('reservas')
             importe_total -= cotizacion.reserva.importe
-            cotizacion.reserva.estado = 'COMPLETADA'
-            cotizacion.reserva.save()
+        
+        # Marcar vehículos como VENDIDOS (reservados por esta cotización o disponibles)
+        try:
+            inventario.vender(inventario.vehiculos_de(cotizacion), reservados=reservada)
+        except inventario.TransicionInvalida:
+            transaction.set_rollback(True)
+            return Response({'error': 'Vehículo no disponible'}, status=status.HTTP_409_CONFLICT)
             
         # C.U. 05 - Realizar Pago
         pago = Pago.objects.create(
@@ -315,11 +411,6 @@ class VentaViewSet(viewsets.ModelViewSet):
             comision=cotizacion.importe_final * Decimal('0.10') # 10% comisión
         )
         
-        # Marcar vehículos como VENDIDOS
-        for cv in cotizacion.vehiculos.all():
-            cv.vehiculo.estado = 'VENDIDO'
-            cv.vehiculo.save()
-            
         return Response(VentaSerializer(venta).data, status=status.HTTP_201_CREATED)
 
 class PagoView(APIView):
@@ -344,3 +435,41 @@ class PagoView(APIView):
                 'success': False,
                 'mensaje': 'Pago rechazado por el sistema externo'
             }, status=status.HTTP_402_PAYMENT_REQUIRED)
+
+# ==================== MÉTRICAS ====================
+
+class AccesoMetricas(permissions.BasePermission):
+    """Usuarios staff o las IPs de FLYCAR_METRICAS_IPS (el scraper de Prometheus)"""
+
+    def has_permission(self, request, view):
+        if request.user and request.user.is_staff:
+            return True
+        return request.META.get('REMOTE_ADDR') in settings.FLYCAR_METRICAS_IPS
+
+
+class MetricasView(APIView):
+    """Histogramas de PerfilamientoMiddleware en formato de texto de Prometheus"""
+    permission_classes = [AccesoMetricas]
+    
+    def get(self, request):
+        if not settings.FLYCAR_PERFILAMIENTO:
+            raise Http404
+        return HttpResponse(
+            registro_metricas.prometheus(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
+
+
+class ConsultasLentasView(APIView):
+    """Formas más costosas del buffer de consultas lentas de este worker (ver core/consultas_lentas.py)"""
+    permission_classes = [AccesoMetricas]
+
+    def get(self, request):
+        monitor = consultas_lentas.monitor
+        if monitor is None:
+            raise Http404
+        try:
+            top = int(request.query_params.get('top', 10))
+        except ValueError:
+            top = 10
+        return Response(monitor.resumen(top))
@@ -6,6 +6,12 @@ import api from '@/lib/api';
 import Button from '@/components/ui/Button';
 import { FileText, Calendar, XCircle, ExternalLink, Loader2, CheckCircle } from 'lucide-react';
 
+const CAMPOS_COTIZACIONES = [
+    'id', 'fecha_hora_generada', 'valida', 'importe_final', 'vehiculos.id',
+    'vehiculos.vehiculo_detalle.modelo_nombre', 'vehiculos.vehiculo_detalle.marca_nombre', 'vehiculos.vehiculo_detalle.anio',
+].join(',');
+const CAMPOS_RESERVAS = 'id,nro_reserva,estado,fecha_hora_vencimiento,importe,cotizacion';
+
 export default function DashboardPage() {
     const router = useRouter();
     const [userType, setUserType] = useState<string | null>(null);
@@ -31,8 +37,9 @@ export default function DashboardPage() {
     const fetchData = async () => {
         try {
             const [cotRes, resRes] = await Promise.all([
-                api.get('/cotizaciones/'),
-                api.get('/reservas/')
+                // Solo los campos que muestran las tarjetas (?fields=, ver core/seleccion.py)
+                api.get('/cotizaciones/', { params: { fields: CAMPOS_COTIZACIONES } }),
+                api.get('/reservas/', { params: { fields: CAMPOS_RESERVAS } })
             ]);
             setCotizaciones(cotRes.data.results || cotRes.data);
             setReservas(resRes.data.results || resRes.data);
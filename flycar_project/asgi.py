@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'flycar_project.settings')
 
 application = get_asgi_application()
+
+# Avisos, hilos periódicos y precargas de cada proceso (ver core/arranque.py)
+from core.arranque import iniciar  # noqa: E402
+
+iniciar()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,12 +47,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Primero para medir la request completa; inactivo salvo FLYCAR_PERFILAMIENTO
+    'core.middleware.PerfilamientoMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Lecturas a réplicas con read-your-writes; inactivo sin FLYCAR_REPLICAS
+    'core.db_router.FijacionPrimariaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -108,6 +113,15 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# PBKDF2 por defecto, medido por el perfilamiento (mismo algoritmo y formato de hash)
+PASSWORD_HASHERS = [
+    'core.perfilamiento.PBKDF2PasswordHasherMedido',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -142,8 +156,20 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.KeysetPagination',
     'PAGE_SIZE': 10,
+    # JSON con orjson y MessagePack por Accept si está instalado (core/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        *(['core.renderers.MessagePackRenderer'] if find_spec('msgpack') else []),
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+        *(['core.parsers.MessagePackParser'] if find_spec('msgpack') else []),
+    ],
 }
 
 # JWT Configuration
@@ -161,3 +187,71 @@ SIMPLE_JWT = {
 # CORS Configuration
 CORS_ALLOW_ALL_ORIGINS = True  # Para desarrollo
 CORS_ALLOW_CREDENTIALS = True
+
+# Vencimientos de reservas y cotizaciones (core/vencimientos.py)
+# Segundos entre barridos del hilo periódico; None lo deshabilita
+FLYCAR_VENCIMIENTOS_INTERVALO = None
+FLYCAR_VENCIMIENTOS_LOTE = 500
+
+# Matriz de precios en memoria (core/precios.py): antigüedad máxima en segundos,
+# como resguardo ante cambios que no disparan señales
+FLYCAR_PRECIOS_TTL = 300
+
+# Perfilamiento por request: header Server-Timing y /api/metrics (ver core/perfilamiento.py).
+# /api/metrics y /api/metrics/consultas-lentas solo responden a usuarios staff y a
+# las IPs de FLYCAR_METRICAS_IPS (p. ej. la del scraper de Prometheus)
+FLYCAR_PERFILAMIENTO = False
+FLYCAR_METRICAS_IPS = []
+
+# Registro de consultas lentas (core/consultas_lentas.py): umbral en milisegundos,
+# None lo deshabilita. El archivo JSONL es el que lee `manage.py consultas_lentas`
+# y rota al superar el tamaño máximo en bytes. Los valores de los parámetros (datos
+# personales) no se guardan salvo con FLYCAR_CONSULTAS_LENTAS_PARAMETROS
+FLYCAR_CONSULTAS_LENTAS_MS = None
+FLYCAR_CONSULTAS_LENTAS_CAPACIDAD = 500
+FLYCAR_CONSULTAS_LENTAS_ARCHIVO = None
+FLYCAR_CONSULTAS_LENTAS_ARCHIVO_MAX_BYTES = 10 * 1024 * 1024
+FLYCAR_CONSULTAS_LENTAS_PARAMETROS = False
+
+# Réplicas de lectura (core/db_router.py): aliases de DATABASES que reciben las
+# lecturas; vacío deshabilita el router. Tras escribir, un cliente lee de la
+# primaria durante FLYCAR_REPLICA_FIJACION_SEGUNDOS
+DATABASE_ROUTERS = ['core.db_router.RouterLecturaEscritura']
+FLYCAR_REPLICAS = []
+FLYCAR_REPLICA_FIJACION_SEGUNDOS = 5
+
+# Archivo de cotizaciones muertas (core/archivo.py, manage.py archivar_cotizaciones):
+# antigüedad mínima en días y cotizaciones por transacción
+FLYCAR_ARCHIVO_DIAS = 30
+FLYCAR_ARCHIVO_LOTE = 500
+
+# Índice de facetas del catálogo en memoria (core/facetas.py): ancho de los rangos
+# de precio, antigüedad máxima en segundos y si se construye al arrancar cada proceso
+# (core/arranque.py) en lugar de en la primera consulta
+FLYCAR_FACETAS_RANGO_PRECIO = 5000
+FLYCAR_FACETAS_TTL = 300
+FLYCAR_FACETAS_PRECARGAR = False
+
+# Autocompletado por prefijo en memoria (core/autocompletado.py): antigüedad máxima
+# en segundos y si se construye al arrancar cada proceso (core/arranque.py)
+FLYCAR_AUTOCOMPLETADO_TTL = 3600
+FLYCAR_AUTOCOMPLETADO_PRECARGAR = False
+
+# Instantánea del catálogo mapeada en memoria (core/instantanea.py): archivo compartido
+# por los procesos (None la desactiva) y cada cuántos segundos la regenera el hilo
+# escritor (core/arranque.py) si está vencida o tiene vehículos cambiados superpuestos
+# (None: solo con `manage.py escribir_instantanea`)
+FLYCAR_INSTANTANEA_RUTA = None
+FLYCAR_INSTANTANEA_INTERVALO = None
+
+# Cache de Django: guarda las versiones de core/versiones.py (ETags, matriz de precios,
+# facetas, autocompletado, instantánea). En desarrollo, LocMemCache con un solo proceso
+# (runserver). Con varios workers las versiones tienen que ser compartidas: el perfil de
+# producción (settings_produccion.py) usa Redis; con un cache por proceso y sin declarar
+# FLYCAR_CACHE_UN_PROCESO no se emiten ETags (ver core/condicional.py)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+FLYCAR_CACHE_UN_PROCESO = True
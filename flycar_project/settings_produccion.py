@@ -0,0 +1,61 @@
+"""
+Perfil de producción sobre SQLite
+
+    DJANGO_SETTINGS_MODULE=flycar_project.settings_produccion
+
+Cada conexión nueva aplica los PRAGMA de SQLITE_PRAGMAS (WAL para que las
+lecturas no bloqueen a la escritura, mmap y cache de páginas más grandes,
+temporales en memoria). Las transacciones empiezan con BEGIN IMMEDIATE:
+toman el lock de escritura al inicio y esperan `timeout` en lugar de
+fallar con "database is locked" al intentar subir de lectura a escritura.
+Las conexiones se reutilizan entre requests (CONN_MAX_AGE) y se verifican
+antes de usarlas (CONN_HEALTH_CHECKS). Requiere Django 5.1 o superior.
+
+El cache es Redis (FLYCAR_CACHE_URL): todos los workers comparten las
+versiones de core/versiones.py que invalidan sus caches en memoria y
+validan los ETags.
+"""
+
+import os
+
+from .settings import *  # noqa: F401,F403
+
+DEBUG = False
+
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', SECRET_KEY)
+
+ALLOWED_HOSTS = [h for h in os.environ.get('DJANGO_ALLOWED_HOSTS', 'localhost').split(',') if h]
+
+SQLITE_TIMEOUT = 20  # segundos de espera por el lock de escritura
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,  # negativo: KiB (64 MiB)
+    'busy_timeout': SQLITE_TIMEOUT * 1000,
+    'temp_store': 'MEMORY',
+}
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('FLYCAR_SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': SQLITE_TIMEOUT,
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': ';'.join(f'PRAGMA {pragma}={valor}' for pragma, valor in SQLITE_PRAGMAS.items()),
+        },
+    }
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('FLYCAR_CACHE_URL', 'redis://127.0.0.1:6379/1'),
+        'KEY_PREFIX': 'flycar',
+    }
+}
+FLYCAR_CACHE_UN_PROCESO = False
@@ -4,5 +4,27 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db_test.sqlite3',
+        # Escritores que esperan el lock (como settings_produccion) y base de test en un archivo:
+        # en memoria compartida SQLite no respeta el timeout (ver TestReservasConcurrentes)
+        'OPTIONS': {
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE',
+        },
+        'TEST': {
+            'NAME': BASE_DIR / 'db_test_default.sqlite3',
+        },
+    },
+    # Réplica local para los tests del router (se copia con sincronizar_replicas)
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db_test_replica.sqlite3',
+    },
+}
+
+# Los tests corren en un solo proceso: el cache en memoria alcanza
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+FLYCAR_CACHE_UN_PROCESO = True
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'flycar_project.settings')
 
 application = get_wsgi_application()
+
+# Avisos, hilos periódicos y precargas de cada proceso (ver core/arranque.py)
+from core.arranque import iniciar  # noqa: E402
+
+iniciar()